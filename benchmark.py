@@ -0,0 +1,345 @@
+"""
+Benchmark suite of the game:
+- micro benchmarks of the physics (Environment.add_vectors, collide, bounce, attraction);
+- full arena ticks with N = 10 to 10,000 bodies;
+- a full headless generation of game_1, game_2 and game_3 at a fixed seed;
+- the startup time (imports and initialization) of the commands of run_game.py.
+
+The results are compared to a baseline file (json) and regressions above a threshold are flagged.
+Run: python3 benchmark.py --help
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Dict, Callable, Optional
+
+# Import local modules
+from gamecore.environment import Environment
+from gamecore.player import AIBots, Obstacle, Player
+
+
+# =====================================================================
+# Constants
+# =====================================================================
+
+DEFAULT_BASELINE_PATH = "data/benchmark_baseline.json"
+DEFAULT_THRESHOLD = 0.10  # flag a regression if a benchmark is more than 10% slower
+ARENA_SIZES = [10, 100, 1000, 10000]
+GAMES_CONFIG = {
+    "game_1": "gamecore/config-feedforward.txt",
+    "game_2": "gamecore/config-feedforward-2.txt",
+    "game_3": "gamecore/config-feedforward-3.txt",
+}
+SEED = 2021
+GENERATION_TICKS = 600  # 5 seconds of simulation at 120 ticks per second
+STARTUP_COMMANDS = ["train", "story"]
+# class attributes keeping track of the bodies created (restored after the benchmarks that create bodies)
+REGISTRIES = [(Player, "players_list"), (Player, "count_created_players"),
+              (AIBots, "aibots_list"), (AIBots, "count_created_aibots"),
+              (Obstacle, "players_list"), (Obstacle, "count_created_obstacles")]
+# globals of run_game changed by a generation of a game
+GAME_GLOBALS = ["max_ticks_per_generation", "generation", "headless"]
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def measure(function: Callable[[], None], number: int, repeat: int = 5) -> Dict[str, float]:
+    """
+    Function to time a function called number times, repeat times.
+
+    Returns: {"best_s": x, "median_s": x} time of 1 call in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number)
+    return {"best_s": min(timings), "median_s": statistics.median(timings)}
+
+
+def save_registries() -> list:
+    """
+    Function to copy the class registries of the bodies (REGISTRIES)
+
+    Returns: list of the copies to give to restore_registries()
+    """
+    saved = []
+    for cls, name in REGISTRIES:
+        value = vars(cls)[name]
+        saved.append(list(value) if isinstance(value, list) else value)
+    return saved
+
+
+def restore_registries(saved: list) -> None:
+    """
+    Function to give back to the class registries of the bodies the content copied by save_registries()
+    (the lists are kept, only their content is replaced)
+    """
+    for (cls, name), value in zip(REGISTRIES, saved):
+        if isinstance(value, list):
+            vars(cls)[name][:] = value
+        else:
+            setattr(cls, name, value)
+
+
+def bench_physics() -> Dict[str, Dict[str, float]]:
+    """
+    Function to run the micro benchmarks of the Environment methods
+    """
+    # The benchmark bodies must not stay in the class registries
+    registries = save_registries()
+    try:
+        world = Environment((1440, 900))
+        player_1 = Player((100, 450), size=100, mass=100)
+        aibot = AIBots((400, 450), size=50, mass=50)
+        touching_aibot = AIBots((200, 450), size=50, mass=50)
+        vector_1 = (0.3, 2.0)
+        vector_2 = (1.2, 5.0)
+
+        def collide():
+            # put back the bodies in contact so that the bounce is computed every call
+            player_1.x, player_1.y, player_1.speed = 100, 450, 1
+            touching_aibot.x, touching_aibot.y, touching_aibot.speed = 200, 450, 1
+            world.collide(player_1, touching_aibot, True)
+
+        def bounce():
+            aibot.x, aibot.y = -10, 450
+            world.bounce(aibot)
+
+        def attraction():
+            aibot.x, aibot.y, aibot.speed = 400, 450, 0
+            world.attraction(player_1, aibot)
+
+        return {
+            "physics.add_vectors": measure(lambda: world.add_vectors(vector_1, vector_2), 20000),
+            "physics.collide_miss": measure(lambda: world.collide(player_1, aibot, True), 20000),
+            "physics.collide_hit": measure(collide, 20000),
+            "physics.bounce": measure(bounce, 20000),
+            "physics.attraction": measure(attraction, 20000),
+        }
+    finally:
+        restore_registries(registries)
+
+
+def bench_arena(sizes: List[int]) -> Dict[str, Dict[str, float]]:
+    """
+    Function to time 1 full arena tick (move, air resistance, attraction to the player,
+    bounce on the borders and collisions with the obstacles) for N bodies
+    """
+    results = {}
+    # The benchmark bodies must not stay in the class registries
+    registries = save_registries()
+    try:
+        for size in sizes:
+            random.seed(SEED)
+            world = Environment((1440, 900))
+            player_1 = Player((100, world.height/2), size=100, mass=100)
+            obstacles_list = [Obstacle((random.uniform(0, world.width), random.uniform(0, world.height)),
+                                       size=30, mass=50) for _ in range(3)]
+            aibots_list = [AIBots((random.uniform(0, world.width), random.uniform(0, world.height)),
+                                  size=10, mass=50) for _ in range(size)]
+            for aibot in aibots_list:
+                aibot.angle, aibot.speed = random.uniform(0, 2 * math.pi), random.uniform(0, 5)
+
+            def tick():
+                for aibot in aibots_list:
+                    aibot.move()
+                    world.add_air_resistance(aibot)
+                    world.attraction(player_1, aibot)
+                    world.bounce(aibot)
+                    for obstacle in obstacles_list:
+                        world.collide(obstacle, aibot, True)
+                player_1.move()
+                world.bounce(player_1)
+
+            results[f"arena.tick_n{size}"] = measure(
+                tick, number=max(1, 20000 // size), repeat=3)
+    finally:
+        restore_registries(registries)
+    return results
+
+
+def matching_obstacles(game_name: str, num_inputs: int, pop_size: int) -> int:
+    """
+    Function to get the number of obstacles matching the number of inputs of the networks:
+    game_1 and game_3 give the position of the player + 2 values per obstacle,
+    game_2 gives 2 values per other aibot + 2 values per obstacle (= the ball)
+    """
+    if game_name == "game_2":
+        return (num_inputs - 2 * (pop_size - 1)) // 2
+    return (num_inputs - 4) // 2
+
+
+def bench_generations(games: List[str]) -> Dict[str, Dict[str, float]]:
+    """
+    Function to time a full headless generation of each game at a fixed seed
+    """
+    import neat
+    import run_game
+    run_game.import_neat()
+
+    results = {}
+    # The globals of run_game and the bodies of the games are given back after the benchmark
+    game_globals = {name: getattr(run_game, name) for name in GAME_GLOBALS}
+    registries = save_registries()
+    try:
+        for game_name in games:
+            config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                                        neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                                        GAMES_CONFIG[game_name])
+            num_obstacles = matching_obstacles(game_name, config.genome_config.num_inputs, config.pop_size)
+
+            random.seed(SEED)
+            run_game.setup_game(headless_mode=True, num_obstacles=num_obstacles)
+            run_game.max_ticks_per_generation = GENERATION_TICKS
+            population = neat.Population(config)
+            genomes = list(population.population.items())
+            game = getattr(run_game, game_name)
+
+            start = time.perf_counter()
+            game(genomes, config)
+            elapsed = time.perf_counter() - start
+            results[f"generation.{game_name}"] = {"best_s": elapsed, "median_s": elapsed}
+    finally:
+        for name, value in game_globals.items():
+            setattr(run_game, name, value)
+        restore_registries(registries)
+    return results
+
+
+def bench_startup(commands: List[str], repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """
+    Function to time the launch of "python run_game.py <command> --startup-only" in a new process
+    (the interpreter startup is included, so it is the time a user waits) and to warn if it exceeds its budget
+    """
+    from run_game import LAUNCH_BUDGET_MS
+    environment = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+    results = {}
+    for command in commands:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "run_game.py", command, "--startup-only"],
+                           env=environment, stdout=subprocess.DEVNULL, check=True)
+            timings.append(time.perf_counter() - start)
+        results[f"startup.{command}"] = {"best_s": min(timings), "median_s": statistics.median(timings)}
+        budget_ms = LAUNCH_BUDGET_MS.get(command)
+        if budget_ms is not None and min(timings) * 1e3 > budget_ms:
+            print(f"WARNING: launch of {command} took {min(timings) * 1e3:.1f} ms, over its budget of {budget_ms} ms",
+                  file=sys.stderr)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """
+    Function to print the results next to the baseline
+
+    Returns: list of the names of the benchmarks slower than baseline * (1 + threshold)
+    """
+    regressions = []
+    print(f"{'benchmark':<28} {'time':>12} {'baseline':>12} {'change':>8}")
+    for name, timing in results.items():
+        line = f"{name:<28} {format_time(timing['best_s']):>12}"
+        if name in baseline:
+            reference = baseline[name]["best_s"]
+            change = timing["best_s"] / reference - 1
+            line += f" {format_time(reference):>12} {change:>+8.1%}"
+            if change > threshold:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def format_time(seconds: float) -> str:
+    """
+    Function to display a duration with a readable unit
+    """
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Function to run the benchmarks, compare them to the baseline and optionally save them as new baseline
+
+    Returns: exit code (1 if a regression is found)
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH,
+                        help="baseline file (default: %(default)s)")
+    parser.add_argument("--save", action="store_true",
+                        help="save the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown flagged as regression (default: %(default)s)")
+    parser.add_argument("--only", choices=["physics", "arena", "generation", "startup"], action="append",
+                        help="run only these groups of benchmarks (can be repeated)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=ARENA_SIZES,
+                        help="number of bodies of the arena benchmarks (default: %(default)s)")
+    parser.add_argument("--games", nargs="+", choices=list(GAMES_CONFIG), default=list(GAMES_CONFIG),
+                        help="games of the generation benchmarks (default: all)")
+    args = parser.parse_args(argv)
+    groups = args.only or ["physics", "arena", "generation", "startup"]
+
+    results: Dict[str, Dict[str, float]] = {}
+    if "physics" in groups:
+        results.update(bench_physics())
+    if "arena" in groups:
+        results.update(bench_arena(args.sizes))
+    if "generation" in groups:
+        results.update(bench_generations(args.games))
+    if "startup" in groups:
+        results.update(bench_startup(STARTUP_COMMANDS))
+
+    baseline: Dict[str, Dict[str, float]] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save:
+        baseline.update(results)
+        directory = os.path.dirname(args.baseline)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "platform": platform.platform(),
+                "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "results": baseline,
+            }, baseline_file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+# ============================================================
+# Run
+# ============================================================
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""
+Local module that defines the ScaledSurfaceCache and AssetManager classes
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import hashlib
+import json
+import os
+import struct
+import threading
+from typing import Dict, Set, Tuple, Hashable, Iterable, Optional
+
+# Import 3rd party modules
+import pygame
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class ScaledSurfaceCache:
+    """
+    ScaledSurfaceCache keeps the scaled and converted copies of images (e.g. the background of the slides).
+    It has 1 attribute: smooth
+    * smooth: if True, images are scaled with pygame.transform.smoothscale instead of scale
+
+    A copy is keyed by (source, target size): an image is only scaled again when the window size changes.
+    invalidate() is called on VIDEORESIZE events and drops the copies that are not pre-warmed.
+    """
+
+    def __init__(self, smooth: bool = False) -> None:
+        """
+        Function to create an instance of ScaledSurfaceCache class
+        By default:
+        * smooth is False (same result as pygame.transform.scale)
+        """
+        self.smooth = smooth
+        self._surfaces: Dict[Tuple[Hashable, Tuple[int, int]], pygame.Surface] = {}
+        self._prewarmed: Set[Tuple[Hashable, Tuple[int, int]]] = set()
+
+    def get(self, key: Hashable, surface: pygame.Surface, size: Tuple[int, int]) -> pygame.Surface:
+        """
+        Function to get the copy of surface scaled to size, scaling it only on first use
+        * param
+        :key :identifier of the source image (e.g. its file path)
+        :surface :source image
+        :size :(width, height) of the copy in pixels
+
+        Returns: scaled and converted surface
+        """
+        size = (int(size[0]), int(size[1]))
+        scaled_surface = self._surfaces.get((key, size))
+        if scaled_surface is None:
+            scaled_surface = self._surfaces[(key, size)] = self.scale(surface, size)
+        return scaled_surface
+
+    def scale(self, surface: pygame.Surface, size: Tuple[int, int]) -> pygame.Surface:
+        """
+        Function to scale a surface and convert it to the pixel format of the screen (faster to blit)
+        """
+        if surface.get_size() == size:
+            scaled_surface = surface
+        elif self.smooth:
+            scaled_surface = pygame.transform.smoothscale(surface, size)
+        else:
+            scaled_surface = pygame.transform.scale(surface, size)
+
+        if pygame.display.get_surface() is not None:
+            if surface.get_flags() & pygame.SRCALPHA:
+                scaled_surface = scaled_surface.convert_alpha()
+            else:
+                scaled_surface = scaled_surface.convert()
+        return scaled_surface
+
+    def prewarm(self, key: Hashable, surface: pygame.Surface, sizes: Iterable[Tuple[int, int]]) -> None:
+        """
+        Function to scale an image in advance for common window sizes.
+        Pre-warmed copies are kept when the cache is invalidated.
+        """
+        for size in sizes:
+            self.get(key, surface, size)
+            self._prewarmed.add((key, (int(size[0]), int(size[1]))))
+
+    def invalidate(self) -> None:
+        """
+        Function to drop the scaled copies (except the pre-warmed ones), e.g. when the window is resized
+        """
+        self._surfaces = {
+            cache_key: scaled_surface for cache_key, scaled_surface in self._surfaces.items()
+            if cache_key in self._prewarmed}
+
+
+class AssetManager:
+    """
+    AssetManager loads the images, sounds and fonts the first time they are used.
+    It has 2 attributes: cache_dir, disk_cache
+    * cache_dir: directory where the decoded assets are kept between 2 launches
+    * disk_cache: if False, nothing is read from or written to cache_dir
+
+    On disk, an image is kept as raw pixels and a sound as raw samples in the format of the mixer,
+    so that later launches skip the PNG and MP3 decoding; the path of the system fonts is kept
+    so that pygame does not scan the system fonts again.
+    A cached file is keyed by the path, size and modification time of the source file.
+    """
+
+    IMAGE_HEADER = struct.Struct("<4sII")  # pixel format, width, height
+
+    def __init__(self, cache_dir: str = "data/cache", disk_cache: bool = True) -> None:
+        """
+        Function to create an instance of AssetManager class
+        By default:
+        * cache_dir is "data/cache"
+        * disk_cache is True
+        """
+        self.cache_dir = cache_dir
+        self.disk_cache = disk_cache
+        self._images: Dict[Tuple[str, bool], pygame.Surface] = {}
+        self._sounds: Dict[str, "pygame.mixer.Sound"] = {}
+        self._fonts: Dict[Tuple[str, int], pygame.font.Font] = {}
+        self._font_paths: Optional[Dict[str, Optional[str]]] = None
+        # images decoded by the preload thread, waiting to be converted by the main thread
+        self._preloaded: Dict[Tuple[str, bool], pygame.Surface] = {}
+        self._lock = threading.Lock()
+
+    def image(self, path: str, alpha: bool = False) -> pygame.Surface:
+        """
+        Function to get an image, loading it on first use
+        * param
+        :path :file path of the image
+        :alpha :True to keep the transparency of the image (convert_alpha instead of convert)
+
+        Returns: surface converted to the pixel format of the screen
+        """
+        surface = self._images.get((path, alpha))
+        if surface is not None:
+            return surface
+
+        with self._lock:
+            surface = self._preloaded.pop((path, alpha), None)
+        if surface is None:
+            surface = self._decode_image(path, alpha)
+
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha() if alpha else surface.convert()
+        self._images[(path, alpha)] = surface
+        return surface
+
+    def sound(self, path: str) -> "pygame.mixer.Sound":
+        """
+        Function to get a sound, decoding it on first use (the mixer must be initialized)
+
+        Returns: pygame.mixer.Sound
+        """
+        sound = self._sounds.get(path)
+        if sound is not None:
+            return sound
+
+        # the decoded samples depend on the frequency, format and channels of the mixer
+        cache_path = self._cache_path(path, "snd", pygame.mixer.get_init())
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "rb") as cache_file:
+                sound = pygame.mixer.Sound(buffer=cache_file.read())
+        else:
+            sound = pygame.mixer.Sound(path)
+            if cache_path:
+                self._write(cache_path, sound.get_raw())
+
+        self._sounds[path] = sound
+        return sound
+
+    def font(self, name: str, size: int) -> pygame.font.Font:
+        """
+        Function to get a system font, resolving its file only once
+
+        Returns: pygame font (the default font of pygame if the system font is not found)
+        """
+        font = self._fonts.get((name, size))
+        if font is not None:
+            return font
+
+        font_paths = self._load_font_paths()
+        if name not in font_paths:
+            font_paths[name] = pygame.font.match_font(name)
+            self._save_font_paths()
+        font = self._fonts[(name, size)] = pygame.font.Font(font_paths[name], size)
+        return font
+
+    def preload(self, paths: Iterable[str], alpha: bool = False) -> Optional[threading.Thread]:
+        """
+        Function to decode images in a background thread (e.g. the background of the next level)
+        so that they are ready when they are used.
+
+        Returns: the thread (None if there is nothing to load)
+        """
+        paths = [path for path in paths if path and (path, alpha) not in self._images
+                 and (path, alpha) not in self._preloaded]
+        if not paths:
+            return None
+
+        def decode():
+            for path in paths:
+                surface = self._decode_image(path, alpha)
+                with self._lock:
+                    self._preloaded[(path, alpha)] = surface
+
+        thread = threading.Thread(target=decode, name="asset-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def _decode_image(self, path: str, alpha: bool) -> pygame.Surface:
+        """
+        Function to decode an image from the disk cache or from its file (and fill the disk cache)
+        """
+        pixel_format = "RGBA" if alpha else "RGB"
+        cache_path = self._cache_path(path, "img", pixel_format)
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "rb") as cache_file:
+                header = cache_file.read(self.IMAGE_HEADER.size)
+                _, width, height = self.IMAGE_HEADER.unpack(header)
+                return pygame.image.frombytes(cache_file.read(), (width, height), pixel_format)
+
+        surface = pygame.image.load(path)
+        if cache_path:
+            width, height = surface.get_size()
+            self._write(cache_path,
+                        self.IMAGE_HEADER.pack(pixel_format.encode(), width, height),
+                        pygame.image.tobytes(surface, pixel_format))
+        return surface
+
+    def _cache_path(self, path: str, kind: str, variant) -> Optional[str]:
+        """
+        Function to get the file of the disk cache for an asset
+
+        Returns: None if the disk cache is disabled or the source file does not exist
+        """
+        if not self.disk_cache:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{variant}"
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{os.path.basename(path)}.{digest}.{kind}")
+
+    def _write(self, cache_path: str, *chunks: bytes) -> None:
+        """
+        Function to write a file of the disk cache (written to a temporary file first, then renamed)
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temporary_path, "wb") as cache_file:
+                for chunk in chunks:
+                    cache_file.write(chunk)
+            os.replace(temporary_path, cache_path)
+        except OSError:
+            pass  # the cache is only an optimization
+
+    def _load_font_paths(self) -> Dict[str, Optional[str]]:
+        """
+        Function to read the font paths resolved at previous launches
+        """
+        if self._font_paths is None:
+            self._font_paths = {}
+            if self.disk_cache:
+                try:
+                    with open(os.path.join(self.cache_dir, "fonts.json")) as fonts_file:
+                        self._font_paths = {
+                            name: font_path for name, font_path in json.load(fonts_file).items()
+                            if font_path is None or os.path.exists(font_path)}
+                except (OSError, ValueError):
+                    pass
+        return self._font_paths
+
+    def _save_font_paths(self) -> None:
+        """
+        Function to keep the resolved font paths for the next launches
+        """
+        if self.disk_cache:
+            self._write(os.path.join(self.cache_dir, "fonts.json"),
+                        json.dumps(self._font_paths, indent=2).encode())
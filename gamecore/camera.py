@@ -0,0 +1,125 @@
+"""
+Local module that defines the Camera class
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+from typing import Tuple
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class Camera:
+    """
+    Camera maps the world (coordinates of the physics) to the window (coordinates of the screen).
+    It has 5 attributes: world_size, view_size, zoom, min_zoom, max_zoom
+    * world_size: (width, height) of the world
+    * view_size: (width, height) of the window in pixels
+    * zoom: number of pixels per world unit
+    * min_zoom, max_zoom: limits of the zoom
+
+    The camera starts with the whole world in view (zoom 1 if the world fits in the window).
+    If the world is smaller than the view, it stays at the top left of the window.
+    Resizing the window only changes the view: the world keeps its size.
+    """
+
+    def __init__(
+        self,
+        world_size: Tuple[float, float],
+        view_size: Tuple[int, int],
+        min_zoom: float = 0.05,
+        max_zoom: float = 8.0
+    ) -> None:
+        """
+        Function to create an instance of Camera class
+        By default:
+        * min_zoom is 0.05
+        * max_zoom is 8
+        """
+        self.world_width, self.world_height = world_size
+        self.view_width, self.view_height = view_size
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.zoom: float = 1.0
+        self.left: float = 0.0  # world coordinates of the top left of the view
+        self.top: float = 0.0
+        self.follow: bool = False  # if True, the view is centered on the followed body at every frame
+        self.fit()
+
+    def fit(self) -> None:
+        """
+        Function to zoom out until the whole world is in view (never zooms in above 1)
+        """
+        self.zoom = max(self.min_zoom, min(1.0, self.view_width / self.world_width,
+                                           self.view_height / self.world_height))
+        self.left = self.top = 0.0
+        self.clamp()
+
+    def resize(self, view_size: Tuple[int, int]) -> None:
+        """
+        Function to change the size of the view (e.g. the window is resized)
+        """
+        self.view_width, self.view_height = view_size
+        self.clamp()
+
+    def pan(self, dx_px: float, dy_px: float) -> None:
+        """
+        Function to move the view by a number of pixels
+        """
+        self.left += dx_px / self.zoom
+        self.top += dy_px / self.zoom
+        self.clamp()
+
+    def zoom_at(self, factor: float, xy_screen: Tuple[float, float]) -> None:
+        """
+        Function to zoom in (factor > 1) or out, keeping the world point under xy_screen at the same place
+        """
+        world_x, world_y = self.screen_to_world(xy_screen)
+        self.zoom = max(self.min_zoom, min(self.max_zoom, self.zoom * factor))
+        self.left = world_x - xy_screen[0] / self.zoom
+        self.top = world_y - xy_screen[1] / self.zoom
+        self.clamp()
+
+    def center_on(self, x: float, y: float) -> None:
+        """
+        Function to center the view on a point of the world
+        """
+        self.left = x - self.view_width / (2 * self.zoom)
+        self.top = y - self.view_height / (2 * self.zoom)
+        self.clamp()
+
+    def clamp(self) -> None:
+        """
+        Function to keep the view inside the world
+        """
+        visible_width = self.view_width / self.zoom
+        visible_height = self.view_height / self.zoom
+        self.left = 0.0 if visible_width >= self.world_width else min(
+            max(self.left, 0.0), self.world_width - visible_width)
+        self.top = 0.0 if visible_height >= self.world_height else min(
+            max(self.top, 0.0), self.world_height - visible_height)
+
+    def visible_rect(self) -> Tuple[float, float, float, float]:
+        """
+        Function to get the part of the world in view
+
+        Returns: (left, top, right, bottom) in world coordinates
+        """
+        return (self.left, self.top,
+                self.left + self.view_width / self.zoom, self.top + self.view_height / self.zoom)
+
+    def world_to_screen(self, xy_world: Tuple[float, float]) -> Tuple[float, float]:
+        """
+        Function to convert world coordinates to screen coordinates
+        """
+        return (xy_world[0] - self.left) * self.zoom, (xy_world[1] - self.top) * self.zoom
+
+    def screen_to_world(self, xy_screen: Tuple[float, float]) -> Tuple[float, float]:
+        """
+        Function to convert screen coordinates to world coordinates
+        """
+        return self.left + xy_screen[0] / self.zoom, self.top + xy_screen[1] / self.zoom
@@ -0,0 +1,152 @@
+"""
+Local module that defines the MaskCache and SpriteCollider classes
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import math
+from typing import Dict, Tuple, Optional
+
+# Import 3rd party modules
+import pygame
+
+# Import local modules
+from gamecore.assets import AssetManager
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class MaskCache:
+    """
+    MaskCache loads the images of sprite-shaped bodies and builds their collision masks once.
+    It has 1 attribute: assets
+    * assets: AssetManager decoding the images (and keeping their decoded pixels on disk)
+
+    Images and masks are keyed by (image path, size, horizontal flip);
+    the masks of the circular bodies are keyed by their radius.
+    It works without display (headless training): the images are only converted if a display exists.
+    """
+
+    def __init__(self, assets: Optional[AssetManager] = None) -> None:
+        """
+        Function to create an instance of MaskCache class
+        By default:
+        * assets is a new AssetManager (e.g. headless training, where the game creates none)
+        """
+        self.assets = assets if assets is not None else AssetManager()
+        self._images: Dict[Tuple[str, Optional[Tuple[int, int]], bool], pygame.Surface] = {}
+        self._masks: Dict[Tuple[str, Optional[Tuple[int, int]], bool], pygame.mask.Mask] = {}
+        self._circle_masks: Dict[int, pygame.mask.Mask] = {}
+
+    def image(self, path: str, size: Optional[Tuple[int, int]] = None, flip_x: bool = False) -> pygame.Surface:
+        """
+        Function to get an image scaled to size and flipped horizontally, loading it on first use
+        """
+        key = (path, size, flip_x)
+        image = self._images.get(key)
+        if image is None:
+            image = self.assets.image(path, alpha=True)
+            if size is not None:
+                image = pygame.transform.scale(image, size)
+            if flip_x:
+                image = pygame.transform.flip(image, True, False)
+            self._images[key] = image
+        return image
+
+    def mask(self, path: str, size: Optional[Tuple[int, int]] = None, flip_x: bool = False) -> pygame.mask.Mask:
+        """
+        Function to get the mask of the opaque pixels of an image (built on first use)
+        """
+        key = (path, size, flip_x)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = self._masks[key] = pygame.mask.from_surface(self.image(path, size, flip_x))
+        return mask
+
+    def circle(self, radius: float) -> pygame.mask.Mask:
+        """
+        Function to get the mask of a circle (same pixels as the drawn circle)
+        """
+        radius = int(radius)
+        mask = self._circle_masks.get(radius)
+        if mask is None:
+            diameter = max(1, 2 * radius)
+            surface = pygame.Surface((diameter, diameter), pygame.SRCALPHA)
+            pygame.draw.circle(surface, (255, 255, 255, 255), (radius, radius), radius)
+            mask = self._circle_masks[radius] = pygame.mask.from_surface(surface)
+        return mask
+
+
+class SpriteCollider:
+    """
+    SpriteCollider tests pixel-perfect collisions between a sprite-shaped body (e.g. a gorilla used as goal)
+    and circular bodies.
+    It has 3 attributes: mask, x, y
+    * mask: collision mask of the image of the body
+    * x, y: position of the top left of the image
+
+    The mask overlap is only computed when the circle touches the bounding circle
+    and the bounding rect of the opaque pixels: far bodies cost 1 distance test.
+    """
+
+    def __init__(self, mask: pygame.mask.Mask, xy_topleft: Tuple[float, float]) -> None:
+        """
+        Function to create an instance of SpriteCollider class
+        """
+        self.mask = mask
+        bounding_rects = mask.get_bounding_rects()
+        if bounding_rects:
+            self._opaque_rect = bounding_rects[0].unionall(bounding_rects[1:])
+        else:
+            self._opaque_rect = pygame.Rect(0, 0, 0, 0)
+        self.rect = self._opaque_rect.copy()
+        self.radius: float = math.hypot(self.rect.width, self.rect.height) / 2
+        self.center_x: float = 0.0
+        self.center_y: float = 0.0
+        self.x: int = 0
+        self.y: int = 0
+        self.move_to(xy_topleft)
+
+        # number of tests stopped at each stage
+        self.circle_rejects: int = 0
+        self.rect_rejects: int = 0
+        self.mask_tests: int = 0
+
+    def move_to(self, xy_topleft: Tuple[float, float]) -> None:
+        """
+        Function to move the top left of the image to a position
+        """
+        self.x, self.y = int(xy_topleft[0]), int(xy_topleft[1])
+        self.rect = self._opaque_rect.move(self.x, self.y)
+        self.center_x, self.center_y = self.rect.center
+
+    def collide_circle(self, x: float, y: float, radius: float, mask_cache: MaskCache) -> bool:
+        """
+        Function to check if a circular body (center x, y and radius) overlaps the opaque pixels of the sprite
+
+        Returns: True if they overlap
+        """
+        # 1. bounding circles
+        dx = x - self.center_x
+        dy = y - self.center_y
+        reach = self.radius + radius
+        if dx * dx + dy * dy > reach * reach:
+            self.circle_rejects += 1
+            return False
+
+        # 2. bounding rects
+        rect = self.rect
+        if x + radius < rect.left or x - radius > rect.right or y + radius < rect.top or y - radius > rect.bottom:
+            self.rect_rejects += 1
+            return False
+
+        # 3. masks
+        self.mask_tests += 1
+        circle_mask = mask_cache.circle(radius)
+        circle_radius = circle_mask.get_size()[0] // 2
+        offset = (int(x) - circle_radius - self.x, int(y) - circle_radius - self.y)
+        return self.mask.overlap(circle_mask, offset) is not None
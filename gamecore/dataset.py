@@ -0,0 +1,170 @@
+"""
+Local module that defines the TrajectoryWriter and TrajectoryDataset classes
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import json
+import mmap
+import os
+import time
+from array import array
+from typing import Dict, List, Optional
+
+
+# =====================================================================
+# Constants
+# =====================================================================
+
+# columns of every row (1 row per AIBot alive per tick) and their array typecode
+STATE_COLUMNS = [("generation", "i"), ("tick", "i"), ("genome_id", "i"),
+                 ("x", "f"), ("y", "f"), ("speed", "f"), ("angle", "f"), ("fitness", "f")]
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class TrajectoryWriter:
+    """
+    TrajectoryWriter writes the state of every AIBot at every tick (position, velocity, inputs and outputs
+    of its neural network, fitness) to a columnar dataset: 1 file of raw values per column.
+    It has 2 attributes: output_dir, chunk_rows
+    * output_dir: directory of the datasets (a new sub-directory is created per run)
+    * chunk_rows: number of rows kept in memory before they are appended to the files
+
+    The input and output columns (input_0, ..., output_0, ...) are created at the first row.
+    Between 2 decisions of an AIBot, its last inputs are written again.
+    meta.json (columns, typecodes and number of rows) is rewritten after each chunk,
+    so a dataset can be read while it is written.
+    """
+
+    def __init__(self, output_dir: str = "data/trajectories", chunk_rows: int = 65536) -> None:
+        """
+        Function to create an instance of TrajectoryWriter class
+        By default:
+        * output_dir is "data/trajectories"
+        * chunk_rows is 65536 rows
+        """
+        self.output_dir = output_dir
+        self.chunk_rows = chunk_rows
+        self.path: Optional[str] = None
+        self.rows: int = 0  # rows written to the files
+        self.columns: List[tuple] = []
+        self._buffers: List[array] = []
+        self._files: list = []
+        self._last_inputs: Dict[int, list] = {}  # inputs of the last decision of each AIBot (by id)
+
+    def _open(self, num_inputs: int, num_outputs: int) -> None:
+        """
+        Function to create the directory of the dataset and its column files
+        """
+        self.path = os.path.join(self.output_dir, time.strftime("%Y%m%d-%H%M%S"))
+        run_number = 1
+        while os.path.exists(self.path):
+            run_number += 1
+            self.path = os.path.join(self.output_dir, time.strftime("%Y%m%d-%H%M%S") + f"-{run_number}")
+        os.makedirs(self.path)
+
+        self.columns = (STATE_COLUMNS + [(f"input_{index}", "f") for index in range(num_inputs)]
+                        + [(f"output_{index}", "f") for index in range(num_outputs)])
+        self._buffers = [array(typecode) for _, typecode in self.columns]
+        self._files = [open(os.path.join(self.path, f"{name}.bin"), "ab") for name, _ in self.columns]
+        print(f"Writing the trajectories to {self.path}")
+
+    def record(self, generation: int, tick: int, genome_id: int, aibot, inputs: Optional[list],
+               outputs: list, fitness: float) -> None:
+        """
+        Function to add the row of an AIBot at a tick
+        * param
+        :inputs :inputs of its neural network at this tick (None if it did not decide: its last inputs are used)
+        :outputs :output of its neural network used at this tick
+        """
+        # an AIBot decides at its first tick, so its last inputs are always from this generation
+        if inputs is None:
+            inputs = self._last_inputs[id(aibot)]
+        else:
+            self._last_inputs[id(aibot)] = inputs
+        if self.path is None:
+            self._open(len(inputs), len(outputs))
+
+        row = [generation, tick, genome_id, aibot.x, aibot.y, aibot.speed, aibot.angle, fitness]
+        row.extend(inputs)
+        row.extend(outputs)
+        if len(row) != len(self._buffers):
+            raise ValueError(f"{len(row) - len(STATE_COLUMNS)} inputs and outputs instead of "
+                             f"{len(self._buffers) - len(STATE_COLUMNS)}")
+        for buffer, value in zip(self._buffers, row):
+            buffer.append(value)
+        if len(self._buffers[0]) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Function to append the rows in memory to the column files and update meta.json
+        """
+        if self.path is None or not len(self._buffers[0]):
+            return
+        self.rows += len(self._buffers[0])
+        for buffer, column_file in zip(self._buffers, self._files):
+            buffer.tofile(column_file)
+            column_file.flush()
+            del buffer[:]
+        with open(os.path.join(self.path, "meta.json"), "w") as meta_file:
+            json.dump({"rows": self.rows, "columns": self.columns}, meta_file, indent=2)
+
+    def close(self) -> None:
+        """
+        Function to write the last rows and close the column files
+        """
+        self.flush()
+        for column_file in self._files:
+            column_file.close()
+        self._files = []
+
+
+class TrajectoryDataset:
+    """
+    TrajectoryDataset reads a dataset written by TrajectoryWriter without loading it in memory:
+    each column is a memory-mapped file seen as a typed memoryview (no copy).
+    It has 1 attribute: path
+    * path: directory of the dataset
+
+    e.g. dataset.column("x")[row], or numpy.frombuffer(dataset.column("x"), numpy.float32) if numpy is installed.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Function to create an instance of TrajectoryDataset class
+        """
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as meta_file:
+            meta = json.load(meta_file)
+        self.rows: int = meta["rows"]  # rows written when meta.json was read
+        self.typecodes: Dict[str, str] = {name: typecode for name, typecode in meta["columns"]}
+        self._maps: Dict[str, mmap.mmap] = {}
+
+    def column(self, name: str) -> memoryview:
+        """
+        Function to get the values of a column
+
+        Returns: memoryview of self.rows values on the memory-mapped file
+        """
+        typecode = self.typecodes[name]
+        if not self.rows:
+            return memoryview(array(typecode))
+        column_map = self._maps.get(name)
+        if column_map is None:
+            with open(os.path.join(self.path, f"{name}.bin"), "rb") as column_file:
+                column_map = self._maps[name] = mmap.mmap(column_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(column_map).cast("B")[:self.rows * array(typecode).itemsize].cast(typecode)
+
+    def close(self) -> None:
+        """
+        Function to unmap the columns (the memoryviews given by column() must be released first)
+        """
+        for column_map in self._maps.values():
+            column_map.close()
+        self._maps = {}
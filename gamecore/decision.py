@@ -0,0 +1,99 @@
+"""
+Local module that defines the DecisionScheduler class
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import time
+from typing import Optional
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class DecisionScheduler:
+    """
+    DecisionScheduler sets the ticks at which each AIBot queries its neural network (action repeat):
+    in between, the AIBot keeps its last output.
+    It has 4 attributes: interval, adaptive, max_interval, target_tick_s
+    * interval: number of ticks between 2 decisions of an AIBot (1: every tick)
+    * adaptive: if True, interval is tuned after every tick to hold target_tick_s
+    * max_interval: upper limit of interval in adaptive mode
+    * target_tick_s: duration of the AIBots update of a tick held by the adaptive mode
+
+    The decisions are staggered: each AIBot gets a phase, so that about 1/interval of the population
+    decides at every tick instead of everyone at the same tick.
+    """
+
+    def __init__(
+        self,
+        interval: int = 1,
+        adaptive: bool = False,
+        max_interval: int = 10,
+        target_tick_s: float = 0.004
+    ) -> None:
+        """
+        Function to create an instance of DecisionScheduler class
+        By default:
+        * interval is 1 (every tick)
+        * adaptive is False
+        * max_interval is 10 ticks
+        * target_tick_s is 4 ms (half a frame at 120 frames per second)
+        """
+        self.base_interval = max(1, interval)
+        self.interval = self.base_interval
+        self.adaptive = adaptive
+        self.max_interval = max(self.base_interval, max_interval)
+        self.target_tick_s = target_tick_s
+        self.tick: int = 0
+        self._next_phase: int = 0
+        self._tick_start: Optional[float] = None
+        self._tick_s: float = 0.0  # smoothed duration of the AIBots update of the adaptive mode
+
+    def start_generation(self) -> None:
+        """
+        Function to restart the ticks and the phases at a new generation
+        """
+        self.tick = 0
+        self._next_phase = 0
+        self._tick_start = None
+
+    def start_tick(self) -> None:
+        """
+        Function to call once per tick, before the AIBots are updated
+        """
+        self.tick += 1
+        if self.adaptive:
+            self._tick_start = time.perf_counter()
+
+    def end_tick(self) -> None:
+        """
+        Function to call once per tick, after the AIBots are updated: in adaptive mode,
+        the interval grows while the update is slower than target_tick_s and shrinks back when it is much faster
+        """
+        if not self.adaptive or self._tick_start is None:
+            return
+        tick_s = time.perf_counter() - self._tick_start
+        self._tick_s = 0.9 * self._tick_s + 0.1 * tick_s
+        # 1 change per interval at most: the effect of the last change is measured first
+        if self.tick % self.interval:
+            return
+        if self._tick_s > self.target_tick_s and self.interval < self.max_interval:
+            self.interval += 1
+        elif self._tick_s < 0.5 * self.target_tick_s and self.interval > self.base_interval:
+            self.interval -= 1
+
+    def decide(self, aibot) -> bool:
+        """
+        Function to check if an AIBot queries its neural network at this tick
+        (always True if it has no output yet)
+        """
+        if aibot.last_output is None:
+            return True
+        if aibot.decision_phase is None:
+            aibot.decision_phase = self._next_phase
+            self._next_phase += 1
+        return (self.tick + aibot.decision_phase) % self.interval == 0
@@ -0,0 +1,369 @@
+"""
+Local module that defines the MatchArena, MatchScheduler and MatchmakingEvaluator classes
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import copy
+import math
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+# Import 3rd party modules
+import neat
+
+# Import local modules
+from gamecore.environment import Environment
+from gamecore.player import AIBotsPool, Obstacle, Player
+from gamecore.rules import steer, move_soccer_aibot, border_goal
+from gamecore.state import WorldState
+
+
+# =====================================================================
+# Constants
+# =====================================================================
+
+MATCH_MODES = ("round-robin", "swiss", "hall-of-fame")
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class MatchArena:
+    """
+    MatchArena plays headless matches of game 2 between 2 neural networks: each side is a team of AIBots
+    controlled by copies of its network, and scores when the ball crosses the border of the other side.
+    It has 5 attributes: world_size, team_size, num_balls, match_ticks, sensor
+    * world_size: (width, height) of the field
+    * team_size: number of AIBots per side (the inputs of a network are the same as in game 2
+      with 2 * team_size AIBots, e.g. 8 inputs with 2 AIBots per side and 1 ball)
+    * num_balls: number of balls (the obstacles of game 2)
+    * match_ticks: duration of a match (ticks of 1/120 s)
+    * sensor: NearestSensor or RaySensor giving the inputs (None: distances to every body, as in game 2)
+
+    The bodies are created once and put back at the kick-off (WorldState) at every match and after every goal,
+    so a process plays any number of matches without creating bodies.
+    """
+
+    def __init__(
+        self,
+        world_size: Tuple[int, int],
+        team_size: int = 2,
+        num_balls: int = 1,
+        match_ticks: int = 1200,
+        sensor=None
+    ) -> None:
+        """
+        Function to create an instance of MatchArena class and its bodies
+        By default:
+        * team_size is 2 AIBots per side
+        * num_balls is 1
+        * match_ticks is 1200 ticks (10 seconds)
+        * sensor is None (distances to every body)
+        """
+        self.world_size = world_size
+        self.team_size = team_size
+        self.num_balls = num_balls
+        self.match_ticks = match_ticks
+        self.sensor = sensor
+        self.world = Environment(world_size)
+        width, height = world_size
+
+        # the AIBots are attracted by the player, who stays at its start position in game 2
+        self.player = Player((100, height/2), size=100, mass=100)
+        self.balls = [Obstacle((width/2, height/2), size=30, mass=50) for _ in range(num_balls)]
+        # as in game 2, the AIBots of a side start together at its border, level with the ball
+        pool = AIBotsPool()
+        self.aibots = [pool.acquire((100 + (width - 200)*side, height/2), size=50, mass=50)
+                       for side in (0, 1) for _ in range(team_size)]
+        self.kickoff_state = WorldState([self.player] + self.balls + self.aibots)
+        self.kickoff = self.kickoff_state.snapshot()
+
+    def play(self, network_left, network_right) -> dict:
+        """
+        Function to play a match from the kick-off
+        * param
+        :network_left :network of the side starting at the left (scores at the right border)
+        :network_right :network of the side starting at the right
+
+        Returns: {"goals": (left, right), "touches": (left, right) number of ball touches,
+        "progress": mean position of the balls towards the right border (-1 to 1, > 0 is good for the left side),
+        "distance": (left, right) mean distance from the AIBots of a side to their nearest ball}
+        """
+        world, balls, aibots = self.world, self.balls, self.aibots
+        networks = [network_left] * self.team_size + [network_right] * self.team_size
+        goals = [0, 0]
+        touches = [0, 0]
+        progress: float = 0.0
+        distances = [0.0, 0.0]
+        self.kickoff_state.load(self.kickoff)
+
+        for _ in range(self.match_ticks):
+            if self.sensor is not None:
+                sensor_inputs = self.sensor.sense(aibots, balls, None, world)
+            scored: Optional[int] = None
+            for i, aibot in enumerate(aibots):
+                side = i // self.team_size
+                if self.sensor is not None:
+                    input_list = sensor_inputs[aibot]
+                else:
+                    input_list = []
+                    for j, other_aibot in enumerate(aibots):
+                        if i != j:
+                            input_list.extend([abs(aibot.x - other_aibot.x), abs(aibot.y - other_aibot.y)])
+                    for ball in balls:
+                        input_list.extend([abs(aibot.x - ball.x), abs(aibot.y - ball.y)])
+                steer(world, aibot, networks[i].activate(input_list))
+                touches[side] += move_soccer_aibot(world, self.player, i, aibots, balls)
+                for ball in balls:
+                    goal = border_goal(world, ball)
+                    if goal is not None:
+                        scored = goal
+
+            # shaping of the tiebreaks: where the balls are and how close each side stays to them
+            half_width = world.width / 2
+            progress += sum(ball.x - half_width for ball in balls) / (half_width * len(balls))
+            for i, aibot in enumerate(aibots):
+                distances[i // self.team_size] += min(math.hypot(aibot.x - ball.x, aibot.y - ball.y)
+                                                      for ball in balls)
+
+            # goal: the ball and the AIBots go back to the kick-off
+            if scored is not None:
+                goals[scored] += 1
+                self.kickoff_state.load(self.kickoff)
+
+        samples = self.match_ticks * self.team_size
+        return {"goals": tuple(goals), "touches": tuple(touches), "progress": progress / self.match_ticks,
+                "distance": (distances[0] / samples, distances[1] / samples)}
+
+
+class MatchScheduler:
+    """
+    MatchScheduler pairs the genomes of a generation into 1 vs 1 matches and rates them (Elo).
+    It has 5 attributes: mode, rounds, hall_of_fame_size, k_factor, initial_rating
+    * mode: "round-robin" (every genome against every other one), "swiss" (rounds pairing the genomes
+      of close ratings) or "hall-of-fame" (every genome against the champions of the previous generations)
+    * rounds: number of rounds of the swiss mode
+    * hall_of_fame_size: number of champions kept (the oldest is dropped)
+    * k_factor: maximum change of rating per match
+    * initial_rating: rating of a new genome
+
+    The ratings of a round are updated at once (from the ratings at the start of the round),
+    so they do not depend on the order in which the matches end. The champions of the hall of fame
+    keep the rating they had when they entered it: they are the reference of the ratings.
+    In the pairs, a genome is its key and the champions of the hall of fame are -1, -2, ...
+    """
+
+    def __init__(
+        self,
+        mode: str = "round-robin",
+        rounds: int = 3,
+        hall_of_fame_size: int = 5,
+        k_factor: float = 32.0,
+        initial_rating: float = 1000.0
+    ) -> None:
+        """
+        Function to create an instance of MatchScheduler class
+        By default:
+        * mode is "round-robin"
+        * rounds is 3 swiss rounds
+        * hall_of_fame_size is 5 champions
+        * k_factor is 32
+        * initial_rating is 1000
+        """
+        if mode not in MATCH_MODES:
+            raise ValueError(f"unknown matchmaking mode {mode!r} (expected one of {', '.join(MATCH_MODES)})")
+        self.mode = mode
+        self.rounds = rounds
+        self.hall_of_fame_size = hall_of_fame_size
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+        self.ratings: Dict[int, float] = {}
+        self.hall_of_fame: List[tuple] = []  # (genome, rating) of the champions
+        self._played: set = set()  # pairs already met in the swiss rounds of this generation
+
+    def start_generation(self, keys: List[int]) -> None:
+        """
+        Function to forget the ratings of the genomes gone and rate the new ones
+        """
+        self.ratings = {key: self.ratings.get(key, self.initial_rating) for key in keys}
+        self._played = set()
+
+    def num_rounds(self) -> int:
+        """
+        Function to get the number of rounds of a generation
+        """
+        return max(1, self.rounds) if self.mode == "swiss" else 1
+
+    def pairings(self) -> List[Tuple[int, int]]:
+        """
+        Function to pair the genomes for the next round (a genome with no opponent sits the round out)
+
+        Returns: list of (left, right)
+        """
+        keys = sorted(self.ratings)
+        if self.mode == "round-robin":
+            pairs = list(combinations(keys, 2))
+        elif self.mode == "hall-of-fame" and self.hall_of_fame:
+            pairs = [(key, -1 - index) for key in keys for index in range(len(self.hall_of_fame))]
+        else:
+            # swiss (and the first generation of the hall of fame): the closest ratings not met yet
+            waiting = sorted(keys, key=lambda key: (-self.ratings[key], key))
+            pairs = []
+            while len(waiting) > 1:
+                key = waiting.pop(0)
+                opponent = next((other for other in waiting if (key, other) not in self._played), waiting[0])
+                waiting.remove(opponent)
+                pairs.append((key, opponent))
+            self._played.update(pairs)
+            self._played.update((opponent, key) for key, opponent in pairs)
+        # every other match, the sides are swapped: no genome always starts at the left
+        return [pair if index % 2 == 0 else pair[::-1] for index, pair in enumerate(pairs)]
+
+    def rating(self, entrant: int) -> float:
+        """
+        Function to get the rating of a genome (key) or of a champion of the hall of fame (-1, -2, ...)
+        """
+        return self.ratings[entrant] if entrant >= 0 else self.hall_of_fame[-1 - entrant][1]
+
+    def update(self, pairs: List[Tuple[int, int]], scores: List[float]) -> None:
+        """
+        Function to update the ratings with the results of a round
+        * param
+        :scores :score of the left genome of every pair (1: won, 0.5: draw, 0: lost)
+        """
+        changes: Dict[int, float] = {}
+        for (left, right), score in zip(pairs, scores):
+            expected = 1 / (1 + 10 ** ((self.rating(right) - self.rating(left)) / 400))
+            changes[left] = changes.get(left, 0.0) + self.k_factor * (score - expected)
+            changes[right] = changes.get(right, 0.0) - self.k_factor * (score - expected)
+        for entrant, change in changes.items():
+            if entrant >= 0:
+                self.ratings[entrant] += change
+
+    def end_generation(self, genomes: Dict[int, object]) -> None:
+        """
+        Function to put a copy of the best rated genome of the generation in the hall of fame
+        """
+        if self.mode != "hall-of-fame" or not self.ratings:
+            return
+        best = max(self.ratings, key=lambda key: (self.ratings[key], -key))
+        self.hall_of_fame.append((copy.deepcopy(genomes[best]), self.ratings[best]))
+        del self.hall_of_fame[:-self.hall_of_fame_size]
+
+
+class MatchmakingEvaluator:
+    """
+    MatchmakingEvaluator is the fitness function of game 2 with matchmaking: instead of 1 match of the whole
+    population, the genomes play many small 1 vs 1 matches (each side is a team of copies of a genome)
+    in parallel over a pool of processes, and the fitness of a genome is its rating.
+    It has 3 attributes: scheduler, arena_settings, workers
+    * scheduler: the MatchScheduler pairing and rating the genomes
+    * arena_settings: arguments of the MatchArena of every process (world_size, team_size, ...)
+    * workers: number of processes (1: the matches are played in this process)
+
+    The fitness is the rating minus the initial rating, so a new genome starts at 0.
+    A match is won by the most goals, then by the tiebreaks of match_score().
+    """
+
+    def __init__(self, scheduler: MatchScheduler, arena_settings: dict, workers: int = 1) -> None:
+        """
+        Function to create an instance of MatchmakingEvaluator class (the processes start at the first generation)
+        By default:
+        * workers is 1
+        """
+        self.scheduler = scheduler
+        self.arena_settings = arena_settings
+        self.team_size: int = arena_settings.get("team_size", 2)
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __call__(self, genomes: list, config) -> None:
+        """
+        Function called by neat to evaluate the genomes of a generation
+        """
+        if self.workers > 1 and self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, initializer=start_match_worker,
+                                                 initargs=(config, self.arena_settings))
+        elif self.workers <= 1 and _match_worker is None:
+            start_match_worker(config, self.arena_settings)
+
+        genomes_dict = dict(genomes)
+        scheduler = self.scheduler
+        scheduler.start_generation(list(genomes_dict))
+        for _ in range(scheduler.num_rounds()):
+            pairs = scheduler.pairings()
+            matches = [(self._entrant(genomes_dict, left), self._entrant(genomes_dict, right)) for left, right in pairs]
+            if self._executor is not None:
+                chunk_size = max(1, len(matches) // (4 * self.workers))
+                results = list(self._executor.map(play_match, matches, chunksize=chunk_size))
+            else:
+                results = [play_match(match) for match in matches]
+            scheduler.update(pairs, results)
+
+        for key, genome in genomes_dict.items():
+            genome.fitness = scheduler.ratings[key] - scheduler.initial_rating
+        scheduler.end_generation(genomes_dict)
+
+    def _entrant(self, genomes: Dict[int, object], entrant: int):
+        """
+        Function to get the genome of a genome key or of a champion of the hall of fame (-1, -2, ...)
+        """
+        return genomes[entrant] if entrant >= 0 else self.scheduler.hall_of_fame[-1 - entrant][0]
+
+    def close(self) -> None:
+        """
+        Function to stop the processes
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+_match_worker: Optional[tuple] = None  # (NEAT config, MatchArena) of this process
+
+
+def start_match_worker(config, arena_settings: dict) -> None:
+    """
+    Function to create the arena of a process playing matches (initializer of the pool)
+    """
+    global _match_worker
+    _match_worker = (config, MatchArena(**arena_settings))
+
+
+def play_match(match: tuple) -> float:
+    """
+    Function to play a match between 2 genomes in the arena of this process
+    * param
+    :match :(genome of the left side, genome of the right side)
+
+    Returns: score of the left side (1: won, 0.5: draw, 0: lost, see match_score())
+    """
+    config, arena = _match_worker
+    left, right = match
+    return match_score(arena.play(neat.nn.FeedForwardNetwork.create(left, config),
+                                  neat.nn.FeedForwardNetwork.create(right, config)))
+
+
+def match_score(result: dict) -> float:
+    """
+    Function to get the score of the left side from the result of MatchArena.play():
+    the side with the most goals wins, then (tiebreaks, so that the untrained genomes, which rarely score,
+    are rated too) the most ball touches, then the ball nearest to the goal of the other side,
+    then the AIBots nearest to the ball. It is a draw only if everything is equal.
+
+    Returns: 1.0 (won), 0.5 (draw) or 0.0 (lost)
+    """
+    left = (result["goals"][0], result["touches"][0], result["progress"], -result["distance"][0])
+    right = (result["goals"][1], result["touches"][1], -result["progress"], -result["distance"][1])
+    if left == right:
+        return 0.5
+    return 1.0 if left > right else 0.0
@@ -0,0 +1,173 @@
+"""
+Local module that defines the MemoryTracer class
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import gc
+import json
+import os
+import tracemalloc
+from typing import List, Dict, Callable, Optional
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class MemoryTracer:
+    """
+    MemoryTracer is a neat reporter that snapshots the memory allocations at the end of every generation.
+    It has 5 attributes: instance_types, registries, top, growth_threshold_mb, report_path
+    * instance_types: classes whose live instances are counted (e.g. Player, AIBots, Obstacle)
+    * registries: {name: function returning the length of a list that may grow}
+      (e.g. AIBots.aibots_list, the history of the neat StatisticsReporter)
+    * top: number of allocation sites reported (the ones that grew the most)
+    * growth_threshold_mb: a warning is printed if the traced memory grows more than this per generation
+    * report_path: file where 1 json line per generation is appended
+
+    Tracing allocations slows the game down, so it is opt-in.
+    It has all the methods of neat.reporting.BaseReporter instead of inheriting from it,
+    so that importing this module does not import neat.
+    """
+
+    def __init__(
+        self,
+        instance_types: List[type],
+        registries: Optional[Dict[str, Callable[[], int]]] = None,
+        top: int = 10,
+        growth_threshold_mb: float = 10.0,
+        report_path: str = "data/memory.jsonl",
+        traceback_frames: int = 1
+    ) -> None:
+        """
+        Function to create an instance of MemoryTracer class and start tracing the allocations
+        By default:
+        * top is 10 allocation sites
+        * growth_threshold_mb is 10 MB per generation
+        * traceback_frames is 1 (allocation sites are grouped by file and line)
+        """
+        self.instance_types = instance_types
+        self.registries = registries or {}
+        self.top = top
+        self.growth_threshold_mb = growth_threshold_mb
+        self.report_path = report_path
+        self.generation: int = 0
+        self._previous_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ]
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(traceback_frames)
+
+    def start_generation(self, generation):
+        """
+        Function called by neat at the start of every generation
+        """
+        self.generation = generation
+
+    def end_generation(self, config, population, species_set):
+        """
+        Function called by neat at the end of every generation:
+        compares the allocations with the previous generation and reports the growth
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces(self._filters)
+        traced_mb = sum(stat.size for stat in snapshot.statistics("filename")) / 2**20
+
+        record = {
+            "generation": self.generation,
+            "traced_mb": round(traced_mb, 3),
+            "instances": self.count_instances(),
+            "registries": {name: length() for name, length in self.registries.items()},
+        }
+
+        if self._previous_snapshot is not None:
+            previous_mb = sum(
+                stat.size for stat in self._previous_snapshot.statistics("filename")) / 2**20
+            record["growth_mb"] = round(traced_mb - previous_mb, 3)
+            record["top_growth"] = [
+                {"site": str(stat.traceback), "size_diff_kb": round(stat.size_diff / 1024, 1),
+                 "count_diff": stat.count_diff}
+                for stat in snapshot.compare_to(self._previous_snapshot, "lineno")[:self.top]
+                if stat.size_diff > 0
+            ]
+        self._previous_snapshot = snapshot
+
+        self.print_report(record)
+        self.write_report(record)
+
+    def post_evaluate(self, config, population, species, best_genome):
+        """
+        Function called by neat after the evaluation of every generation (nothing to do)
+        """
+
+    def post_reproduction(self, config, population, species):
+        """
+        Function called by neat after the reproduction of every generation (nothing to do)
+        """
+
+    def complete_extinction(self):
+        """
+        Function called by neat when all the species are extinct (nothing to do)
+        """
+
+    def found_solution(self, config, generation, best):
+        """
+        Function called by neat when a genome reaches the fitness threshold (nothing to do)
+        """
+
+    def species_stagnant(self, sid, species):
+        """
+        Function called by neat when a species is removed for stagnation (nothing to do)
+        """
+
+    def info(self, msg):
+        """
+        Function called by neat to report a message (nothing to do)
+        """
+
+    def count_instances(self) -> Dict[str, int]:
+        """
+        Function to count the live instances of instance_types (by exact class, not subclasses)
+
+        Returns: {class name: number of live instances}
+        """
+        counts = {instance_type.__name__: 0 for instance_type in self.instance_types}
+        for obj in gc.get_objects():
+            name = type(obj).__name__
+            if name in counts and type(obj) in self.instance_types:
+                counts[name] += 1
+        return counts
+
+    def print_report(self, record: dict) -> None:
+        """
+        Function to print the memory report of the generation
+        and a warning if the growth exceeds growth_threshold_mb
+        """
+        instances = ", ".join(f"{name}: {count}" for name, count in record["instances"].items())
+        registries = ", ".join(f"{name}: {length}" for name, length in record["registries"].items())
+        print(f"Memory: {record['traced_mb']:.1f} MB traced, {record.get('growth_mb', 0.0):+.2f} MB since last generation")
+        print(f"Live instances: {instances}")
+        if registries:
+            print(f"Registries: {registries}")
+        for stat in record.get("top_growth", []):
+            print(f"    {stat['size_diff_kb']:+10.1f} KB {stat['count_diff']:+7d} blocks  {stat['site']}")
+
+        if record.get("growth_mb", 0.0) > self.growth_threshold_mb:
+            print(f"WARNING: memory grew by {record['growth_mb']:.1f} MB in generation {record['generation']} "
+                  f"(threshold: {self.growth_threshold_mb:.1f} MB)")
+
+    def write_report(self, record: dict) -> None:
+        """
+        Function to append the memory report of the generation to report_path
+        """
+        directory = os.path.dirname(self.report_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.report_path, "a") as report_file:
+            report_file.write(json.dumps(record) + "\n")
@@ -138,10 +138,61 @@ class AIBots(Player):
 
         self.color = color
         self.boost = boost
+        self.last_output: Optional[list] = None  # output of its neural network, kept between 2 decisions
+        self.decision_phase: Optional[int] = None  # tick offset of its decisions (see DecisionScheduler)
 
         AIBots.aibots_list.append(self)
 
 
+class AIBotsPool:
+    """
+    AIBotsPool reuses the AIBots of the previous generations instead of creating new ones.
+    It has no attribute set at creation.
+
+    release_all() gives back all the AIBots at the start of a generation, then acquire() reinitializes one
+    of them (or creates one if there is no free AIBot): the number of AIBots is the size of the biggest
+    population, so AIBots.aibots_list does not grow at every generation.
+    """
+
+    def __init__(self) -> None:
+        """
+        Function to create an instance of AIBotsPool class
+        """
+        self.aibots: List[AIBots] = []
+        self._free: int = 0  # the AIBots from index _free are free
+
+    def release_all(self) -> None:
+        """
+        Function to give back all the AIBots (they must not be used anymore)
+        """
+        self._free = 0
+
+    def acquire(
+        self,
+        xy_position: tuple,
+        size=50,
+        mass: int = 1,
+        color: tuple = (255, 0, 0)
+    ) -> AIBots:
+        """
+        Function to get an AIBot at rest at a position (a free one reinitialized or a new one)
+        """
+        if self._free == len(self.aibots):
+            self.aibots.append(AIBots(xy_position, size=size, mass=mass, color=color))
+        aibot = self.aibots[self._free]
+        self._free += 1
+        aibot.x, aibot.y = xy_position
+        aibot.size = size
+        aibot.mass = mass
+        aibot.color = color
+        aibot.speed = 0
+        aibot.angle = 0
+        aibot.boost = 5.0
+        aibot.last_output = None
+        aibot.decision_phase = None
+        return aibot
+
+
 class Obstacle (Player):
     """
     Obstacle is a rectangle.
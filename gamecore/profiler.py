@@ -0,0 +1,350 @@
+"""
+Local module that defines the FrameProfiler and SamplingProfiler classes
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import List, Dict, Tuple, Optional
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class FrameProfiler:
+    """
+    FrameProfiler measures where the time of each frame goes.
+    It has 4 attributes: stages, window, enabled, overlay
+    * stages: names of the stages of a frame (e.g. "input", "sensors", "activate", "physics", "draw", "display")
+    * window: number of frames kept to compute the rolling percentiles
+    * enabled: if False, the profiler does nothing (mark() returns immediately);
+      it is also True while the overlay is shown
+    * overlay: if True, the per-stage timings are drawn on the screen
+
+    The time between 2 calls of mark() is added to the stage given to the 2nd call.
+    So a stage that is entered several times per frame (e.g. "activate" for every AIBot)
+    is accumulated and stored once per frame.
+    """
+
+    def __init__(
+        self,
+        stages: List[str],
+        window: int = 240,
+        enabled: bool = False,
+        summary_path: Optional[str] = None
+    ) -> None:
+        """
+        Function to create an instance of FrameProfiler class
+        By default:
+        * window is 240 frames (2 seconds at 120 fps)
+        * enabled is False (the profiler only runs while the overlay is shown)
+        * summary_path is None (no summary written; e.g. "data/frame_profile.jsonl" for 1 json line per generation)
+        """
+        self.stages = list(stages) + ["total"]
+        self.window = window
+        self.enabled = enabled
+        self._always_enabled = enabled
+        self.overlay = False
+        self.summary_path = summary_path
+
+        # rolling samples (in seconds) used by the overlay
+        self.samples: Dict[str, deque] = {
+            stage: deque(maxlen=window) for stage in self.stages}
+        # all the samples of the current generation, used by the summary
+        self.generation_samples: Dict[str, List[float]] = {
+            stage: [] for stage in self.stages}
+
+        self._current: Dict[str, float] = dict.fromkeys(self.stages, 0.0)
+        self._frame_start: float = 0.0
+        self._last_mark: float = 0.0
+        self._overlay_surfaces: list = []
+        self._overlay_age: int = 0
+
+    def start_frame(self) -> None:
+        """
+        Function to start timing a new frame
+        """
+        if not self.enabled:
+            return
+        self._frame_start = self._last_mark = time.perf_counter()
+
+    def mark(self, stage: str) -> None:
+        """
+        Function to add the time elapsed since the previous mark to the stage
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._current[stage] += now - self._last_mark
+        self._last_mark = now
+
+    def end_frame(self) -> None:
+        """
+        Function to store the stage timings of the frame that just ended
+        """
+        if not self.enabled:
+            return
+        current = self._current
+        current["total"] = time.perf_counter() - self._frame_start
+        for stage in self.stages:
+            self.samples[stage].append(current[stage])
+            self.generation_samples[stage].append(current[stage])
+            current[stage] = 0.0
+
+    def summary(self, samples: Optional[Dict[str, List[float]]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Function to compute the mean and percentiles (in ms) of every stage
+
+        Returns: {stage: {"mean": x, "p50": x, "p95": x, "p99": x, "max": x}}
+        """
+        if samples is None:
+            samples = self.samples
+
+        stats: Dict[str, Dict[str, float]] = {}
+        for stage in self.stages:
+            values = sorted(samples[stage])
+            if not values:
+                continue
+            stats[stage] = {
+                "mean": 1e3 * sum(values) / len(values),
+                "p50": 1e3 * percentile(values, 50),
+                "p95": 1e3 * percentile(values, 95),
+                "p99": 1e3 * percentile(values, 99),
+                "max": 1e3 * values[-1],
+            }
+        return stats
+
+    def end_generation(self, generation: int, population_size: int) -> None:
+        """
+        Function to append the summary of the generation to summary_path (if any)
+        and start collecting the samples of the next generation
+        """
+        frames = len(self.generation_samples["total"])
+        if frames and self.summary_path:
+            record = {
+                "generation": generation,
+                "population_size": population_size,
+                "frames": frames,
+                "stages_ms": self.summary(self.generation_samples),
+            }
+            directory = os.path.dirname(self.summary_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.summary_path, "a") as summary_file:
+                summary_file.write(json.dumps(record) + "\n")
+
+        for stage in self.stages:
+            self.generation_samples[stage] = []
+
+    def toggle_overlay(self) -> None:
+        """
+        Function to show or hide the on-screen overlay (the profiler runs while it is shown)
+        """
+        self.overlay = not self.overlay
+        self.enabled = self.overlay or self._always_enabled
+        if self.enabled:
+            # the frame in progress is timed from now on
+            self._current = dict.fromkeys(self.stages, 0.0)
+            self._frame_start = self._last_mark = time.perf_counter()
+
+    def draw_overlay(self, surface, font, xy_pos: Tuple[int, int] = (10, 10), color=(255, 0, 0)) -> list:
+        """
+        Function to draw the rolling per-stage timings on a surface.
+        The text is only rendered again every 30 frames so that the overlay stays cheap.
+
+        Returns: list of the rects drawn
+        """
+        if not (self.enabled and self.overlay):
+            return []
+
+        self._overlay_age -= 1
+        if self._overlay_age <= 0:
+            self._overlay_age = 30
+            lines = [f"{'stage':>9} {'p50':>6} {'p95':>6} {'p99':>6}"]
+            lines.extend(
+                f"{stage:>9} {stats['p50']:6.2f} {stats['p95']:6.2f} {stats['p99']:6.2f} ms"
+                for stage, stats in self.summary().items())
+            self._overlay_surfaces = [font.render(line, True, color) for line in lines]
+
+        rects = []
+        x, y = xy_pos
+        for text_surface in self._overlay_surfaces:
+            rects.append(surface.blit(text_surface, (x, y)))
+            y += text_surface.get_height()
+        return rects
+
+
+class SamplingProfiler:
+    """
+    SamplingProfiler samples the call stack of the game thread from a background thread.
+    It has 4 attributes: interval_s, frames, generations, output_dir
+    * interval_s: time between 2 samples in seconds
+    * frames: number of frames to capture once started
+    * generations: if > 0, number of generations to capture instead of frames
+    * output_dir: directory where the captured profiles are written
+
+    The profile is written in the "folded stacks" format (1 line per stack: "a;b;c count")
+    that flamegraph.pl and speedscope can open as a flame graph.
+    The file name is tagged with the generation number and the population size.
+    """
+
+    def __init__(
+        self,
+        interval_s: float = 0.005,
+        frames: int = 600,
+        generations: int = 0,
+        output_dir: str = "data/profiles"
+    ) -> None:
+        """
+        Function to create an instance of SamplingProfiler class
+        By default:
+        * interval_s is 0.005 (200 samples per second)
+        * frames is 600 (5 seconds at 120 fps)
+        * generations is 0 (capture is limited by frames)
+        """
+        self.interval_s = interval_s
+        self.frames = frames
+        self.generations = generations
+        self.output_dir = output_dir
+
+        self.running: bool = False
+        self.last_profile_path: Optional[str] = None
+        self._toggle_requested: bool = False
+        self._remaining: int = 0
+        self._stacks: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._target_thread_id: int = threading.main_thread().ident
+        self._tags: str = ""
+
+    def request_toggle(self, *args) -> None:
+        """
+        Function to ask to start (or stop) a capture at the next frame.
+        It only sets a flag so that it is safe to call from a signal handler or another thread.
+        """
+        self._toggle_requested = True
+
+    def install_signal_handler(self, signal_name: str = "SIGUSR1") -> bool:
+        """
+        Function to start/stop a capture when the process receives a POSIX signal
+        (e.g. kill -USR1 <pid>).
+
+        Returns: False if the platform has no such signal (e.g. Windows)
+        """
+        signum = getattr(signal, signal_name, None)
+        if signum is None or threading.current_thread() is not threading.main_thread():
+            return False
+        signal.signal(signum, self.request_toggle)
+        return True
+
+    def tick(self, generation: int, population_size: int) -> None:
+        """
+        Function to call once per frame:
+        handles the pending start/stop request and stops the capture after the given number of frames
+        """
+        if self._toggle_requested:
+            self._toggle_requested = False
+            if self.running:
+                self.stop()
+            else:
+                self.start(generation, population_size)
+            return
+
+        if self.running and not self.generations:
+            self._remaining -= 1
+            if self._remaining <= 0:
+                self.stop()
+
+    def end_generation(self) -> None:
+        """
+        Function to call at the end of every generation:
+        stops the capture after the given number of generations
+        """
+        if self.running and self.generations:
+            self._remaining -= 1
+            if self._remaining <= 0:
+                self.stop()
+
+    def start(self, generation: int, population_size: int) -> None:
+        """
+        Function to start sampling the game thread
+        """
+        if self.running:
+            return
+        self.running = True
+        self._remaining = self.generations or self.frames
+        self._tags = f"gen{generation:04d}_pop{population_size}"
+        self._stacks = Counter()
+        self._stop_event.clear()
+        self._target_thread_id = threading.get_ident()
+        self._thread = threading.Thread(
+            target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        print(f"Sampling profiler started ({self._tags})")
+
+    def stop(self) -> Optional[str]:
+        """
+        Function to stop sampling and write the profile
+
+        Returns: path of the profile file
+        """
+        if not self.running:
+            return None
+        self.running = False
+        self._stop_event.set()
+        self._thread.join()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(
+            self.output_dir, f"{self._tags}_{time.strftime('%Y%m%d-%H%M%S')}.folded")
+        with open(path, "w") as profile_file:
+            for stack, count in self._stacks.most_common():
+                profile_file.write(f"{';'.join(stack)} {count}\n")
+
+        self.last_profile_path = path
+        print(f"Sampling profiler stopped: {sum(self._stacks.values())} samples written to {path}")
+        return path
+
+    def _sample(self) -> None:
+        """
+        Function run by the sampling thread: records the stack of the game thread every interval_s
+        """
+        labels: Dict[object, str] = {}  # code object -> "function (file:line)"
+        while not self._stop_event.wait(self.interval_s):
+            frame = sys._current_frames().get(self._target_thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                stack.append(label)
+                frame = frame.f_back
+            if stack:
+                stack.reverse()  # root first
+                self._stacks[tuple(stack)] += 1
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Function to get the q-th percentile of an already sorted list
+    (nearest-rank method, no interpolation)
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1,
+                max(0, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
@@ -0,0 +1,244 @@
+"""
+Local module that defines the FrameRecorder class
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Tuple, Optional
+
+# Import 3rd party modules
+import pygame
+
+
+# =====================================================================
+# Constants
+# =====================================================================
+
+# pixel formats of pygame.image.frombuffer and their name for ffmpeg (-pixel_format)
+# (X: unused byte, e.g. the display surfaces of SDL)
+FFMPEG_PIXEL_FORMATS: Dict[str, str] = {
+    "RGB": "rgb24", "RGBX": "rgb0", "RGBA": "rgba", "BGRX": "bgr0", "BGRA": "bgra", "XRGB": "0rgb", "ARGB": "argb"}
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class FrameRecorder:
+    """
+    FrameRecorder records the rendered frames to a PNG sequence or a raw video file without slowing the game.
+    It has 5 attributes: output_dir, video_format, slots, max_frame_bytes, framerate
+    * output_dir: directory where a new sub-directory is created per recording
+    * video_format: "png" (1 image per frame) or "raw" (raw video file + json description for ffmpeg)
+    * slots: number of frames that can wait to be encoded (size of the ring buffer)
+    * max_frame_bytes: size of a slot of the ring buffer (bigger frames are dropped)
+    * framerate: frame rate written in the description of the raw video
+
+    The pixels of a frame are copied with 1 memcpy from the display surface into a slot of a shared memory
+    ring buffer and a separate process encodes them. If all the slots are waiting to be encoded,
+    the frame is dropped instead of waiting (back-pressure never stalls the simulation).
+    """
+
+    def __init__(
+        self,
+        output_dir: str = "data/recordings",
+        video_format: str = "png",
+        slots: int = 8,
+        max_frame_bytes: int = 1920 * 1080 * 4,
+        framerate: int = 60
+    ) -> None:
+        """
+        Function to create an instance of FrameRecorder class
+        By default:
+        * output_dir is "data/recordings"
+        * video_format is "png"
+        * slots is 8 frames
+        * max_frame_bytes is a 32-bit full HD frame
+        * framerate is 60 frames per second
+        """
+        if video_format not in ("png", "raw"):
+            raise ValueError(f"unknown video format: {video_format}")
+        self.output_dir = output_dir
+        self.video_format = video_format
+        self.slots = slots
+        self.max_frame_bytes = max_frame_bytes
+        self.framerate = framerate
+        self.path: Optional[str] = None
+        self.frames_captured: int = 0
+        self.frames_dropped: int = 0
+        self._shared_memory: Optional[shared_memory.SharedMemory] = None
+        self._free_slots = None
+        self._filled_slots = None
+        self._worker = None
+
+    def start(self) -> str:
+        """
+        Function to create the ring buffer and start the encoding process
+
+        Returns: directory of the recording
+        """
+        self.path = os.path.join(self.output_dir, time.strftime("%Y%m%d-%H%M%S"))
+        recording_number = 1
+        while os.path.exists(self.path):
+            recording_number += 1
+            self.path = os.path.join(self.output_dir, time.strftime("%Y%m%d-%H%M%S") + f"-{recording_number}")
+        os.makedirs(self.path)
+
+        # spawn: the encoding process must not inherit the display of the game
+        context = multiprocessing.get_context("spawn")
+        self._shared_memory = shared_memory.SharedMemory(create=True, size=self.slots * self.max_frame_bytes)
+        self._free_slots = context.Queue()
+        self._filled_slots = context.Queue()
+        for slot in range(self.slots):
+            self._free_slots.put(slot)
+
+        self._worker = context.Process(
+            target=encode_frames, name="frame-recorder", daemon=True,
+            args=(self._shared_memory.name, self.max_frame_bytes, self._filled_slots, self._free_slots,
+                  self.path, self.video_format, self.framerate))
+        self._worker.start()
+        self.frames_captured = self.frames_dropped = 0
+        print(f"Recording to {self.path} ({self.video_format})")
+        return self.path
+
+    def capture(self, surface: pygame.Surface) -> bool:
+        """
+        Function to copy the pixels of a surface (e.g. the screen after display.update) into a free slot
+
+        Returns: False if the frame is dropped (no free slot or frame too big)
+        """
+        if self._worker is None:
+            return False
+        try:
+            slot = self._free_slots.get_nowait()
+        except queue.Empty:
+            self.frames_dropped += 1
+            return False
+
+        size = surface.get_size()
+        pixel_format = buffer_pixel_format(surface)
+        if pixel_format is not None:
+            pixels = surface.get_buffer()  # view on the pixels of the surface (no copy)
+        else:
+            pixel_format = "RGB"
+            pixels = pygame.image.tobytes(surface, pixel_format)
+        frame_bytes = pixels.length if isinstance(pixels, pygame.BufferProxy) else len(pixels)
+        if frame_bytes > self.max_frame_bytes:
+            self._free_slots.put(slot)
+            self.frames_dropped += 1
+            return False
+
+        offset = slot * self.max_frame_bytes
+        self._shared_memory.buf[offset:offset + frame_bytes] = pixels
+        self._filled_slots.put((slot, self.frames_captured, size, pixel_format, frame_bytes))
+        self.frames_captured += 1
+        return True
+
+    def stop(self) -> None:
+        """
+        Function to wait for the frames left to encode, stop the encoding process and free the ring buffer
+        """
+        if self._worker is None:
+            return
+        self._filled_slots.put(None)
+        self._worker.join()
+        self._worker = None
+        self._shared_memory.close()
+        self._shared_memory.unlink()
+        self._shared_memory = None
+        print(f"Recording saved to {self.path}: {self.frames_captured} frames, {self.frames_dropped} dropped")
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def buffer_pixel_format(surface: pygame.Surface) -> Optional[str]:
+    """
+    Function to get the format of the raw pixels of a surface for pygame.image.frombuffer
+
+    Returns: "BGRA", "RGBX", ... or None if the pixels cannot be used as they are (padding, 16 bits, ...)
+    """
+    bytes_per_pixel = surface.get_bytesize()
+    if bytes_per_pixel not in (3, 4) or surface.get_pitch() != surface.get_width() * bytes_per_pixel:
+        return None
+
+    channels = ["X"] * bytes_per_pixel
+    for name, mask in zip("RGBA", surface.get_masks()):
+        if mask:
+            byte_index = (mask.bit_length() - 1) // 8
+            if sys.byteorder == "big":
+                byte_index = bytes_per_pixel - 1 - byte_index
+            channels[byte_index] = name
+    pixel_format = "".join(channels)
+    return pixel_format if pixel_format in FFMPEG_PIXEL_FORMATS else None
+
+
+def encode_frames(
+    shared_memory_name: str,
+    slot_bytes: int,
+    filled_slots,
+    free_slots,
+    path: str,
+    video_format: str,
+    framerate: int
+) -> None:
+    """
+    Function run by the encoding process: encodes the filled slots until it receives None
+    and gives the slots back once encoded
+    """
+    buffer = shared_memory.SharedMemory(name=shared_memory_name)
+    video_file = None
+    video_key: Optional[Tuple] = None
+    segments = []
+
+    while True:
+        frame = filled_slots.get()
+        if frame is None:
+            break
+        slot, index, size, pixel_format, frame_bytes = frame
+        offset = slot * slot_bytes
+        pixels = buffer.buf[offset:offset + frame_bytes]
+
+        if video_format == "png":
+            if "X" in pixel_format and pixel_format != "RGBX":
+                # frombuffer has no format with an unused byte there: read it as alpha and drop it
+                image = pygame.image.frombuffer(pixels, size, pixel_format.replace("X", "A"))
+                image = pygame.image.frombytes(pygame.image.tobytes(image, "RGB"), size, "RGB")
+            else:
+                image = pygame.image.frombuffer(pixels, size, pixel_format)
+            pygame.image.save(image, os.path.join(path, f"frame_{index:06d}.png"))
+            del image
+        else:
+            # a new file is started when the window is resized
+            if (size, pixel_format) != video_key:
+                if video_file is not None:
+                    video_file.close()
+                video_key = (size, pixel_format)
+                file_name = f"video_{len(segments):03d}_{size[0]}x{size[1]}.raw"
+                video_file = open(os.path.join(path, file_name), "wb")
+                segments.append({
+                    "file": file_name,
+                    "ffmpeg": (f"ffmpeg -f rawvideo -pixel_format {FFMPEG_PIXEL_FORMATS[pixel_format]} "
+                               f"-video_size {size[0]}x{size[1]} -framerate {framerate} -i {file_name} "
+                               f"{file_name[:-4]}.mp4"),
+                })
+            video_file.write(pixels)
+
+        pixels.release()
+        free_slots.put(slot)
+
+    if video_file is not None:
+        video_file.close()
+        with open(os.path.join(path, "video.json"), "w") as description_file:
+            json.dump({"framerate": framerate, "segments": segments}, description_file, indent=2)
+    buffer.close()
@@ -0,0 +1,292 @@
+"""
+Local module that defines the DirtyRenderer, SpriteCache, WorldSnapshot and RenderThread classes
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import threading
+from array import array
+from typing import List, Dict, Tuple, Iterable, Optional, Callable, NamedTuple
+
+# Import 3rd party modules
+import pygame
+import pygame.gfxdraw
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class DirtyRenderer:
+    """
+    DirtyRenderer only repaints and uploads the parts of the screen that changed ("dirty rectangles").
+    It has 2 attributes: background_color, full_update_ratio
+    * background_color: color used to erase what was drawn at the previous frame
+    * full_update_ratio: if the dirty rects cover more than this part of the screen, the whole screen is updated
+
+    Every frame:
+    1. begin_frame() erases the rects drawn at the previous frame;
+    2. the drawings register their rect with add() / extend();
+    3. end_frame() sends the previous and current rects to pygame.display.update(rects).
+    """
+
+    def __init__(self, background_color: Tuple[int, int, int], full_update_ratio: float = 0.5) -> None:
+        """
+        Function to create an instance of DirtyRenderer class
+        By default:
+        * full_update_ratio is 0.5 (half of the screen)
+        """
+        self.background_color = background_color
+        self.full_update_ratio = full_update_ratio
+        self.screen: Optional[pygame.Surface] = None
+        self._previous_rects: List[pygame.Rect] = []
+        self._current_rects: List[pygame.Rect] = []
+        self._full_update: bool = True
+
+    def invalidate(self) -> None:
+        """
+        Function to repaint and update the whole screen at the next frame
+        (first frame, window resized, screen used by something else in between)
+        """
+        self._full_update = True
+
+    def begin_frame(self, screen: pygame.Surface) -> None:
+        """
+        Function to erase the drawings of the previous frame
+        """
+        if screen is not self.screen:
+            # the display surface changes when the window is resized
+            self.screen = screen
+            self._full_update = True
+
+        if self._full_update:
+            screen.fill(self.background_color)
+        else:
+            for rect in self._previous_rects:
+                screen.fill(self.background_color, rect)
+        self._current_rects = []
+
+    def add(self, rect: Optional[pygame.Rect]) -> None:
+        """
+        Function to register the rect of a drawing of the current frame
+        """
+        if rect:
+            self._current_rects.append(rect)
+
+    def extend(self, rects: Iterable[pygame.Rect]) -> None:
+        """
+        Function to register the rects of several drawings of the current frame
+        """
+        self._current_rects.extend(rect for rect in rects if rect)
+
+    def end_frame(self) -> None:
+        """
+        Function to send the dirty rects (erased + drawn) to the display
+        """
+        dirty_rects = self._previous_rects + self._current_rects
+        self._previous_rects = self._current_rects
+
+        if not self._full_update:
+            screen_area = self.screen.get_width() * self.screen.get_height()
+            dirty_area = sum(rect.width * rect.height for rect in dirty_rects)
+            self._full_update = dirty_area > self.full_update_ratio * screen_area
+
+        if self._full_update:
+            pygame.display.update()
+            self._full_update = False
+        else:
+            pygame.display.update(dirty_rects)
+
+
+class SpriteCache:
+    """
+    SpriteCache rasterizes each circle (radius, color) once and reuses it as a sprite.
+    It has 2 attributes: antialias, max_entries
+    * antialias: if True, the circles have anti-aliased edges (per-pixel alpha)
+    * max_entries: maximum number of sprites kept (the cache is emptied when it is full)
+
+    A whole layer of bodies (obstacles, aibots, ...) is then drawn with a single Surface.blits() call
+    instead of 1 pygame.draw.circle() call per body.
+    """
+
+    def __init__(self, antialias: bool = False, max_entries: int = 1024) -> None:
+        """
+        Function to create an instance of SpriteCache class
+        By default:
+        * antialias is False (same pixels as pygame.draw.circle)
+        * max_entries is 1024 sprites
+        """
+        self.antialias = antialias
+        self.max_entries = max_entries
+        self._sprites: Dict[tuple, pygame.Surface] = {}
+
+    def get(self, radius: float, color: Tuple[int, int, int]) -> pygame.Surface:
+        """
+        Function to get the sprite of a circle, rasterizing it on first use
+
+        Returns: surface of size (2 * radius, 2 * radius) with the circle centered
+        """
+        radius = int(radius)
+        key = (radius, tuple(color))
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            if len(self._sprites) >= self.max_entries:
+                self._sprites.clear()
+            sprite = self._sprites[key] = self.rasterize(radius, color)
+        return sprite
+
+    def rasterize(self, radius: int, color: Tuple[int, int, int]) -> pygame.Surface:
+        """
+        Function to draw a circle on its own surface
+        """
+        diameter = max(1, 2 * radius)
+        if self.antialias:
+            sprite = pygame.Surface((diameter, diameter), pygame.SRCALPHA)
+            pygame.gfxdraw.aacircle(sprite, radius, radius, max(0, radius - 1), color)
+            pygame.gfxdraw.filled_circle(sprite, radius, radius, max(0, radius - 1), color)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert_alpha()
+        else:
+            # the transparent pixels are given by a run-length encoded color key,
+            # which is much faster to blit than per-pixel alpha
+            colorkey = (255, 0, 255) if tuple(color) != (255, 0, 255) else (0, 255, 0)
+            sprite = pygame.Surface((diameter, diameter))
+            sprite.fill(colorkey)
+            pygame.draw.circle(sprite, color, (radius, radius), radius)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert()
+            sprite.set_colorkey(colorkey, pygame.RLEACCEL)
+        return sprite
+
+    def draw_arrays(self, surface: pygame.Surface, coordinates: array, colors: tuple) -> List[pygame.Rect]:
+        """
+        Function to draw a layer of a WorldSnapshot (flat array of x, y, size and 1 color per body)
+        with 1 batched blit
+
+        Returns: list of the rects drawn
+        """
+        get = self.get
+        blit_sequence = []
+        for x, y, size, color in zip(coordinates[0::3], coordinates[1::3], coordinates[2::3], colors):
+            sprite = get(size, color)
+            radius = sprite.get_width() // 2
+            blit_sequence.append((sprite, (int(x) - radius, int(y) - radius)))
+        return surface.blits(blit_sequence)
+
+
+class WorldSnapshot(NamedTuple):
+    """
+    WorldSnapshot is an immutable copy of what must be drawn at a tick.
+    It has 3 attributes: layers, texts, images
+    * layers: tuple of (coordinates, colors) per layer of bodies,
+      coordinates being a flat array of doubles (x, y, size of each body)
+    * texts: tuple of (text, color, xy_pos_center, value) to draw
+    * images: tuple of (surface, xy_topleft) drawn below the bodies (the surfaces must not be modified)
+    """
+    layers: tuple
+    texts: tuple
+    images: tuple = ()
+
+
+class RenderThread:
+    """
+    RenderThread draws the world in its own thread so that the simulation never waits for the display.
+    It has 1 attribute: draw_function
+    * draw_function: function that draws a WorldSnapshot and updates the display
+
+    The simulation publishes snapshots and goes on; the render thread always draws the most recent one
+    and the snapshots published in between are dropped. Every tick takes a new snapshot that is never
+    modified once published, so the one being drawn is never the one being written (no buffer is shared).
+    lock is held while a snapshot is drawn: hold it to replace the display surface (e.g. window resized).
+    """
+
+    def __init__(self, draw_function: Callable[[WorldSnapshot], None]) -> None:
+        """
+        Function to create an instance of RenderThread class
+        """
+        self.draw_function = draw_function
+        self.lock = threading.Lock()
+        self.frames_published: int = 0
+        self.frames_drawn: int = 0
+        self._latest: Optional[WorldSnapshot] = None
+        self._condition = threading.Condition()
+        self._running: bool = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Function to start the render thread
+        """
+        self._running = True
+        self._thread = threading.Thread(target=self._render_loop, name="render", daemon=True)
+        self._thread.start()
+
+    def publish(self, snapshot: WorldSnapshot) -> None:
+        """
+        Function to hand the latest snapshot to the render thread (never waits for the drawing)
+        """
+        with self._condition:
+            self._latest = snapshot
+            self.frames_published += 1
+            self._condition.notify()
+
+    def stop(self, timeout_s: float = 1.0) -> None:
+        """
+        Function to stop the render thread after the snapshot being drawn
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout_s)
+        self._thread = None
+
+    def _render_loop(self) -> None:
+        """
+        Function run by the render thread: waits for a new snapshot and draws it
+        """
+        while True:
+            with self._condition:
+                while self._running and self._latest is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                snapshot, self._latest = self._latest, None
+            with self.lock:
+                self.draw_function(snapshot)
+            self.frames_drawn += 1
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def take_snapshot(
+    layers: Iterable[Iterable],
+    texts: Iterable[tuple],
+    images: Iterable[tuple] = (),
+    offset: Tuple[float, float] = (0.0, 0.0),
+    zoom: float = 1.0
+) -> WorldSnapshot:
+    """
+    Function to copy the position, size and color of circular bodies (with x, y, size and color attributes),
+    the texts and the images to draw into a WorldSnapshot
+    * param
+    :layers :lists of bodies, drawn in this order
+    :texts :(text, color, xy_pos_center, value) to draw
+    :images :(surface, xy_topleft) to draw
+    :offset :world coordinates of the top left of the screen
+    :zoom :pixels per world unit (the bodies are converted to screen coordinates)
+    """
+    offset_x, offset_y = offset
+    snapshot_layers = []
+    for bodies in layers:
+        coordinates = array("d")
+        colors = []
+        for body in bodies:
+            coordinates.extend(((body.x - offset_x) * zoom, (body.y - offset_y) * zoom, body.size * zoom))
+            colors.append(body.color)
+        snapshot_layers.append((coordinates, tuple(colors)))
+    return WorldSnapshot(tuple(snapshot_layers), tuple(texts), tuple(images))
@@ -0,0 +1,416 @@
+"""
+Local module that defines the ReplayRecorder, ReplayPlayer and ReplayNetwork classes
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import bisect
+import json
+import os
+import struct
+import time
+import zlib
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+# Import local modules
+from gamecore.state import WorldState
+
+
+# =====================================================================
+# Constants
+# =====================================================================
+
+REPLAY_MAGIC = b"EPRP1\n"
+
+# flags of a tick record
+KEYS_FLAG = 1  # keys byte (keys pressed by the human player)
+DT_MS_FLAG = 2  # uint16: time step in milliseconds (else the fixed time step)
+DT_FLAG = 4  # float64: time step that is not a number of milliseconds
+OUTPUTS_FLAG = 8  # uint16 count + (uint16 slot, uint8 output mask) for each AIBot whose output changed
+KEYFRAME_FLAG = 16  # keyframe (state at the end of the tick) follows the tick record
+
+# bits of the keys mask of the human player (left and right, up and down are exclusive)
+# KEY_READ: the keys were read at this tick (only the ticks that are drawn read the keys)
+KEY_LEFT, KEY_RIGHT, KEY_UP, KEY_DOWN, KEY_READ = 1, 2, 4, 8, 128
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class RecordingNetwork:
+    """
+    RecordingNetwork wraps the neural network of an AIBot to record the changes of its output.
+    It has 3 attributes: network, recorder, slot
+    * network: the neural network of the AIBot
+    * recorder: ReplayRecorder writing the replay
+    * slot: index of the AIBot in the population of the generation
+    """
+
+    def __init__(self, network, recorder: "ReplayRecorder", slot: int) -> None:
+        """
+        Function to create an instance of RecordingNetwork class
+        """
+        self.network = network
+        self.recorder = recorder
+        self.slot = slot
+        self.mask: int = -1
+
+    def activate(self, inputs: list) -> list:
+        """
+        Function to activate the neural network and record its output if it changed
+        (only output > 0.5 matters to the game: 1 bit per output)
+        """
+        output = self.network.activate(inputs)
+        mask = output_mask(output)
+        if mask != self.mask:
+            self.mask = mask
+            self.recorder.outputs.append((self.slot, mask))
+        return output
+
+
+class ReplayNetwork:
+    """
+    ReplayNetwork replaces the neural network of an AIBot during a replay: it returns the recorded output.
+    It has 2 attributes: player, slot
+    * player: ReplayPlayer reading the replay
+    * slot: index of the AIBot in the population of the generation
+    """
+
+    def __init__(self, player: "ReplayPlayer", slot: int) -> None:
+        """
+        Function to create an instance of ReplayNetwork class
+        """
+        self.player = player
+        self.slot = slot
+
+    def activate(self, inputs: list) -> list:
+        """
+        Function to get the output of the AIBot at the current tick of the replay
+        """
+        mask = self.player.masks[self.slot]
+        return [1.0 if mask & (1 << bit) else 0.0 for bit in range(8)]
+
+
+class ReplayGenome:
+    """
+    ReplayGenome stands for a genome during a replay (the game sets its fitness).
+    It has 1 attribute: key
+    * key: id of the recorded genome
+    """
+
+    def __init__(self, key: int) -> None:
+        """
+        Function to create an instance of ReplayGenome class
+        """
+        self.key = key
+        self.fitness: float = 0.0
+
+
+class ReplayRecorder:
+    """
+    ReplayRecorder writes 1 replay file per generation: the inputs of every tick (keys of the human player,
+    changes of the outputs of the AIBots, time step) and a keyframe every keyframe_interval ticks.
+    It has 3 attributes: output_dir, keyframe_interval, fixed_dt_s
+    * output_dir: directory of the replays (a new sub-directory is created per run)
+    * keyframe_interval: number of ticks between 2 keyframes
+    * fixed_dt_s: time step of the ticks that are not drawn (not written)
+
+    A tick costs 1 byte when nothing changes, and a keyframe 32 bytes per body; the records are compressed
+    (zlib) after the header: a generation of a minute is a few kilobytes (tens with hundreds of AIBots).
+    """
+
+    def __init__(self, output_dir: str = "data/replays", keyframe_interval: int = 300,
+                 fixed_dt_s: float = 1 / 120) -> None:
+        """
+        Function to create an instance of ReplayRecorder class
+        By default:
+        * output_dir is "data/replays"
+        * keyframe_interval is 300 ticks
+        * fixed_dt_s is 1/120 s
+        """
+        self.output_dir = output_dir
+        self.keyframe_interval = keyframe_interval
+        self.fixed_dt_s = fixed_dt_s
+        self.path: Optional[str] = None  # directory of the replays of this run
+        self.outputs: List[Tuple[int, int]] = []  # changes of the outputs during the current tick
+        self._networks: List[RecordingNetwork] = []  # networks of the generation being recorded
+        self._next_networks: List[RecordingNetwork] = []  # networks created for the next generation
+        self._file = None
+        self._compressor = None
+        self._state: Optional[WorldState] = None
+        self._slots: list = []
+        self._keys: int = 0
+        self._dt_s: float = fixed_dt_s
+
+    def network(self, network) -> RecordingNetwork:
+        """
+        Function to wrap the neural network of the next AIBot of the generation
+        """
+        recording_network = RecordingNetwork(network, self, len(self._next_networks))
+        self._next_networks.append(recording_network)
+        return recording_network
+
+    def start(self, header: dict, slots: list, bodies: list, values: tuple) -> str:
+        """
+        Function to start the replay of a generation and write its first keyframe
+        * param
+        :header :description of the generation (game, generation, genome_ids, ...)
+        :slots :the AIBots of the generation, in the order of their networks
+        :bodies :the other bodies (player, obstacles)
+        :values :values of the game at the first tick (time, scores, ...)
+
+        Returns: path of the replay file
+        """
+        self.close()
+        if self.path is None:
+            self.path = os.path.join(self.output_dir, time.strftime("%Y%m%d-%H%M%S"))
+            run_number = 1
+            while os.path.exists(self.path):
+                run_number += 1
+                self.path = os.path.join(self.output_dir, time.strftime("%Y%m%d-%H%M%S") + f"-{run_number}")
+            os.makedirs(self.path)
+
+        header = dict(header, keyframe_interval=self.keyframe_interval, fixed_dt_s=self.fixed_dt_s,
+                      num_slots=len(slots), num_bodies=len(bodies))
+        path = os.path.join(self.path, f"{header['game']}-gen{header['generation']:04d}.replay")
+        self._file = open(path, "wb")
+        header_bytes = json.dumps(header).encode()
+        self._file.write(REPLAY_MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+        self._compressor = zlib.compressobj()
+
+        self._slots = list(slots)
+        self._state = WorldState(list(bodies) + self._slots)
+        self._networks, self._next_networks = self._next_networks, []
+        self.outputs = []
+        self._keys = 0
+        self._dt_s = self.fixed_dt_s
+        self._write_keyframe(0, self._slots, values)
+        return path
+
+    def tick(self, dt_s: float, keys: int) -> None:
+        """
+        Function to record the inputs of the human player and the time step of the current tick
+        """
+        self._keys = keys
+        self._dt_s = dt_s
+
+    def end_tick(self, ticks: int, aibots: list, values: tuple) -> None:
+        """
+        Function to write the record of a tick (and a keyframe every keyframe_interval ticks)
+        * param
+        :ticks :number of the tick
+        :aibots :the AIBots alive
+        :values :values of the game at the end of the tick
+        """
+        if self._file is None:
+            return
+        flags = 0
+        record = b""
+        if self._keys:
+            flags |= KEYS_FLAG
+            record += struct.pack("<B", self._keys)
+        if self._dt_s != self.fixed_dt_s:
+            milliseconds = round(self._dt_s * 1000)
+            if 0 <= milliseconds < 65536 and float(milliseconds * 1e-3) == self._dt_s:
+                flags |= DT_MS_FLAG
+                record += struct.pack("<H", milliseconds)
+            else:
+                flags |= DT_FLAG
+                record += struct.pack("<d", self._dt_s)
+        if self.outputs:
+            flags |= OUTPUTS_FLAG
+            record += struct.pack("<H", len(self.outputs))
+            record += b"".join(struct.pack("<HB", slot, mask) for slot, mask in self.outputs)
+        keyframe = ticks % self.keyframe_interval == 0
+        if keyframe:
+            flags |= KEYFRAME_FLAG
+        self._file.write(self._compressor.compress(struct.pack("<B", flags) + record))
+        if keyframe:
+            self._write_keyframe(ticks, aibots, values)
+        self.outputs = []
+        self._keys = 0
+        self._dt_s = self.fixed_dt_s
+
+    def _write_keyframe(self, ticks: int, aibots: list, values: tuple) -> None:
+        """
+        Function to write the state of all the bodies, the AIBots alive, their output and the values of the game
+        """
+        alive = set(map(id, aibots))
+        alive_bits = bytearray((len(self._slots) + 7) // 8)
+        for slot, aibot in enumerate(self._slots):
+            if id(aibot) in alive:
+                alive_bits[slot // 8] |= 1 << (slot % 8)
+        masks = bytes(max(0, network.mask) for network in self._networks)
+        state = self._state.capture()
+        self._file.write(self._compressor.compress(
+            struct.pack(f"<IB{len(values)}d", ticks, len(values), *values)
+            + bytes(alive_bits) + masks + state.tobytes()))
+
+    def close(self) -> None:
+        """
+        Function to close the replay file of the generation
+        """
+        if self._file is not None:
+            self._file.write(self._compressor.flush())
+            self._file.close()
+            self._file = None
+
+
+class ReplayPlayer:
+    """
+    ReplayPlayer reads a replay file and plays it back through the game: the AIBots get their recorded
+    outputs and the human player its recorded keys, so the simulation runs exactly as when it was recorded.
+    It has 1 attribute: path
+    * path: replay file
+
+    Seeking jumps to the last keyframe before the tick and simulates forward from there.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Function to create an instance of ReplayPlayer class (the whole file is read: it is small)
+        """
+        self.path = path
+        with open(path, "rb") as replay_file:
+            data = replay_file.read()
+        if not data.startswith(REPLAY_MAGIC):
+            raise ValueError(f"{path} is not a replay file")
+        offset = len(REPLAY_MAGIC)
+        (header_length,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        self.header: dict = json.loads(data[offset:offset + header_length])
+        data = zlib.decompress(data[offset + header_length:])
+        offset = 0
+
+        num_slots = self.header["num_slots"]
+        num_bodies = self.header["num_bodies"]
+        self.game: str = self.header["game"]
+        self.generation: int = self.header["generation"]
+        self.fixed_dt_s: float = self.header["fixed_dt_s"]
+
+        # per tick (index 0: before the first tick)
+        self.keys: List[int] = [0]
+        self.dt_s: List[float] = [self.fixed_dt_s]
+        self.outputs: List[List[Tuple[int, int]]] = [[]]
+        self.keyframes: Dict[int, tuple] = {}
+        keyframe_size = (num_slots + 7) // 8 + num_slots + 32 * (num_bodies + num_slots)
+
+        offset = self._read_keyframe(data, offset, keyframe_size)
+        while offset < len(data):
+            flags = data[offset]
+            offset += 1
+            keys, dt_s, outputs = 0, self.fixed_dt_s, []
+            if flags & KEYS_FLAG:
+                keys = data[offset]
+                offset += 1
+            if flags & DT_MS_FLAG:
+                (milliseconds,) = struct.unpack_from("<H", data, offset)
+                dt_s = float(milliseconds * 1e-3)
+                offset += 2
+            if flags & DT_FLAG:
+                (dt_s,) = struct.unpack_from("<d", data, offset)
+                offset += 8
+            if flags & OUTPUTS_FLAG:
+                (count,) = struct.unpack_from("<H", data, offset)
+                offset += 2
+                outputs = [struct.unpack_from("<HB", data, offset + 3 * change) for change in range(count)]
+                offset += 3 * count
+            self.keys.append(keys)
+            self.dt_s.append(dt_s)
+            self.outputs.append(outputs)
+            if flags & KEYFRAME_FLAG:
+                offset = self._read_keyframe(data, offset, keyframe_size)
+        self.num_ticks: int = len(self.keys) - 1
+        self._keyframe_ticks: List[int] = sorted(self.keyframes)
+
+        self.masks = bytearray(num_slots)  # current output of each AIBot
+        self.seek_tick: Optional[int] = 0  # tick to go to at the next start()
+        self.target_tick: int = 0  # the ticks before it are simulated without being drawn
+        self.current_tick: int = 0
+        self._networks: int = 0
+
+    def _read_keyframe(self, data: bytes, offset: int, keyframe_size: int) -> int:
+        """
+        Function to read a keyframe
+
+        Returns: offset after the keyframe
+        """
+        ticks, num_values = struct.unpack_from("<IB", data, offset)
+        offset += 5
+        values = struct.unpack_from(f"<{num_values}d", data, offset)
+        offset += 8 * num_values
+        self.keyframes[ticks] = (values, data[offset:offset + keyframe_size])
+        return offset + keyframe_size
+
+    def genomes(self) -> List[Tuple[int, ReplayGenome]]:
+        """
+        Function to get stand-ins of the genomes of the generation (game 2 places the AIBots by genome id)
+        """
+        self._networks = 0
+        return [(genome_id, ReplayGenome(genome_id)) for genome_id in self.header["genome_ids"]]
+
+    def network(self) -> ReplayNetwork:
+        """
+        Function to get the network of the next AIBot of the generation
+        """
+        network = ReplayNetwork(self, self._networks)
+        self._networks += 1
+        return network
+
+    def seek(self, tick: int) -> None:
+        """
+        Function to ask to go to a tick (the game restarts from the last keyframe before it)
+        """
+        self.seek_tick = max(0, min(self.num_ticks, tick))
+
+    def start(self, slots: list, bodies: list) -> Tuple[int, tuple, List[bool]]:
+        """
+        Function to restore the keyframe of the tick asked by seek()
+        * param
+        :slots :the AIBots of the generation, in the order of their networks
+        :bodies :the other bodies (player, obstacles)
+
+        Returns: (tick of the keyframe, values of the game, alive flag of each AIBot)
+        """
+        self.target_tick = self.seek_tick or 0
+        self.seek_tick = None
+        ticks = self._keyframe_ticks[bisect.bisect_right(self._keyframe_ticks, self.target_tick) - 1]
+        values, keyframe = self.keyframes[ticks]
+        num_slots = len(slots)
+        alive_bytes = (num_slots + 7) // 8
+        alive = [bool(keyframe[slot // 8] & (1 << (slot % 8))) for slot in range(num_slots)]
+        self.masks[:] = keyframe[alive_bytes:alive_bytes + num_slots]
+        WorldState(list(bodies) + list(slots)).restore(array("d", keyframe[alive_bytes + num_slots:]))
+        return ticks, values, alive
+
+    def tick(self, ticks: int) -> Tuple[float, int]:
+        """
+        Function to apply the recorded outputs of a tick
+
+        Returns: (time step, keys of the human player) of the tick
+        """
+        self.current_tick = ticks
+        if ticks > self.num_ticks:
+            return self.fixed_dt_s, 0
+        for slot, mask in self.outputs[ticks]:
+            self.masks[slot] = mask
+        return self.dt_s[ticks], self.keys[ticks]
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def output_mask(output: list) -> int:
+    """
+    Function to pack the outputs of a neural network into bits (bit i: output[i] > 0.5)
+    """
+    mask = 0
+    for bit, value in enumerate(output[:8]):
+        if value > 0.5:
+            mask |= 1 << bit
+    return mask
@@ -0,0 +1,87 @@
+"""
+Local module that defines the rules shared by the games and the match arena (steering and game 2 physics)
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import math
+from typing import Optional
+
+# Import local modules
+from gamecore.environment import Environment
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def steer(world: Environment, aibot, output: list) -> None:
+    """
+    Function to accelerate an AIBot in the directions chosen by the output of its neural network:
+    output[0] > 0.5 goes left, output[1] right, output[2] down and output[3] up (several can add up)
+    """
+    if output[0] > 0.5:
+        aibot.angle, aibot.speed = world.add_vectors(
+            (aibot.angle, aibot.speed), (- 1 * math.pi/2, 2))
+    if output[1] > 0.5:
+        aibot.angle, aibot.speed = world.add_vectors(
+            (aibot.angle, aibot.speed), (math.pi/2, 2))
+    if output[2] > 0.5:
+        aibot.angle, aibot.speed = world.add_vectors(
+            (aibot.angle, aibot.speed), (0, 2))
+    if output[3] > 0.5:
+        aibot.angle, aibot.speed = world.add_vectors(
+            (aibot.angle, aibot.speed), (math.pi, 2))
+
+
+def move_soccer_aibot(world: Environment, player, index: int, aibots: list, balls: list) -> int:
+    """
+    Function to move an AIBot of game 2 and the balls after it (the balls move once per AIBot)
+    * param
+    :player :the player attracting the AIBots
+    :index :index of the AIBot in aibots
+    :aibots :all the AIBots of the field (the AIBot collides with the other ones)
+    :balls :the balls (the obstacles of game 2)
+
+    Returns: number of balls touched by the AIBot
+    """
+    aibot = aibots[index]
+    aibot.move()
+    world.add_air_resistance(aibot)
+    world.attraction(player, aibot)
+    world.bounce(aibot)
+    for j, other_aibot in enumerate(aibots):
+        if index != j:
+            world.collide(aibot, other_aibot, True)
+
+    # Limits aibot's speed
+    if aibot.speed > 20:
+        aibot.speed = 20
+
+    touched: int = 0
+    for ball in balls:
+        ball.move()
+        world.add_air_resistance(ball)
+        world.bounce(ball)
+        if world.collide(ball, aibot, True):
+            touched += 1
+
+        # Limits ball's speed
+        if ball.speed > 20:
+            ball.speed = 20
+    return touched
+
+
+def border_goal(world: Environment, ball) -> Optional[int]:
+    """
+    Function to check if a ball crosses the left or right border (the goals of game 2 without gorillas)
+
+    Returns: 0 if the left side scores (right border), 1 if the right side scores (left border), None otherwise
+    """
+    if ball.x >= world.width - ball.size - 10:
+        return 0
+    if ball.x <= ball.size + 10:
+        return 1
+    return None
@@ -0,0 +1,252 @@
+"""
+Local module that defines the NearestSensor and RaySensor classes
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# Import local modules
+from gamecore.spatial import SpatialGrid
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class NearestSensor:
+    """
+    NearestSensor gives each AIBot the relative position of its k nearest obstacles and other bots
+    (and of the player) as a list of inputs of constant size for its neural network.
+    It has 3 attributes: k_obstacles, k_bots, cell_size
+    * k_obstacles: number of nearest obstacles seen by an AIBot
+    * k_bots: number of nearest other AIBots seen by an AIBot
+    * cell_size: width and height of the cells of the grids used to find the nearest bodies
+      (None: sized at every tick to hold about 2 bodies per cell, so the search stays short in crowds)
+
+    The inputs of an AIBot are: x, y, (dx, dy) to the player, then (dx, dy) to its nearest obstacles
+    and to its nearest bots, the nearest first. If there are fewer than k bodies, the missing ones are seen
+    far away (at the width and height of the world), so the size of the inputs never depends on the population.
+    """
+
+    def __init__(self, k_obstacles: int = 3, k_bots: int = 2, cell_size: Optional[float] = None) -> None:
+        """
+        Function to create an instance of NearestSensor class
+        By default:
+        * k_obstacles is 3
+        * k_bots is 2
+        * cell_size is None (sized from the number of bodies)
+        """
+        self.k_obstacles = k_obstacles
+        self.k_bots = k_bots
+        self.cell_size = cell_size
+        self.obstacles_grid = SpatialGrid(cell_size or 200.0)
+        self.bots_grid = SpatialGrid(cell_size or 200.0)
+
+    def num_inputs(self, player: bool = True) -> int:
+        """
+        Function to get the number of inputs of the neural networks (num_inputs of the NEAT config)
+        * param
+        :player :False if the game has no player to see (game 2)
+        """
+        return 2 + 2 * player + 2 * (self.k_obstacles + self.k_bots)
+
+    def sense(self, aibots: list, obstacles: list, player=None, world=None,
+              sensing_aibots: Optional[list] = None) -> Dict[object, List[float]]:
+        """
+        Function to compute the inputs of all the AIBots at once (1 grid of obstacles and 1 grid of bots per tick)
+        * param
+        :aibots :list of the AIBots
+        :obstacles :list of the obstacles
+        :player :the player (None if the game has no player to see)
+        :world :the environment, to place the missing bodies far away
+        :sensing_aibots :AIBots whose inputs are needed (by default all of them)
+
+        Returns: {aibot: list of inputs}
+        """
+        far_x, far_y = (world.width, world.height) if world is not None else (0.0, 0.0)
+        if self.cell_size is None and world is not None:
+            self.obstacles_grid.cell_size = self._auto_cell_size(len(obstacles), far_x * far_y)
+            self.bots_grid.cell_size = self._auto_cell_size(len(aibots), far_x * far_y)
+        self.obstacles_grid.rebuild(obstacles)
+        self.bots_grid.rebuild(aibots)
+
+        inputs: Dict[object, List[float]] = {}
+        for aibot in aibots if sensing_aibots is None else sensing_aibots:
+            x, y = aibot.x, aibot.y
+            input_list: List[float] = [x, y]
+            if player is not None:
+                input_list.extend((player.x - x, player.y - y))
+            self._extend(input_list, self.obstacles_grid.nearest(x, y, self.k_obstacles), self.k_obstacles,
+                         x, y, far_x, far_y)
+            self._extend(input_list, self.bots_grid.nearest(x, y, self.k_bots, exclude=aibot), self.k_bots,
+                         x, y, far_x, far_y)
+            inputs[aibot] = input_list
+        return inputs
+
+    @staticmethod
+    def _auto_cell_size(num_bodies: int, area: float) -> float:
+        """
+        Function to get the size of the cells holding about 2 bodies each if they are spread over the area
+        """
+        return max(10.0, math.sqrt(2 * area / max(1, num_bodies)))
+
+    @staticmethod
+    def _extend(input_list: List[float], bodies: list, k: int, x: float, y: float,
+                far_x: float, far_y: float) -> None:
+        """
+        Function to add the (dx, dy) of the bodies to the inputs and pad them up to k bodies
+        """
+        for body in bodies:
+            input_list.extend((body.x - x, body.y - y))
+        input_list.extend((far_x, far_y) * (k - len(bodies)))
+
+
+class RaySensor:
+    """
+    RaySensor gives each AIBot the distance to the first body (circle) or wall hit by rays cast around it,
+    like a lidar, as a list of inputs of constant size for its neural network.
+    It has 2 attributes: num_rays, ray_range
+    * num_rays: number of rays, evenly spread around the AIBot (the first one goes right)
+    * ray_range: maximum distance seen by a ray (a ray hitting nothing returns it)
+
+    The inputs of an AIBot are: x, y, (dx, dy) to the player, then the distance seen by each ray.
+    The bodies are put in every cell of a uniform grid that their bounding box overlaps, and a ray walks
+    through the cells it crosses (DDA), nearest first: empty cells cost nothing and the walk stops
+    at the first cell containing a hit, at the range of the ray or at the wall.
+    """
+
+    def __init__(self, num_rays: int = 8, ray_range: float = 600.0) -> None:
+        """
+        Function to create an instance of RaySensor class
+        By default:
+        * num_rays is 8
+        * ray_range is 600 world units
+        """
+        self.num_rays = num_rays
+        self.ray_range = ray_range
+        self.directions: List[Tuple[float, float]] = [
+            (math.cos(2 * math.pi * ray / num_rays), math.sin(2 * math.pi * ray / num_rays))
+            for ray in range(num_rays)]
+        self.cell_size: float = 100.0
+        self.cells: Dict[Tuple[int, int], list] = defaultdict(list)
+
+    def num_inputs(self, player: bool = True) -> int:
+        """
+        Function to get the number of inputs of the neural networks (num_inputs of the NEAT config)
+        * param
+        :player :False if the game has no player to see (game 2)
+        """
+        return 2 + 2 * player + self.num_rays
+
+    def rebuild(self, bodies: list) -> None:
+        """
+        Function to put the bodies in every cell overlapped by their bounding box
+        (cells of about twice the size of the biggest body, so a body covers at most 4 cells)
+        """
+        cell_size = self.cell_size = max(50.0, 2 * max((body.size for body in bodies), default=0))
+        cells: Dict[Tuple[int, int], list] = defaultdict(list)
+        for body in bodies:
+            x, y, size = body.x, body.y, body.size
+            for column in range(math.floor((x - size) / cell_size), math.floor((x + size) / cell_size) + 1):
+                for row in range(math.floor((y - size) / cell_size), math.floor((y + size) / cell_size) + 1):
+                    cells[(column, row)].append(body)
+        self.cells = cells
+
+    def cast(self, x: float, y: float, dx: float, dy: float, max_distance: float, exclude=None) -> float:
+        """
+        Function to find the distance to the first body hit by a ray
+        * param
+        :x, y :origin of the ray
+        :dx, dy :direction of the ray (unit vector)
+        :max_distance :length of the ray
+        :exclude :body to ignore (e.g. the body casting the ray)
+
+        Returns: distance to the first body hit (max_distance if none)
+        """
+        cells = self.cells
+        cell_size = self.cell_size
+        column, row = math.floor(x / cell_size), math.floor(y / cell_size)
+        step_column = 1 if dx > 0 else -1
+        step_row = 1 if dy > 0 else -1
+        # distance along the ray to the next vertical / horizontal border of a cell, and between 2 borders
+        next_column_t = ((column + (dx > 0)) * cell_size - x) / dx if dx else math.inf
+        next_row_t = ((row + (dy > 0)) * cell_size - y) / dy if dy else math.inf
+        column_t = cell_size / abs(dx) if dx else math.inf
+        row_t = cell_size / abs(dy) if dy else math.inf
+
+        best = max_distance
+        while True:
+            for body in cells.get((column, row), ()):
+                if body is exclude:
+                    continue
+                # ray-circle intersection: |origin + t * direction - center| = size
+                mx = x - body.x
+                my = y - body.y
+                b = mx * dx + my * dy
+                c = mx * mx + my * my - body.size * body.size
+                if c > 0 and b > 0:
+                    continue  # outside the circle and going away from it
+                discriminant = b * b - c
+                if discriminant < 0:
+                    continue
+                t = max(0.0, -b - math.sqrt(discriminant))
+                if t < best:
+                    best = t
+
+            # a hit inside the current cell is nearer than anything in the next cells
+            exit_t = min(next_column_t, next_row_t)
+            if best <= exit_t:
+                return best
+            if next_column_t < next_row_t:
+                column += step_column
+                next_column_t += column_t
+            else:
+                row += step_row
+                next_row_t += row_t
+
+    def sense(self, aibots: list, obstacles: list, player=None, world=None,
+              sensing_aibots: Optional[list] = None) -> Dict[object, List[float]]:
+        """
+        Function to compute the inputs of all the AIBots at once (1 grid of all the bodies per tick)
+        * param
+        :aibots :list of the AIBots
+        :obstacles :list of the obstacles
+        :player :the player (None if the game has no player to see)
+        :world :the environment, whose borders are walls for the rays
+        :sensing_aibots :AIBots whose inputs are needed (by default all of them)
+
+        Returns: {aibot: list of inputs}
+        """
+        bodies = list(obstacles) + list(aibots)
+        if player is not None:
+            bodies.append(player)
+        self.rebuild(bodies)
+
+        ray_range = self.ray_range
+        inputs: Dict[object, List[float]] = {}
+        for aibot in aibots if sensing_aibots is None else sensing_aibots:
+            x, y = aibot.x, aibot.y
+            input_list: List[float] = [x, y]
+            if player is not None:
+                input_list.extend((player.x - x, player.y - y))
+            for dx, dy in self.directions:
+                max_distance = ray_range
+                if world is not None:
+                    # distance to the wall hit by the ray
+                    if dx > 1e-9:
+                        max_distance = min(max_distance, (world.width - x) / dx)
+                    elif dx < -1e-9:
+                        max_distance = min(max_distance, -x / dx)
+                    if dy > 1e-9:
+                        max_distance = min(max_distance, (world.height - y) / dy)
+                    elif dy < -1e-9:
+                        max_distance = min(max_distance, -y / dy)
+                    max_distance = max(0.0, max_distance)
+                input_list.append(self.cast(x, y, dx, dy, max_distance, exclude=aibot))
+            inputs[aibot] = input_list
+        return inputs
@@ -0,0 +1,118 @@
+"""
+Local module that defines the SoundManager class
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+from typing import Dict, Optional
+
+# Import 3rd party modules
+import pygame
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class SoundManager:
+    """
+    SoundManager plays the sounds of the game on named channels.
+    It has 3 attributes: assets, num_channels, max_voices
+    * assets: AssetManager used to decode the sounds (and keep their decoded samples on disk)
+    * num_channels: number of mixer channels (the named channels are reserved among them)
+    * max_voices: default maximum number of voices of the same sound playing at the same time
+
+    A sound is decoded once by load(); play() on a named channel does nothing if the same sound is
+    already playing on it, so a sound played every frame keeps playing instead of starting new voices.
+    Without audio device (mixer not initialized), nothing is loaded nor played.
+    """
+
+    def __init__(self, assets, num_channels: int = 8, max_voices: int = 2) -> None:
+        """
+        Function to create an instance of SoundManager class
+        By default:
+        * num_channels is 8 (the default of pygame)
+        * max_voices is 2
+        """
+        self.assets = assets
+        self.num_channels = num_channels
+        self.max_voices = max_voices
+        self._sounds: Dict[str, "pygame.mixer.Sound"] = {}
+        self._channels: Dict[str, "pygame.mixer.Channel"] = {}
+        if pygame.mixer.get_init():
+            pygame.mixer.set_num_channels(num_channels)
+
+    def load(self, name: str, path: str) -> Optional["pygame.mixer.Sound"]:
+        """
+        Function to decode a sound in advance and give it a name
+
+        Returns: pygame.mixer.Sound (None without audio device)
+        """
+        if not pygame.mixer.get_init():
+            return None
+        sound = self._sounds.get(name)
+        if sound is None:
+            sound = self._sounds[name] = self.assets.sound(path)
+        return sound
+
+    def channel(self, channel_name: str) -> Optional["pygame.mixer.Channel"]:
+        """
+        Function to get a named channel, reserving a mixer channel for it on first use
+        (reserved channels are never taken by the voices of play_voice())
+        """
+        channel = self._channels.get(channel_name)
+        if channel is None:
+            if len(self._channels) >= self.num_channels:
+                return None
+            channel = self._channels[channel_name] = pygame.mixer.Channel(len(self._channels))
+            pygame.mixer.set_reserved(len(self._channels))
+        return channel
+
+    def play(self, name: str, channel_name: Optional[str] = None, loops: int = 0,
+             restart: bool = False) -> Optional["pygame.mixer.Channel"]:
+        """
+        Function to play a loaded sound on a named channel (by default the channel named like the sound)
+        * param
+        :name :name given to the sound by load()
+        :channel_name :name of the channel
+        :loops :number of repetitions after the first play (-1: forever)
+        :restart :if True, the sound starts again even if it is already playing on the channel
+
+        Returns: the channel (None if the sound is not loaded)
+        """
+        sound = self._sounds.get(name)
+        if sound is None:
+            return None
+        channel = self.channel(channel_name or name)
+        if channel is None:
+            return self.play_voice(name)
+        if restart or not channel.get_busy() or channel.get_sound() is not sound:
+            channel.play(sound, loops)
+        return channel
+
+    def play_voice(self, name: str, max_voices: Optional[int] = None) -> Optional["pygame.mixer.Channel"]:
+        """
+        Function to play a loaded sound on any free channel unless max_voices of it are already playing
+        (e.g. sound effects that can overlap)
+
+        Returns: the channel (None if the sound is not played)
+        """
+        sound = self._sounds.get(name)
+        if sound is None:
+            return None
+        if sound.get_num_channels() >= (max_voices or self.max_voices):
+            return None
+        return sound.play()
+
+    def stop(self, channel_name: Optional[str] = None) -> None:
+        """
+        Function to stop a named channel (or all the sounds)
+        """
+        if not pygame.mixer.get_init():
+            return
+        if channel_name is None:
+            pygame.mixer.stop()
+        elif channel_name in self._channels:
+            self._channels[channel_name].stop()
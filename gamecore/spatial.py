@@ -0,0 +1,141 @@
+"""
+Local module that defines the SpatialGrid class
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import math
+from collections import defaultdict
+from typing import List, Dict, Tuple, Iterable
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class SpatialGrid:
+    """
+    SpatialGrid is a uniform grid that buckets circular bodies (with x, y and size attributes)
+    by the cell of their center.
+    It has 1 attribute: cell_size
+    * cell_size: width and height of a cell in world units
+
+    A query only looks at the cells that overlap the queried area (or the rings of cells around a point
+    for the nearest bodies), so its cost depends on the size of the area and not on the size of the world.
+    """
+
+    def __init__(self, cell_size: float = 100.0) -> None:
+        """
+        Function to create an instance of SpatialGrid class
+        By default:
+        * cell_size is 100 world units
+        """
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], list] = defaultdict(list)
+        self.max_size: float = 0.0  # biggest radius of the bodies, to find the bodies overlapping a cell
+        self.bounds: Tuple[int, int, int, int] = (0, 0, -1, -1)  # first and last occupied column and row
+
+    def rebuild(self, bodies: Iterable) -> None:
+        """
+        Function to put the bodies in the cells of their center (the previous content is removed)
+        """
+        cell_size = self.cell_size
+        cells: Dict[Tuple[int, int], list] = defaultdict(list)
+        max_size = 0.0
+        for body in bodies:
+            cells[(math.floor(body.x / cell_size), math.floor(body.y / cell_size))].append(body)
+            if body.size > max_size:
+                max_size = body.size
+        self.cells = cells
+        self.max_size = max_size
+        if cells:
+            columns = [column for column, _ in cells]
+            rows = [row for _, row in cells]
+            self.bounds = (min(columns), min(rows), max(columns), max(rows))
+        else:
+            self.bounds = (0, 0, -1, -1)
+
+    def query_rect(self, left: float, top: float, right: float, bottom: float) -> list:
+        """
+        Function to find the bodies overlapping a rectangle of the world
+
+        Returns: list of the bodies
+        """
+        cell_size = self.cell_size
+        margin = self.max_size
+        first_column = math.floor((left - margin) / cell_size)
+        last_column = math.floor((right + margin) / cell_size)
+        first_row = math.floor((top - margin) / cell_size)
+        last_row = math.floor((bottom + margin) / cell_size)
+
+        if (last_column - first_column + 1) * (last_row - first_row + 1) > len(self.cells):
+            # the area covers more cells than there are occupied cells: look at the occupied cells only
+            candidate_cells = [bodies for (column, row), bodies in self.cells.items()
+                               if first_column <= column <= last_column and first_row <= row <= last_row]
+        else:
+            cells = self.cells
+            candidate_cells = [cells[(column, row)]
+                               for column in range(first_column, last_column + 1)
+                               for row in range(first_row, last_row + 1)
+                               if (column, row) in cells]
+
+        return [body for bodies in candidate_cells for body in bodies
+                if body.x + body.size >= left and body.x - body.size <= right
+                and body.y + body.size >= top and body.y - body.size <= bottom]
+
+    def cell(self, column: int, row: int) -> List:
+        """
+        Function to get the bodies whose center is in a cell
+
+        Returns: list of the bodies (empty if none)
+        """
+        return self.cells.get((column, row), [])
+
+    def nearest(self, x: float, y: float, k: int, exclude=None) -> list:
+        """
+        Function to find the k bodies whose center is the nearest to a point.
+        The rings of cells around the point are searched until the k-th nearest body found
+        is nearer than any body of the next ring.
+        * param
+        :x, y :the point
+        :k :number of bodies to find
+        :exclude :body to ignore (e.g. the body at the point)
+
+        Returns: list of at most k bodies, the nearest first
+        """
+        if k <= 0 or not self.cells:
+            return []
+        cell_size = self.cell_size
+        cells = self.cells
+        column, row = math.floor(x / cell_size), math.floor(y / cell_size)
+        first_column, first_row, last_column, last_row = self.bounds
+        last_ring = max(column - first_column, last_column - column, row - first_row, last_row - row)
+
+        found = []  # (squared distance, body)
+        ring = 0
+        while ring <= last_ring:
+            if ring == 0:
+                ring_cells = [(column, row)]
+            else:
+                ring_cells = [(column + dc, row + dr) for dc in range(-ring, ring + 1) for dr in (-ring, ring)]
+                ring_cells.extend((column + dc, row + dr) for dc in (-ring, ring) for dr in range(-ring + 1, ring))
+            for cell in ring_cells:
+                if cell in cells:
+                    for body in cells[cell]:
+                        if body is not exclude:
+                            dx = body.x - x
+                            dy = body.y - y
+                            found.append((dx * dx + dy * dy, body))
+
+            # the bodies of the next rings are at least ring * cell_size away from the point
+            if len(found) >= k:
+                found.sort(key=lambda item: item[0])
+                del found[k:]
+                if found[-1][0] <= (ring * cell_size) ** 2:
+                    break
+            ring += 1
+
+        found.sort(key=lambda item: item[0])
+        return [body for _, body in found[:k]]
@@ -0,0 +1,120 @@
+"""
+Local module that defines the SpeedController class
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import time
+from typing import Optional
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class SpeedController:
+    """
+    SpeedController sets how many simulation ticks are run for each rendered frame (fast-forward).
+    It has 4 attributes: ticks_per_frame, auto, target_fps, max_ticks_per_frame
+    * ticks_per_frame: speed-up K; only 1 tick out of K is drawn, the others are simulated without display
+    * auto: if True, ticks_per_frame is tuned after every rendered frame to hold target_fps
+    * target_fps: frame rate held by the auto mode
+    * max_ticks_per_frame: upper limit of ticks_per_frame
+
+    The skipped ticks use the fixed time step of the headless mode,
+    so a speed-up of K simulates K ticks in the time of 1 frame.
+    """
+
+    def __init__(
+        self,
+        ticks_per_frame: int = 1,
+        auto: bool = False,
+        target_fps: float = 30.0,
+        max_ticks_per_frame: int = 1000
+    ) -> None:
+        """
+        Function to create an instance of SpeedController class
+        By default:
+        * ticks_per_frame is 1 (every tick is drawn)
+        * auto is False
+        * target_fps is 30 frames per second
+        * max_ticks_per_frame is 1000
+        """
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.ticks_per_frame = max(1, min(max_ticks_per_frame, ticks_per_frame))
+        self.auto = auto
+        self.target_fps = target_fps
+        self._ticks_to_next_frame: int = 0
+        self._speed: float = float(self.ticks_per_frame)  # smoothed speed-up of the auto mode
+        self._last_frame_time: Optional[float] = None
+
+    def start_generation(self) -> None:
+        """
+        Function to draw the first tick of a generation and restart the frame timing of the auto mode
+        """
+        self._ticks_to_next_frame = 0
+        self._last_frame_time = None
+
+    def render_this_tick(self) -> bool:
+        """
+        Function to call once per tick
+
+        Returns: True if this tick must be drawn
+        """
+        render = self._ticks_to_next_frame <= 0
+        if render:
+            self._ticks_to_next_frame = self.ticks_per_frame
+        self._ticks_to_next_frame -= 1
+        return render
+
+    def frame_rendered(self) -> None:
+        """
+        Function to call after a frame is displayed: in auto mode, the speed-up is scaled
+        by the ratio between the target frame time and the measured frame time
+        """
+        now = time.perf_counter()
+        if self.auto and self._last_frame_time is not None:
+            frame_time_s = max(now - self._last_frame_time, 1e-6)
+            ratio = min(2.0, max(0.5, 1 / (self.target_fps * frame_time_s)))
+            # smooth the changes so that 1 slow frame does not divide the speed-up
+            self._speed = max(1.0, min(float(self.max_ticks_per_frame),
+                                       0.8 * self._speed + 0.2 * self._speed * ratio))
+            self.ticks_per_frame = round(self._speed)
+        self._last_frame_time = now
+
+    def set_ticks_per_frame(self, ticks_per_frame: int) -> None:
+        """
+        Function to set the speed-up manually (it stops the auto mode)
+        """
+        self.auto = False
+        self.ticks_per_frame = max(1, min(self.max_ticks_per_frame, ticks_per_frame))
+        self._speed = float(self.ticks_per_frame)
+        self._ticks_to_next_frame = min(self._ticks_to_next_frame, self.ticks_per_frame - 1)
+
+    def faster(self) -> None:
+        """
+        Function to double the speed-up
+        """
+        self.set_ticks_per_frame(self.ticks_per_frame * 2)
+
+    def slower(self) -> None:
+        """
+        Function to halve the speed-up
+        """
+        self.set_ticks_per_frame(self.ticks_per_frame // 2)
+
+    def toggle_auto(self) -> None:
+        """
+        Function to start or stop the auto mode
+        """
+        self.auto = not self.auto
+        self._speed = float(self.ticks_per_frame)
+        self._last_frame_time = None
+
+    def is_fast_forward(self) -> bool:
+        """
+        Function to check if ticks are skipped or may be skipped (auto mode)
+        """
+        return self.ticks_per_frame > 1 or self.auto
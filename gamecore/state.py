@@ -0,0 +1,103 @@
+"""
+Local module that defines the WorldState class
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import random
+from array import array
+from collections import deque
+from typing import Optional
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class WorldState:
+    """
+    WorldState captures the state of the simulation (the bodies, and the decision scheduler if any)
+    and restores it, e.g. to reset an episode or a kick-off without creating bodies.
+    It has 2 attributes: bodies, scheduler
+    * bodies: list of the bodies (players, AIBots, obstacles) whose state is captured, always in the same order
+    * scheduler: DecisionScheduler whose tick and phases are captured with the bodies by snapshot()
+      (None: not captured)
+
+    2 forms of state:
+    * capture() / restore(): an array of 4 floats per body (x, y, speed, angle), 32 bytes per body,
+      that can be copied, kept in a cache or written to a file (buffer.tobytes()), e.g. the keyframes of a replay;
+    * snapshot() / load(): the complete state kept in memory: every field of STATE_FIELDS that a body has
+      (velocity, boost, last output and decision phase of the AIBots), the tick and the next phase of
+      the scheduler (not its interval: the interval tuned by the adaptive mode is kept), values of the game
+      (timers, scores...) and optionally the state of the random generator. load() updates the attributes
+      of all the bodies in 1 call (dict.update mapped in C), about twice as fast as restore().
+    """
+
+    BODY_FIELDS = ("x", "y", "speed", "angle")
+    STATE_FIELDS = BODY_FIELDS + ("boost", "last_output", "decision_phase")
+    SCHEDULER_FIELDS = ("tick", "_next_phase")
+
+    def __init__(self, bodies: list, scheduler=None) -> None:
+        """
+        Function to create an instance of WorldState class
+        """
+        self.bodies = list(bodies)
+        self.scheduler = scheduler
+        self._attributes = [vars(body) for body in self.bodies]  # updated in place by load()
+
+    def capture(self, buffer: Optional[array] = None) -> array:
+        """
+        Function to copy the position and velocity of the bodies into a buffer (a new one if None)
+
+        Returns: the buffer
+        """
+        values = [value for body in self.bodies for value in (body.x, body.y, body.speed, body.angle)]
+        if buffer is None or len(buffer) != len(values):
+            return array("d", values)
+        buffer[:] = array("d", values)
+        return buffer
+
+    def restore(self, buffer: array) -> None:
+        """
+        Function to set the position and velocity of the bodies from a buffer made by capture()
+        """
+        if len(buffer) != 4 * len(self.bodies):
+            raise ValueError(f"the state has {len(buffer) // 4} bodies instead of {len(self.bodies)}")
+        values = iter(buffer)
+        for body, x, y, speed, angle in zip(self.bodies, values, values, values, values):
+            body.x, body.y, body.speed, body.angle = x, y, speed, angle
+
+    def snapshot(self, values: tuple = (), rng: bool = False) -> tuple:
+        """
+        Function to copy the complete state of the simulation
+        * param
+        :values :values of the game restored with the state (e.g. timers, scores)
+        :rng :if True, the state of the random generator is restored too
+              (not for a generation of NEAT: the reproduction draws from the same generator)
+
+        Returns: (bodies, scheduler, values, random state) to give to load()
+        """
+        bodies = tuple({name: attributes[name] for name in self.STATE_FIELDS if name in attributes}
+                       for attributes in self._attributes)
+        scheduler = None
+        if self.scheduler is not None:
+            scheduler = {name: getattr(self.scheduler, name) for name in self.SCHEDULER_FIELDS}
+        return bodies, scheduler, tuple(values), random.getstate() if rng else None
+
+    def load(self, snapshot: tuple) -> tuple:
+        """
+        Function to set the complete state of the simulation from a snapshot made by snapshot()
+
+        Returns: the values of the game of the snapshot
+        """
+        bodies, scheduler, values, random_state = snapshot
+        if len(bodies) != len(self._attributes):
+            raise ValueError(f"the state has {len(bodies)} bodies instead of {len(self._attributes)}")
+        deque(map(dict.update, self._attributes, bodies), maxlen=0)
+        if scheduler is not None:
+            vars(self.scheduler).update(scheduler)
+        if random_state is not None:
+            random.setstate(random_state)
+        return values
@@ -0,0 +1,195 @@
+"""
+Local module that defines the TextCache and GlyphAtlas classes
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Union
+
+# Import 3rd party modules
+import pygame
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class TextCache:
+    """
+    TextCache is a least recently used (LRU) cache of rendered text surfaces.
+    It has 2 attributes: max_entries, max_bytes
+    * max_entries: maximum number of surfaces kept in the cache
+    * max_bytes: maximum memory used by the pixels of the cached surfaces
+
+    Surfaces are keyed by (text, color, font, antialias), so a HUD label or a dialogue line
+    is only rendered once and then just blitted every frame.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 16 * 2**20) -> None:
+        """
+        Function to create an instance of TextCache class
+        By default:
+        * max_entries is 256
+        * max_bytes is 16 MB
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.used_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self._surfaces: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+        self._atlases: Dict[tuple, GlyphAtlas] = {}
+
+    def render(self, font: pygame.font.Font, text: str, color: Tuple[int, int, int],
+               antialias: bool = True) -> pygame.Surface:
+        """
+        Function to get the surface of a text, rendering it only if it is not cached yet
+
+        Returns: surface of the text
+        """
+        key = (text, tuple(color), font, antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        self.used_bytes += surface_bytes(surface)
+
+        # Evict the least recently used surfaces
+        while len(self._surfaces) > self.max_entries or (
+                self.used_bytes > self.max_bytes and len(self._surfaces) > 1):
+            _, evicted = self._surfaces.popitem(last=False)
+            self.used_bytes -= surface_bytes(evicted)
+        return surface
+
+    def atlas(self, font: pygame.font.Font, color: Tuple[int, int, int],
+              antialias: bool = True) -> "GlyphAtlas":
+        """
+        Function to get the glyph atlas of a font and color (created on first use)
+        """
+        key = (tuple(color), font, antialias)
+        atlas = self._atlases.get(key)
+        if atlas is None:
+            atlas = self._atlases[key] = GlyphAtlas(font, color, antialias=antialias)
+        return atlas
+
+    def clear(self) -> None:
+        """
+        Function to empty the cache
+        """
+        self._surfaces.clear()
+        self._atlases.clear()
+        self.used_bytes = 0
+
+
+class GlyphAtlas:
+    """
+    GlyphAtlas holds 1 pre-rendered surface per character of a font and color.
+    It has 3 attributes: font, color, characters
+    * font: pygame font used to render the glyphs
+    * color: color of the glyphs
+    * characters: characters rendered in advance (digits by default)
+
+    Rapidly changing numbers (timer, score, counters) are composed from the glyphs
+    with a single Surface.blits() call instead of being rendered every frame.
+    """
+
+    def __init__(
+        self,
+        font: pygame.font.Font,
+        color: Tuple[int, int, int],
+        characters: str = "0123456789-+:. ",
+        antialias: bool = True
+    ) -> None:
+        """
+        Function to create an instance of GlyphAtlas class
+        """
+        self.font = font
+        self.color = color
+        self.antialias = antialias
+        self.glyphs: Dict[str, pygame.Surface] = {
+            character: font.render(character, antialias, color) for character in characters}
+        self.height: int = font.get_height()
+
+    def glyph(self, character: str) -> pygame.Surface:
+        """
+        Function to get the surface of a character (rendered on first use if it is not in the atlas)
+        """
+        surface = self.glyphs.get(character)
+        if surface is None:
+            surface = self.glyphs[character] = self.font.render(
+                character, self.antialias, self.color)
+        return surface
+
+    def size(self, text: str) -> Tuple[int, int]:
+        """
+        Function to get the size in pixels of a text composed from the glyphs
+        """
+        return sum(self.glyph(character).get_width() for character in text), self.height
+
+    def draw(self, surface: pygame.Surface, text: str, topleft: Tuple[int, int]) -> pygame.Rect:
+        """
+        Function to draw a text on a surface glyph by glyph
+
+        Returns: rect of the drawn text
+        """
+        x, y = topleft
+        blit_sequence: List[Tuple[pygame.Surface, Tuple[int, int]]] = []
+        for character in text:
+            glyph = self.glyph(character)
+            blit_sequence.append((glyph, (x, y)))
+            x += glyph.get_width()
+        surface.blits(blit_sequence, doreturn=False)
+        return pygame.Rect(topleft[0], y, x - topleft[0], self.height)
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def surface_bytes(surface: pygame.Surface) -> int:
+    """
+    Function to get the memory used by the pixels of a surface
+    """
+    return surface.get_pitch() * surface.get_height()
+
+
+def draw_cached_text(
+    surface: pygame.Surface,
+    cache: TextCache,
+    font: pygame.font.Font,
+    text: str,
+    color: Tuple[int, int, int],
+    xy_pos_center: Tuple[float, float],
+    value: Union[str, int, None] = None
+) -> pygame.Rect:
+    """
+    Function to draw a text centered on a position.
+    The text is taken from the cache; the value (if any) is appended with the glyph atlas
+    so that a label like "Time: " followed by a changing number only costs a few blits.
+
+    Returns: rect of the drawn text
+    """
+    label_surface = cache.render(font, text, color)
+    if value is None:
+        text_rect = label_surface.get_rect(center=xy_pos_center)
+        return surface.blit(label_surface, text_rect)
+
+    value = str(value)
+    atlas = cache.atlas(font, color)
+    value_width, value_height = atlas.size(value)
+    width = label_surface.get_width() + value_width
+    height = max(label_surface.get_height(), value_height)
+    text_rect = pygame.Rect(0, 0, width, height)
+    text_rect.center = (round(xy_pos_center[0]), round(xy_pos_center[1]))
+
+    label_rect = surface.blit(label_surface, text_rect.topleft)
+    value_rect = atlas.draw(surface, value, (label_rect.right, text_rect.top))
+    return label_rect.union(value_rect)
@@ -8,21 +8,97 @@ Game to demonstrate how:
 # =====================================================================
 
 # Import internal modules
+import time
+START_TIME = time.perf_counter()  # to measure the time spent importing and initializing
+import argparse
+import contextlib
+import os
 import random
 import sys
 import math
 from typing import List, Set, Dict, TypedDict, Tuple, Optional
 
 # Import 3rd party modules
-import pygame
+# pygame and neat are slow to import, so they are only imported by the commands that need them
+# (see import_pygame() and import_neat())
+pygame = None
+neat = None
 # from pygame.color import THECOLORS
-import neat
-from pygame.constants import TIMER_RESOLUTION
 
 # Import local modules
 from gamecore.level import Level
 from gamecore.environment import Environment
-from gamecore.player import AIBots, Obstacle, Player, Gorilla
+from gamecore.player import AIBots, AIBotsPool, Obstacle, Player, Gorilla
+from gamecore.state import WorldState
+from gamecore.replay import ReplayPlayer, ReplayRecorder, KEY_LEFT, KEY_RIGHT, KEY_UP, KEY_DOWN, KEY_READ
+from gamecore.profiler import FrameProfiler, SamplingProfiler
+from gamecore.speed import SpeedController
+from gamecore.decision import DecisionScheduler
+from gamecore.rules import steer, move_soccer_aibot, border_goal
+from gamecore.camera import Camera
+from gamecore.spatial import SpatialGrid
+from gamecore.sensors import NearestSensor, RaySensor
+
+
+# =====================================================================
+# Constants and variables
+# =====================================================================
+
+# CONSTANTS
+WINDOW_WIDTH_PX = 1440
+WINDOW_HEIGHT_PX = 900
+CAPTION = "Enter the Pygame"
+PLAYER_SIZE = 50
+AIBOT_SIZE = 50
+GORILLA_SIZE = 50
+OBSTACLE_MIN_SIZE = 20
+OBSTACLE_MAX_SIZE = 50
+GAME_FONT = ("comicsans", 50)  # (system font name, size)
+OVERLAY_FONT = ("monospace", 16)
+GORILLA_SOUNDS_PATH = "gamecore/assets/sounds/gorilla_sounds.mp3"
+GOAL_SIZE_PX = (200, 200)  # size of the gorillas used as goals in game_2
+# Maximum time (ms) to import and initialize each command, from the first line of this file (checked at every launch)
+STARTUP_BUDGET_MS = {"train": 100, "train --watch": 400, "play": 400, "story": 400, "benchmark": 100}
+# Maximum time (ms) to launch each command, interpreter startup included (checked by benchmark.py)
+LAUNCH_BUDGET_MS = {"train": 100, "train --watch": 450, "play": 450, "story": 450, "benchmark": 150}
+
+# Variables
+framerate_limit = 120
+generation = 0
+slide_font_color = (255, 255, 255)
+becode_color = (22, 35, 46)
+headless: bool = False  # if True, the games run without display, user input nor frame rate limit
+max_ticks_per_generation: Optional[int] = None  # if set, a generation stops after this number of ticks
+antialias: bool = False  # if True, the circles are drawn with anti-aliased edges
+trace_memory: bool = False  # if True, report the memory growth of every generation (slows the game down)
+profile_frames: bool = False  # if True, the frame profiler always runs and writes 1 summary per generation
+ticks_per_frame: int = 1  # speed-up when watching the training: only 1 tick out of ticks_per_frame is drawn
+auto_speed: bool = False  # if True, ticks_per_frame is tuned to hold the target frame rate
+use_render_thread: bool = False  # if True, the world is drawn by a render thread while the simulation goes on
+render_thread = None
+assets = None  # AssetManager of the images, sounds and fonts, created by setup_game when the window is shown
+sampling_profiler = None  # SamplingProfiler capturing a flame graph (F9 or SIGUSR1), created by setup_game
+capture_frames: int = 600  # number of frames captured by the sampling profiler
+capture_generations: int = 0  # if > 0, number of generations captured by the sampling profiler instead of frames
+record_format: str = "png"  # format of the recordings (F10): "png" sequence or "raw" video
+frame_recorder = None
+world_size: Optional[Tuple[int, int]] = None  # size of the world (by default, the size of the window)
+gorilla_goals: bool = False  # if True, the goals of game_2 are gorillas (pixel-perfect collisions with the ball)
+sensor_mode: str = "distances"  # inputs of the AIBots: "distances" to every body, "nearest" bodies or "rays"
+k_nearest: Tuple[int, int] = (3, 2)  # number of nearest obstacles and bots seen in "nearest" sensor mode
+num_rays: int = 8  # number of rays cast around each AIBot in "rays" sensor mode
+ray_range: float = 600.0  # length of the rays
+decision_interval: int = 1  # ticks between 2 queries of the neural network of an AIBot (it keeps its last output)
+adaptive_decisions: bool = False  # if True, the decision interval grows when the ticks are slow
+replay_recorder = None  # ReplayRecorder writing every generation to a replay file (--record-replays)
+replay = None  # ReplayPlayer when a replay is played back
+trajectories = None  # TrajectoryWriter writing the state of every AIBot at every tick (--trajectories)
+genome_archive = None  # GenomeArchive storing the fittest genomes of every generation (--archive)
+archive_top_k: int = 5  # number of genomes stored per generation in the archive (0: none)
+archive_seeds: int = 0  # number of past champions of the archive put in the first generation
+random_seed: Optional[int] = None  # seed of the random generator (stored with the runs of the archive)
+matchmaking = None  # MatchmakingEvaluator replacing the shared match of game_2 by rated matches (--matchmaking)
+sensor = None
 
 
 # =====================================================================
@@ -66,6 +142,7 @@ class Client:
         Function to create an instance of Client class
         """
         self.player = player
+        self.keys_mask: int = 0  # keys read at the current tick (KEY_READ, KEY_LEFT, ...), recorded in the replays
 
     def get_user_input(self) -> Tuple[int, int]:
         """
@@ -83,6 +160,44 @@ class Client:
                 if event.key == pygame.K_RETURN:
                     return "change level"
 
+                # Replay: go back or forward 10 seconds with the left and right arrows
+                if replay is not None and event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                    step = 10 * framerate_limit if event.key == pygame.K_RIGHT else -10 * framerate_limit
+                    replay.seek(replay.current_tick + step)
+                    return "change level"
+
+                # Show or hide the frame profiler overlay if you release F3
+                if event.key == pygame.K_F3:
+                    frame_profiler.toggle_overlay()
+
+                # Start or stop a sampling profiler capture if you release F9
+                if event.key == pygame.K_F9:
+                    sampling_profiler.request_toggle()
+
+                # Start or stop recording the frames if you release F10
+                if event.key == pygame.K_F10:
+                    toggle_recording()
+
+                # Fast-forward: double (+) or halve (-) the ticks simulated per frame, A to tune it automatically
+                if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    speed_controller.faster()
+                if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    speed_controller.slower()
+                if event.key == pygame.K_a:
+                    speed_controller.toggle_auto()
+
+                # Camera: Home to see the whole world, F to follow player_1
+                if event.key == pygame.K_HOME:
+                    camera.fit()
+                if event.key == pygame.K_f:
+                    camera.follow = not camera.follow
+
+            # Camera: zoom with the mouse wheel, move the view by dragging with the left button
+            if event.type == pygame.MOUSEWHEEL:
+                camera.zoom_at(1.25 ** event.y, pygame.mouse.get_pos())
+            if event.type == pygame.MOUSEMOTION and event.buttons[0]:
+                camera.pan(-event.rel[0], -event.rel[1])
+
             # Quit the game if you click on the X button at the top of the screen
             if event.type == pygame.QUIT:
                 terminate()
@@ -95,29 +210,51 @@ class Client:
 
             # Resize the display
             if event.type == pygame.VIDEORESIZE:
-                game_window.screen = pygame.display.set_mode(
-                    event.dict['size'], pygame.HWSURFACE | pygame.DOUBLEBUF | pygame.RESIZABLE)
+                # the render thread must not draw on the display surface while it is replaced
+                with render_thread.lock if render_thread is not None else contextlib.nullcontext():
+                    game_window.screen = pygame.display.set_mode(
+                        event.dict['size'], pygame.HWSURFACE | pygame.DOUBLEBUF | pygame.RESIZABLE)
+                scaled_cache.invalidate()  # the backgrounds must be scaled to the new size
                 return event.dict['size']
                 # game_window.screen.blit(pygame.transform.scale(levels_list[current_level_index].bg_surface, event.dict['size']), (0,0))
                 # pygame.display.flip()
 
+        # During a replay, the player gets the recorded keys instead
+        if replay is not None:
+            return
+
         # Check keys continuously pressed (needs to be outside of the for loop otherwise only be executed once per event in the event queue)
         keys = pygame.key.get_pressed()
+        self.keys_mask = KEY_READ
         if keys:
-            # vector = pygame.Vector2(0,0)
             if keys[pygame.K_LEFT]:
-                # vector += pygame.Vector2(-1,2)
-                self.player.angle, self.player.speed = world.add_vectors(
-                    (self.player.angle, self.player.speed), (- 1 * math.pi/2, 2))
+                self.keys_mask |= KEY_LEFT
             elif keys[pygame.K_RIGHT]:
-                self.player.angle, self.player.speed = world.add_vectors(
-                    (self.player.angle, self.player.speed), (math.pi/2, 2))
+                self.keys_mask |= KEY_RIGHT
             if keys[pygame.K_UP]:
-                self.player.angle, self.player.speed = world.add_vectors(
-                    (self.player.angle, self.player.speed), (0, 2))
+                self.keys_mask |= KEY_UP
             elif keys[pygame.K_DOWN]:
-                self.player.angle, self.player.speed = world.add_vectors(
-                    (self.player.angle, self.player.speed), (math.pi, 2))
+                self.keys_mask |= KEY_DOWN
+        self.steer(self.keys_mask)
+
+    def steer(self, keys_mask: int) -> None:
+        """
+        Function to accelerate the player in the directions of the keys pressed (KEY_LEFT, ...) and limit its speed
+        """
+        # vector = pygame.Vector2(0,0)
+        if keys_mask & KEY_LEFT:
+            # vector += pygame.Vector2(-1,2)
+            self.player.angle, self.player.speed = world.add_vectors(
+                (self.player.angle, self.player.speed), (- 1 * math.pi/2, 2))
+        elif keys_mask & KEY_RIGHT:
+            self.player.angle, self.player.speed = world.add_vectors(
+                (self.player.angle, self.player.speed), (math.pi/2, 2))
+        if keys_mask & KEY_UP:
+            self.player.angle, self.player.speed = world.add_vectors(
+                (self.player.angle, self.player.speed), (0, 2))
+        elif keys_mask & KEY_DOWN:
+            self.player.angle, self.player.speed = world.add_vectors(
+                (self.player.angle, self.player.speed), (math.pi, 2))
         # Limits player_1's speed
         if self.player.speed > 20:
             self.player.speed = 20
@@ -142,6 +279,7 @@ class Client:
             if event.type == pygame.VIDEORESIZE:
                 game_window.screen = pygame.display.set_mode(
                     event.dict['size'], pygame.HWSURFACE | pygame.DOUBLEBUF | pygame.RESIZABLE)
+                scaled_cache.invalidate()  # the backgrounds must be scaled to the new size
                 return event.dict['size']
                 # game_window.screen.blit(pygame.transform.scale(levels_list[current_level_index].bg_surface, event.dict['size']), (0,0))
                 # pygame.display.flip()
@@ -160,28 +298,57 @@ def create_levels() -> List:
     Return: list of levels
     """
 
-    # 1. Create Level instances
-    title_slide = Level(
-        "Title", "slide", "gamecore/assets/images/title_slide.png")
-    level_1 = Level("A new dimension")
-
-    # 2. Import the background image
-    # convert() is not necessary but converts the image into a format easier for pygame => faster
-    title_slide.bg_surface = pygame.image.load(
-        title_slide.bg_surface_path).convert()
+    # 1. Create Level instances (each one is added to Level.levels_list)
+    Level("Title", "slide", "gamecore/assets/images/title_slide.png")
+    Level("A new dimension")
 
-    # 3. If necessary, resize the background image
-    title_slide.bg_surface = pygame.transform.scale(
-        title_slide.bg_surface, (game_window.width_px, game_window.height_px))
+    # 2. The background images are loaded by the asset manager the first time a level is shown
+    # (see start_screen), so training never pays for them
 
     return Level.levels_list
 
 
+def import_pygame() -> None:
+    """
+    Function to import pygame and the local modules that draw, only for the commands that show the game.
+    """
+    global pygame, TextCache, draw_cached_text, DirtyRenderer, SpriteCache, RenderThread, take_snapshot
+    global AssetManager, ScaledSurfaceCache, SoundManager
+    import pygame
+    from gamecore.text import TextCache, draw_cached_text
+    from gamecore.render import DirtyRenderer, SpriteCache, RenderThread, take_snapshot
+    from gamecore.assets import AssetManager, ScaledSurfaceCache
+    from gamecore.sound import SoundManager
+
+
+def import_neat() -> None:
+    """
+    Function to import neat, only for the commands that train the AIBots, when the training starts (see run()).
+    """
+    global neat
+    import neat
+
+
 def terminate() -> None:
     """
     Function to quit the game and terminate the script.
     """
-    pygame.quit()
+    if sampling_profiler is not None:
+        sampling_profiler.stop()  # a capture started with F9 or SIGUSR1 is written before quitting
+    if render_thread is not None:
+        render_thread.stop()
+    if frame_recorder is not None:
+        frame_recorder.stop()
+    if replay_recorder is not None:
+        replay_recorder.close()
+    if trajectories is not None:
+        trajectories.close()
+    if genome_archive is not None:
+        genome_archive.close()
+    if matchmaking is not None:
+        matchmaking.close()
+    if pygame is not None:
+        pygame.quit()
     sys.exit()
 
 
@@ -189,20 +356,251 @@ def get_ai_decision():
     pass
 
 
-def draw_text(text: str, color: Tuple[int, int, int], xy_pos_center: Tuple[int, int]):
+def create_network(genome, config):
+    """
+    Function to create the neural network of an AIBot
+    (during a replay, it gives the recorded outputs; with --record-replays, its outputs are recorded)
+    """
+    if replay is not None:
+        return replay.network()
+    network = neat.nn.FeedForwardNetwork.create(genome, config)
+    if replay_recorder is not None:
+        return replay_recorder.network(network)
+    return network
+
+
+def start_replay(game_name: str, genomes_list: list, aibots_list: list, neural_nets_list: list,
+                 values: tuple) -> Tuple[int, tuple]:
+    """
+    Function to start recording the replay of a generation, or to start playing it back
+    from the keyframe of the tick asked (the AIBots dead at the keyframe are removed from the lists)
+    * param
+    :values :values of the game that are kept in the keyframes (time, scores, ...)
+
+    Returns: (number of ticks already simulated, values of the game)
+    """
+    global headless
+    bodies = [player_1] + obstacles_list
+    if replay_recorder is not None:
+        replay_recorder.start(
+            {"game": game_name, "generation": generation, "genome_ids": [genome.key for genome in genomes_list],
+             "world_size": [world.width, world.height], "num_obstacles": len(obstacles_list),
+             "gorilla_goals": gorilla_goals, "sensors": sensor_mode, "k_nearest": list(k_nearest),
+             "rays": num_rays, "ray_range": ray_range, "decision_interval": decision_interval,
+             "adaptive_decisions": adaptive_decisions},
+            aibots_list, bodies, values)
+    if replay is None:
+        return 0, values
+
+    ticks, values, alive = replay.start(aibots_list, bodies)
+    for slot in reversed(range(len(alive))):
+        if not alive[slot]:
+            genomes_list.pop(slot)
+            aibots_list.pop(slot)
+            neural_nets_list.pop(slot)
+    # the ticks before the tick asked are simulated without being drawn
+    headless = ticks + 1 < replay.target_tick
+    return ticks, values
+
+
+def replay_tick(ticks: int, dt_s: float) -> float:
+    """
+    Function to record the keys of the player and the time step of a tick,
+    or to give them back during a replay (with the recorded outputs of the AIBots)
+
+    Returns: time step of the tick
+    """
+    if replay_recorder is not None:
+        replay_recorder.tick(dt_s, client_1.keys_mask)
+        client_1.keys_mask = 0
+    if replay is None:
+        return dt_s
+
+    dt_s, keys_mask = replay.tick(ticks)
+    if keys_mask & KEY_READ:
+        client_1.steer(keys_mask)
+    return dt_s
+
+
+def replay_end_tick(ticks: int, aibots_list: list, values: tuple) -> None:
+    """
+    Function to write the record of a tick (and its keyframe) to the replay,
+    or to start drawing once a replay reaches the tick asked
+    """
+    global headless
+    if replay_recorder is not None:
+        replay_recorder.end_tick(ticks, aibots_list, values)
+    if replay is not None and headless and ticks + 1 >= replay.target_tick:
+        headless = False
+        renderer.invalidate()
+
+
+def apply_replay_settings(header: dict) -> None:
+    """
+    Function to set up the world of a replay as it was recorded: size, obstacles, goals, sensors and decisions
+    (to call before setup_game; the replays recorded without sensors and decisions use the defaults)
+    """
+    global world_size, gorilla_goals, sensor_mode, k_nearest, num_rays, ray_range, decision_interval
+    world_size = tuple(header["world_size"])
+    gorilla_goals = header["gorilla_goals"]
+    sensor_mode = header.get("sensors", sensor_mode)
+    k_nearest = tuple(header.get("k_nearest", k_nearest))
+    num_rays, ray_range = header.get("rays", num_rays), header.get("ray_range", ray_range)
+    # the recorded outputs change at the ticks of the decisions: an adaptive interval depends on the speed
+    # of the recording, so the replay decides at every tick instead, which reads every change at its tick
+    decision_interval = 1 if header.get("adaptive_decisions") else header.get("decision_interval", 1)
+
+
+def play_replay() -> None:
+    """
+    Function to play back the replay of a generation, again from the start when it ends
+    (left and right arrows: go back or forward 10 seconds, return: restart)
+    """
+    global generation
+    game = GAMES[replay.game][0]
+    pygame.display.set_caption(f"{CAPTION} - replay of {replay.game} generation {replay.generation}")
+    while True:
+        if replay.seek_tick is None:
+            replay.seek(0)
+        generation = replay.generation - 1
+        game(replay.genomes(), None)
+
+
+def draw_text(text: str, color: Tuple[int, int, int], xy_pos_center: Tuple[int, int], value=None):
     """
     Function to display text
     * param 
     :text :text to display
     :color :font color
     :xy_pos_center (x,y) coordinates of the center of text rectangle
+    :value :optional number (or short string of digits) displayed after the text
+
+    The text is rendered once and then taken from text_cache;
+    the value changes every frame so it is composed from the pre-rendered glyphs of the font.
+
+    Returns: rect of the displayed text
+    """
+    return draw_cached_text(game_window.screen, text_cache, assets.font(*GAME_FONT),
+                            text, color, xy_pos_center, value)
+
+
+def draw_snapshot(snapshot) -> None:
+    """
+    Function to draw a snapshot of the world (bodies, texts and frame profiler overlay) on the screen
+    """
+    # erase the drawings of the previous frame (the whole screen after a resize)
+    renderer.begin_frame(game_window.screen)
+
+    # Images (e.g. the gorillas used as goals)
+    renderer.extend(game_window.screen.blits(snapshot.images))
+
+    # 1 batched blit of cached circle sprites per layer
+    for coordinates, colors in snapshot.layers:
+        renderer.extend(sprite_cache.draw_arrays(game_window.screen, coordinates, colors))
+
+    for text, color, xy_pos_center, value in snapshot.texts:
+        renderer.add(draw_text(text, color, xy_pos_center, value=value))
+
+    # Frame profiler overlay (toggled with F3)
+    renderer.extend(frame_profiler.draw_overlay(game_window.screen, assets.font(*OVERLAY_FONT)))
+
+
+def render_snapshot(snapshot) -> None:
+    """
+    Function run by the render thread: draws a snapshot and updates the display
+    """
+    draw_snapshot(snapshot)
+    renderer.end_frame()
+    record_frame()
+
+
+def draw_world(layers: list, texts: list, images: list = ()) -> None:
+    """
+    Function to draw the bodies, texts and images of the current tick.
+    With a render thread, a snapshot is handed to it instead: the simulation does not wait for the display.
+    * param
+    :layers :lists of bodies drawn in this order
+    :texts :(text, color, position of the center, value) to draw
+    :images :(surface, position of the top left) to draw below the bodies
+    """
+    # Only the bodies in view are drawn (found with a spatial grid built once per frame for all the layers)
+    if camera.follow:
+        camera.center_on(player_1.x, player_1.y)
+    left, top, right, bottom = camera.visible_rect()
+    view_grid.rebuild([body for bodies in layers for body in bodies])
+    visible = set(map(id, view_grid.query_rect(left, top, right, bottom)))
+    visible_layers = [[body for body in bodies if id(body) in visible] for bodies in layers]
+    if camera.zoom != 1:
+        images = [(scaled_cache.get(image, image, (round(image.get_width() * camera.zoom),
+                                                    round(image.get_height() * camera.zoom))), xy_topleft)
+                  for image, xy_topleft in images]
+    images = [(image, camera.world_to_screen(xy_topleft)) for image, xy_topleft in images]
+
+    snapshot = take_snapshot(visible_layers, texts, images, (left, top), camera.zoom)
+    if render_thread is not None:
+        render_thread.publish(snapshot)
+        frame_profiler.mark("draw")
+        return
+
+    draw_snapshot(snapshot)
+    frame_profiler.mark("draw")
+
+    # Update the screen with the drawings: only the rects that changed are sent to the display
+    renderer.end_frame()
+    # pygame.display.flip() # difference between flip() and update(): flip updates the entire screen; update(rect) you can update portion of the display
+    frame_profiler.mark("display")
+    record_frame()
+    frame_profiler.mark("record")
+
+
+def create_goals() -> None:
+    """
+    Function to create the collision masks of the gorillas used as goals in game_2
+    (the left gorilla is flipped horizontally to face the field)
+    """
+    global mask_cache, goal_left, goal_right
+    from gamecore.collision import MaskCache, SpriteCollider
+    mask_cache = MaskCache(assets)  # images and masks are built once per (image, size, flip)
+    goal_left = SpriteCollider(mask_cache.mask(gorilla.image_path, GOAL_SIZE_PX, flip_x=True), (0, 0))
+    goal_right = SpriteCollider(mask_cache.mask(gorilla.image_path, GOAL_SIZE_PX), (0, 0))
+    place_goals()
+
 
+def place_goals() -> None:
     """
-    text_surface = game_font.render(
-        text, True, color)  # text, True for anti-aliased text, color in rgb
-    # put the text in a rect to make it easier to display
-    text_rect = text_surface.get_rect(center=xy_pos_center)
-    game_window.screen.blit(text_surface, text_rect)
+    Function to place the goals at the left and right of the world and vertically centered
+    """
+    goal_left.move_to((0, world.height/2 - GOAL_SIZE_PX[1]/2))
+    goal_right.move_to((world.width - GOAL_SIZE_PX[0], world.height/2 - GOAL_SIZE_PX[1]/2))
+
+
+def record_frame() -> None:
+    """
+    Function to hand the displayed frame to the frame recorder (if recording)
+    """
+    recorder = frame_recorder  # F10 may stop the recording from the game thread meanwhile
+    if recorder is not None:
+        recorder.capture(game_window.screen)
+
+
+def toggle_recording() -> None:
+    """
+    Function to start or stop recording the frames (F10)
+    """
+    global frame_recorder
+    if frame_recorder is None:
+        from gamecore.recorder import FrameRecorder
+        # the slots of the recorder must hold a frame of the biggest window
+        width_px, height_px = max([(game_window.width_px, game_window.height_px)]
+                                  + pygame.display.get_desktop_sizes(), key=lambda size: size[0] * size[1])
+        frame_recorder = FrameRecorder(video_format=record_format, max_frame_bytes=width_px * height_px * 4,
+                                       framerate=framerate_limit)
+        frame_recorder.start()
+    else:
+        recorder, frame_recorder = frame_recorder, None
+        # the render thread may be capturing a frame: the recorder is stopped once it is done
+        with render_thread.lock if render_thread is not None else contextlib.nullcontext():
+            recorder.stop()
 
 
 def start_screen() -> None:
@@ -216,6 +614,19 @@ def start_screen() -> None:
     current_story_event = -1  # title slide just before gorilla speaks
     transition_color = list(becode_color) # to turn the screen whiter every second
 
+    # Load the story assets on first use (training never needs them)
+    # convert() is not necessary but converts the image into a format easier for pygame => faster
+    # alpha otherwise pygame paints black where the image is empty/transparent
+    title_slide = levels_list[current_level_index]
+    scaled_cache.prewarm(title_slide.bg_surface_path, assets.image(title_slide.bg_surface_path),
+                         [(game_window.width_px, game_window.height_px)])
+    if gorilla.image is None:
+        gorilla.image = assets.image(gorilla.image_path, alpha=True)
+        gorilla.image_flip = pygame.transform.flip(gorilla.image, True, False)  # flip the gorilla horizontally
+    sound_manager.load("gorilla", GORILLA_SOUNDS_PATH)  # decoded once, before the story starts
+    # Decode the backgrounds of the next levels in the background while the story is told
+    assets.preload(level.bg_surface_path for level in levels_list[current_level_index + 1:])
+
     while start_screen:
         # Get the delta t for one frame (this changes depending on system load).
         dt_s = float(main_clock.tick(framerate_limit) * 1e-3)
@@ -226,8 +637,9 @@ def start_screen() -> None:
         # If user_input is a tuple, the user changed the screen size
         if isinstance(user_input, tuple):
             game_window.width_px, game_window.height_px = user_input
-        game_window.screen.blit(pygame.transform.scale(
-            levels_list[current_level_index].bg_surface, (game_window.width_px, game_window.height_px)), (0, 0))
+        current_level = levels_list[current_level_index]
+        game_window.screen.blit(scaled_cache.get(
+            current_level.bg_surface_path, assets.image(current_level.bg_surface_path), (game_window.width_px, game_window.height_px)), (0, 0))
 
         # If user_input is True, the user pressed a key to go forward in the story
         if user_input == True:
@@ -248,7 +660,7 @@ def start_screen() -> None:
             game_window.screen.fill(becode_color)
             draw_text(gorilla.dialogues[current_story_event], slide_font_color, (
                 game_window.width_px/2, game_window.height_px/2))
-            gorilla.sounds.play()
+            sound_manager.play("gorilla")  # only starts if the gorilla is not already speaking
 
         # 2. Gorilla appears from the right of the screen
         elif current_story_event == 3:
@@ -257,7 +669,7 @@ def start_screen() -> None:
             gorilla.move()
             game_window.screen.blit(
                 gorilla.image, (gorilla.x - gorilla.image.get_width(), gorilla.y - gorilla.image.get_height() - 100))
-            gorilla.sounds.play()
+            sound_manager.play("gorilla")  # only starts if the gorilla is not already speaking
 
         # 3. Gorilla speaks
         elif current_story_event in [4, 5, 6, 7]:
@@ -267,7 +679,7 @@ def start_screen() -> None:
                 game_window.width_px/2, game_window.height_px/2))
             game_window.screen.blit(
                 gorilla.image, (gorilla.x - gorilla.image.get_width(), gorilla.y - gorilla.image.get_height() - 100))
-            gorilla.sounds.play()
+            sound_manager.play("gorilla")  # only starts if the gorilla is not already speaking
 
         # 4. Gorilla turns its back and speaks
         elif current_story_event in [8, 9]:
@@ -277,7 +689,7 @@ def start_screen() -> None:
                 game_window.width_px/2, game_window.height_px/2))
             game_window.screen.blit(gorilla.image_flip, (
                 gorilla.x - gorilla.image.get_width(), gorilla.y - gorilla.image.get_height() - 100))
-            gorilla.sounds.play()
+            sound_manager.play("gorilla")  # only starts if the gorilla is not already speaking
 
         # 5. Gorilla faces towards left again and speaks
         elif current_story_event in [10, 11, 12, 13]:
@@ -287,7 +699,7 @@ def start_screen() -> None:
                 game_window.width_px/2, game_window.height_px/2))
             game_window.screen.blit(
                 gorilla.image, (gorilla.x - gorilla.image.get_width(), gorilla.y - gorilla.image.get_height() - 100))
-            gorilla.sounds.play()
+            sound_manager.play("gorilla")  # only starts if the gorilla is not already speaking
 
         # 6. Gorilla turn its back and leaves the screen from the right
         elif current_story_event == 13:
@@ -295,7 +707,7 @@ def start_screen() -> None:
             gorilla.move()
             game_window.screen.blit(gorilla.image_flip, (
                 gorilla.x - gorilla.image.get_width(), gorilla.y - gorilla.image.get_height() - 100))
-            gorilla.sounds.play()
+            sound_manager.play("gorilla")  # only starts if the gorilla is not already speaking
 
         # Transition before quitting the start screen loop
         elif current_story_event == 14:
@@ -311,11 +723,12 @@ def start_screen() -> None:
         # Quit the start screen loop
         elif current_story_event == 15:
             # stop gorilla sounds
-            gorilla.sounds.stop()
+            sound_manager.stop("gorilla")
             start_screen = False
 
         # Update the screen with the drawings
         pygame.display.update()
+        record_frame()
 
         # Time
         time_s += dt_s  # Measure time spent
@@ -337,36 +750,58 @@ def game_1(genomes, config) -> None:
     game_running: bool = True  # Game loop
     time_s: float = 0.0
     # current_level_index = 1 # level 1
-    player_1.x, player_1.y = (100, world.height/2)  # Restart player position
+    arena_state.load(initial_arena)  # player, obstacles and ticks of the decision scheduler back to the start
 
     # Create empty lists
     genomes_list: list = []
     aibots_list: List[AIBots] = []
     neural_nets_list: list = []
+    aibots_pool.release_all()  # the AIBots of the previous generation are reused
 
     for genome_id, genome in genomes:
         genome.fitness = 0  # AIBot starts the game with fitness score at 0
-        net = neat.nn.FeedForwardNetwork.create(genome, config)
+        net = create_network(genome, config)
         neural_nets_list.append(net)
         # create an aibot with specific size and starting at random y position within boundaries included
         aibot_size = 100
         # aibot_y = random.uniform(aibot_size, world.height - aibot_size)
         aibot_y = world.height/2
         aibots_list.append(
-            AIBots((world.width - 100, aibot_y), size=aibot_size, mass=50))
+            aibots_pool.acquire((world.width - 100, aibot_y), size=aibot_size, mass=50))
         genomes_list.append(genome)
 
     # Instantiate aibots
     # aibot_1 = AIBots((world.width - 100, world.height/2), size=50, mass=1)
 
+    ticks: int = 0  # number of simulation steps of this generation
+    if not headless:
+        renderer.invalidate()  # repaint the whole screen at the first frame
+    speed_controller.start_generation()
+    ticks, (time_s,) = start_replay("game_1", genomes_list, aibots_list, neural_nets_list, (time_s,))
+
     # Enter game loop
     while game_running and len(aibots_list):
 
-        # Get the delta t for one frame (this changes depending on system load).
-        dt_s = float(main_clock.tick(framerate_limit) * 1e-3)
+        frame_profiler.start_frame()
+        ticks += 1
 
-        # Get user input
-        user_input = client_1.get_user_input()
+        # When watching at a speed-up of K (fast-forward), only 1 tick out of K is drawn
+        draw_frame: bool = not headless and speed_controller.render_this_tick()
+
+        if not draw_frame:
+            # Fixed time step: nobody is watching this tick so the simulation does not wait for the clock
+            dt_s = 1 / framerate_limit
+            user_input = None
+        else:
+            # Get the delta t for one frame (this changes depending on system load).
+            dt_s = float(main_clock.tick(framerate_limit) * 1e-3)
+            if speed_controller.is_fast_forward():
+                dt_s = 1 / framerate_limit  # the frame lasts K ticks, each of them advances the fixed time step
+            frame_profiler.mark("wait")
+
+            # Get user input
+            user_input = client_1.get_user_input()
+            frame_profiler.mark("input")
 
         # Go to next generation if player press return button
         if isinstance(user_input, str):
@@ -380,11 +815,19 @@ def game_1(genomes, config) -> None:
         # if user_input is a tuple, it means the user changed the screen size
         if isinstance(user_input, tuple):
             game_window.width_px, game_window.height_px = user_input
-            world.width, world.height = user_input  # update the environment as well
-        game_window.screen.fill(world.color)  # fill the screen with white
+            camera.resize(user_input)  # the world keeps its size: only the view changes
+            renderer.invalidate()
         # game_window.screen.blit(pygame.transform.scale(levels_list[current_level_index].bg_surface, (game_window.width_px,game_window.height_px)), (0,0))
         # game_window.screen.blit(levels_list[current_level_index].bg_surface, (0,0))
 
+        # Inputs of all the AIBots deciding at this tick at once: grid queries instead of 1 distance per body
+        dt_s = replay_tick(ticks, dt_s)
+        decisions.start_tick()
+        if sensor is not None:
+            sensor_inputs = sensor.sense(aibots_list, obstacles_list, client_1.player, world,
+                                         [aibot for aibot in aibots_list if decisions.decide(aibot)])
+            frame_profiler.mark("sensors")
+
         # Reward each AIBot a fitness of 0.1 for each frame it stays alive
         for i, aibot in enumerate(aibots_list):
             genomes_list[i].fitness += 0.1
@@ -411,33 +854,36 @@ def game_1(genomes, config) -> None:
             # # print(len(input_list)) # should be 4 + (2*99) = 200
             # output: list = neural_nets_list[i].activate(input_list)
 
-            # As input: its location and its distance compared to player and obstacles
-            distances_to_obstacles = []
-            for obstacle in obstacles_list:
-                distances_to_obstacles.extend([abs(aibot.x - obstacle.x), abs(aibot.y - obstacle.y)])
-            
-            input_list: list = [aibot.x,
-                aibot.y,
-                abs(aibot.x - client_1.player.x),
-                abs(aibot.y - client_1.player.y)
-                ]
-            input_list.extend(distances_to_obstacles)
-            # print(len(input_list)) # should be 4 + (2*30)
-            output: list = neural_nets_list[i].activate(input_list)
-
-            # if output[0] > 0.5: go left
-            if output[0] > 0.5:
-                aibot.angle, aibot.speed = world.add_vectors(
-                    (aibot.angle, aibot.speed), (- 1 * math.pi/2, 2))
-            if output[1] > 0.5:
-                aibot.angle, aibot.speed = world.add_vectors(
-                    (aibot.angle, aibot.speed), (math.pi/2, 2))
-            if output[2] > 0.5:
-                aibot.angle, aibot.speed = world.add_vectors(
-                    (aibot.angle, aibot.speed), (0, 2))
-            if output[3] > 0.5:
-                aibot.angle, aibot.speed = world.add_vectors(
-                    (aibot.angle, aibot.speed), (math.pi, 2))
+            # Query the neural network every decision interval only
+            decided: bool = decisions.decide(aibot)
+            if decided:
+                if sensor is not None:
+                    # As input: its location, the relative position of the player and what the sensors see
+                    input_list: list = sensor_inputs[aibot]
+                else:
+                    # As input: its location and its distance compared to player and obstacles
+                    distances_to_obstacles = []
+                    for obstacle in obstacles_list:
+                        distances_to_obstacles.extend([abs(aibot.x - obstacle.x), abs(aibot.y - obstacle.y)])
+
+                    input_list: list = [aibot.x,
+                        aibot.y,
+                        abs(aibot.x - client_1.player.x),
+                        abs(aibot.y - client_1.player.y)
+                        ]
+                    input_list.extend(distances_to_obstacles)
+                    # print(len(input_list)) # should be 4 + (2*30)
+                frame_profiler.mark("sensors")
+                aibot.last_output = neural_nets_list[i].activate(input_list)
+                frame_profiler.mark("activate")
+
+            # Between 2 decisions, the AIBot keeps steering with its last output
+            steer(world, aibot, aibot.last_output)
+
+            # Row of the trajectory dataset (--trajectories)
+            if trajectories is not None:
+                trajectories.record(generation, ticks, genomes_list[i].key, aibot, input_list if decided else None,
+                                    aibot.last_output, genomes_list[i].fitness)
 
             # Limits aibot's speed
             if aibot.speed > 20:
@@ -462,7 +908,8 @@ def game_1(genomes, config) -> None:
                     genomes_list.pop(aibots_list.index(aibot))
                     aibots_list.pop(aibots_list.index(aibot))
                     break
-            
+            frame_profiler.mark("physics")
+
             # for other_aibot in aibots_list[i+1:len(aibots_list) - 1]:
             #     collide_otherbot: bool = world.collide(aibot, other_aibot, True)
             #     if collide_otherbot:
@@ -488,43 +935,50 @@ def game_1(genomes, config) -> None:
             # Limits obstacle's speed
             if obstacle.speed > 20:
                 obstacle.speed = 20
-
-            
-        # Draw Obstacles
-        for obstacle in obstacles_list:
-            pygame.draw.circle(game_window.screen, obstacle.color,
-                               (obstacle.x, obstacle.y), obstacle.size)
-
-        # Draw Players
-        pygame.draw.circle(game_window.screen, player_1.color,
-                           (player_1.x, player_1.y), player_1.size)
-
-        # Draw AIBots
-        for aibot in aibots_list:
-            pygame.draw.circle(game_window.screen, aibot.color,
-                               (aibot.x, aibot.y), aibot.size)
-
-        # Draw text
-        # Time
-        draw_text(f"Time: {int(time_s)}", becode_color,
-                  (game_window.width_px - 100, 50))
-
-        # current generations
-        draw_text(f"Generation: {generation}",
-                  becode_color, (game_window.width_px/2, 50))
-
-        # Number of AIBots alive
-        draw_text(f"Alive: {len(aibots_list)}",
-                  becode_color, (game_window.width_px/2, 100))
-
-        # Update the screen with the drawings
-        pygame.display.update()
-        # pygame.display.flip() # difference between flip() and update(): flip updates the entire screen; update(rect) you can update portion of the display
+        frame_profiler.mark("physics")
+        decisions.end_tick()
+
+        if draw_frame:
+            # Layers of bodies: Obstacles, Players, AIBots
+            layers = [obstacles_list, [player_1], aibots_list]
+
+            # Texts: (text, color, position of the center, value)
+            texts = [
+                ("Time: ", becode_color, (game_window.width_px - 100, 50), int(time_s)),  # Time
+                ("Generation: ", becode_color, (game_window.width_px/2, 50), generation),  # current generations
+                ("Alive: ", becode_color, (game_window.width_px/2, 100), len(aibots_list)),  # Number of AIBots alive
+            ]
+
+            # Speed-up of the fast-forward (changed with + and -)
+            if speed_controller.is_fast_forward():
+                texts.append(("Speed (auto): x" if speed_controller.auto else "Speed: x",
+                              becode_color, (150, game_window.height_px - 50), speed_controller.ticks_per_frame))
+            # Decision interval of the AIBots (ticks between 2 queries of their neural network)
+            if decisions.interval > 1:
+                texts.append(("Decisions every (ticks): ", becode_color, (150, game_window.height_px - 100),
+                              decisions.interval))
+
+            # Draw the bodies and texts (or hand them to the render thread)
+            draw_world(layers, texts)
+            speed_controller.frame_rendered()
 
         # Time
         time_s += dt_s  # Measure time spent
-        # Limit the frame rate to max the framerate_limit
-        main_clock.tick(framerate_limit)
+        if draw_frame:
+            # Limit the frame rate to max the framerate_limit
+            main_clock.tick(framerate_limit)
+            frame_profiler.mark("wait")
+        frame_profiler.end_frame()
+        sampling_profiler.tick(generation, len(genomes))
+
+        replay_end_tick(ticks, aibots_list, (time_s,))
+        # Stop the generation if it used up its tick budget
+        if max_ticks_per_generation and ticks >= max_ticks_per_generation:
+            break
+
+    # Dump the frame timings of this generation
+    frame_profiler.end_generation(generation, len(genomes))
+    sampling_profiler.end_generation()
 
 def game_2(genomes, config) -> None:
     """
@@ -544,21 +998,29 @@ def game_2(genomes, config) -> None:
     score_right: int = 0
     score_left_bool: bool = False
     score_right_bool: bool = False
-    
-    # Set obstacle (= ball in this game) at the center
+    arena_state.load(initial_arena)  # player, obstacles and ticks of the decision scheduler back to the start
+
+    # Set obstacle (= ball in this game) at rest at the center
     for obstacle in obstacles_list:
         obstacle.x = world.width/2
         obstacle.y = world.height/2
+        obstacle.angle = 0
+        obstacle.speed = 0
+
+    # Set the gorillas used as goals at the left and right of the screen
+    if gorilla_goals:
+        place_goals()
 
     # Create empty lists
     genomes_list: list = []
     aibots_list: List[AIBots] = []
     neural_nets_list: list = []
+    aibots_pool.release_all()  # the AIBots of the previous generation are reused
 
     for genome_id, genome in genomes:
         print(genome_id)
         genome.fitness = 0  # AIBot starts the game with fitness score at 0
-        net = neat.nn.FeedForwardNetwork.create(genome, config)
+        net = create_network(genome, config)
         neural_nets_list.append(net)
         # create an aibot with specific size and starting at random y position within boundaries included
         aibot_size = 50
@@ -566,17 +1028,43 @@ def game_2(genomes, config) -> None:
         # aibot_y = random.uniform(aibot_size, world.height - aibot_size)
         aibot_y = world.height/2
         aibots_list.append(
-            AIBots((aibot_x, aibot_y), size=aibot_size, mass=50, color=(255*(genome_id%2), 0, 0))) 
+            aibots_pool.acquire((aibot_x, aibot_y), size=aibot_size, mass=50, color=(255*(genome_id%2), 0, 0)))
         genomes_list.append(genome)
 
+    # Kick-off: the ball, the AIBots (with their outputs) and the decision scheduler go back to this state after each goal
+    kickoff_state = WorldState(obstacles_list + aibots_list, decisions)
+    kickoff = kickoff_state.snapshot()
+
+    ticks: int = 0  # number of simulation steps of this generation
+    if not headless:
+        renderer.invalidate()  # repaint the whole screen at the first frame
+    speed_controller.start_generation()
+    ticks, (time_s, timer, score_left, score_right) = start_replay(
+        "game_2", genomes_list, aibots_list, neural_nets_list, (time_s, timer, score_left, score_right))
+
     # Enter game loop
     while game_running and timer > 0:
 
-        # Get the delta t for one frame (this changes depending on system load).
-        dt_s = float(main_clock.tick(framerate_limit) * 1e-3)
+        frame_profiler.start_frame()
+        ticks += 1
 
-        # Get user input
-        user_input = client_1.get_user_input()
+        # When watching at a speed-up of K (fast-forward), only 1 tick out of K is drawn
+        draw_frame: bool = not headless and speed_controller.render_this_tick()
+
+        if not draw_frame:
+            # Fixed time step: nobody is watching this tick so the simulation does not wait for the clock
+            dt_s = 1 / framerate_limit
+            user_input = None
+        else:
+            # Get the delta t for one frame (this changes depending on system load).
+            dt_s = float(main_clock.tick(framerate_limit) * 1e-3)
+            if speed_controller.is_fast_forward():
+                dt_s = 1 / framerate_limit  # the frame lasts K ticks, each of them advances the fixed time step
+            frame_profiler.mark("wait")
+
+            # Get user input
+            user_input = client_1.get_user_input()
+            frame_profiler.mark("input")
 
         # Display background
         # Display level 1 background surface
@@ -585,8 +1073,8 @@ def game_2(genomes, config) -> None:
         # if user_input is a tuple, it means the user changed the screen size
         if isinstance(user_input, tuple):
             game_window.width_px, game_window.height_px = user_input
-            world.width, world.height = user_input  # update the environment as well
-        game_window.screen.fill(world.color)  # fill the screen with white
+            camera.resize(user_input)  # the world keeps its size: only the view changes
+            renderer.invalidate()
         # game_window.screen.blit(pygame.transform.scale(levels_list[current_level_index].bg_surface, (game_window.width_px,game_window.height_px)), (0,0))
         # game_window.screen.blit(levels_list[current_level_index].bg_surface, (0,0))
 
@@ -595,6 +1083,14 @@ def game_2(genomes, config) -> None:
             # game_running = False
             break
         
+        # Inputs of all the AIBots deciding at this tick at once: game 2 has no player to see
+        dt_s = replay_tick(ticks, dt_s)
+        decisions.start_tick()
+        if sensor is not None:
+            sensor_inputs = sensor.sense(aibots_list, obstacles_list, None, world,
+                                         [aibot for aibot in aibots_list if decisions.decide(aibot)])
+            frame_profiler.mark("sensors")
+
         for i, aibot in enumerate(aibots_list):
             # Reward each AIBot a fitness of 0.1 for each frame it stays alive
             # genomes_list[i].fitness += 0.1
@@ -604,104 +1100,57 @@ def game_2(genomes, config) -> None:
         # Use a tanh activation function to have the output results between -1 and 1
             # As input: its location and its distance compared to other bots
             # input_list: list = [gorilla_left.x, gorilla_left.y, gorilla_right.x, gorilla_right.y]
-            input_list: list = []
-            distance_between_bots = []
-            for j, other_aibot in enumerate(aibots_list):
-                if i != j:
-                    distance_between_bots.extend([abs(aibot.x - other_aibot.x), abs(aibot.y - other_aibot.y)])
-            
-            input_list.extend(distance_between_bots)
-
-            # Add input: its distance compared to obstacles
-            distances_to_obstacles = []
-            distances_obst_goal = []
-            for obstacle in obstacles_list:
-                distances_to_obstacles.extend([abs(aibot.x - obstacle.x), abs(aibot.y - obstacle.y)])
-                distances_obst_goal.extend([obstacle.x, obstacle.y])
-            input_list.extend(distances_to_obstacles)
-            
-            output: list = neural_nets_list[i].activate(input_list)
-
-            # if output[0] > 0.5: go left
-            if output[0] > 0.5:
-                aibot.angle, aibot.speed = world.add_vectors(
-                    (aibot.angle, aibot.speed), (- 1 * math.pi/2, 2))
-            if output[1] > 0.5:
-                aibot.angle, aibot.speed = world.add_vectors(
-                    (aibot.angle, aibot.speed), (math.pi/2, 2))
-            if output[2] > 0.5:
-                aibot.angle, aibot.speed = world.add_vectors(
-                    (aibot.angle, aibot.speed), (0, 2))
-            if output[3] > 0.5:
-                aibot.angle, aibot.speed = world.add_vectors(
-                    (aibot.angle, aibot.speed), (math.pi, 2))
-
-            aibot.move()
-            world.add_air_resistance(aibot)
-            world.attraction(player_1, aibot)
-            world.bounce(aibot)
-            # bounce: bool = world.bounce(aibot)
-            # If hits a border, punish the aibot to prevent him from just staying at the border
-            # if bounce:
-            #     genomes_list[i].fitness -= 3
-            for j, other_aibot in enumerate(aibots_list):
-                if i != j:
-                    world.collide(aibot, other_aibot, True)
-                    # if collide_otherbot:
-                    #     genomes_list[aibots_list.index(aibot)].fitness -= 1
-                    #     # genomes_list[aibots_list.index(other_aibot)].fitness -= 1
-            
-            # Limits aibot's speed
-            if aibot.speed > 20:
-                aibot.speed = 20
-
-            for obstacle in obstacles_list:
-                obstacle.move()
-                world.add_air_resistance(obstacle)
-                world.bounce(obstacle)
-                collide_obstacle_aibot: bool = world.collide(obstacle, aibot, True)
-                # If collision, reward the aibot
-                if collide_obstacle_aibot:
-                    genomes_list[aibots_list.index(aibot)].fitness += 2
-                
+            # Query the neural network every decision interval only
+            decided: bool = decisions.decide(aibot)
+            if decided:
+                if sensor is not None:
+                    # As input: its location and what the sensors see of the balls and bots
+                    input_list: list = sensor_inputs[aibot]
+                else:
+                    input_list: list = []
+                    distance_between_bots = []
+                    for j, other_aibot in enumerate(aibots_list):
+                        if i != j:
+                            distance_between_bots.extend([abs(aibot.x - other_aibot.x), abs(aibot.y - other_aibot.y)])
+
+                    input_list.extend(distance_between_bots)
+
+                    # Add input: its distance compared to obstacles
+                    distances_to_obstacles = []
+                    for obstacle in obstacles_list:
+                        distances_to_obstacles.extend([abs(aibot.x - obstacle.x), abs(aibot.y - obstacle.y)])
+                    input_list.extend(distances_to_obstacles)
+                frame_profiler.mark("sensors")
+                aibot.last_output = neural_nets_list[i].activate(input_list)
+                frame_profiler.mark("activate")
+
+            # Between 2 decisions, the AIBot keeps steering with its last output
+            steer(world, aibot, aibot.last_output)
+
+            # Row of the trajectory dataset (--trajectories)
+            if trajectories is not None:
+                trajectories.record(generation, ticks, genomes_list[i].key, aibot, input_list if decided else None,
+                                    aibot.last_output, genomes_list[i].fitness)
+
+            # Move the AIBot, then the balls (same rules as the matches of --matchmaking)
+            # If the AIBot touches a ball, reward it
+            genomes_list[i].fitness += 2 * move_soccer_aibot(world, player_1, i, aibots_list, obstacles_list)
+
+            obstacle = obstacles_list[-1]  # the ball
+            if gorilla_goals:
                 # Check if obstacle collides with gorilla_right or gorilla_left
-                # distance_gorilla_right = (round(obstacle.x - gorilla_right.x), round(obstacle.y - gorilla_right.y))
-                # distance_gorilla_left = (round(obstacle.x - gorilla_left.x), round(obstacle.y - gorilla_left.y))
-                # obstacle_rect = pygame.draw.circle(game_window.screen, obstacle.color,
-                # (obstacle.x, obstacle.y), obstacle.size)
-                # obstacle_rect = pygame.mask.Mask(obstacle_rect.size, True)
-                # if gorilla_right.image_mask.overlap(obstacle_rect, distance_gorilla_right) and (i+1)%2 == 0: # and if aibot must shoot at gorilla_right
-                #     genomes_list[aibots_list.index(aibot)].fitness += 5
-                #     score_left_bool = True # left team scores a goal
-                #     print("yes")
-                # elif gorilla_right.image_mask.overlap(obstacle_rect, distance_gorilla_right) and (i+1)%2 != 0: # and if aibot must shoot at gorilla_left
-                #     genomes_list[aibots_list.index(aibot)].fitness -= 5 # punish as it shoots at wrong gorilla
-                #     score_left_bool = True # left team scores a goal
-                # if gorilla_left.image_mask.overlap(obstacle_rect, distance_gorilla_left) and (i+1)%2 != 0: # and if aibot must shoot to gorilla_left
-                #     genomes_list[aibots_list.index(aibot)].fitness += 5
-                #     score_right_bool: True # right team scores a goal
-                # elif gorilla_left.image_mask.overlap(obstacle_rect, distance_gorilla_left) and (i+1)%2 == 0: # and if aibot must shoot to gorilla_left
-                #     genomes_list[aibots_list.index(aibot)].fitness -= 5 # punish as it shoots at wrong gorilla
-                #     score_right_bool: True # right team scores a goal
-
-                # if gorilla_right.image_mask.overlap(obstacle_rect, distance_gorilla_right):
-                #     score_left_bool = True # left team scores a goal
-                # if gorilla_right.image_mask.overlap(obstacle_rect, distance_gorilla_right):
-                #     score_left_bool = True # left team scores a goal
-                # if gorilla_left.image_mask.overlap(obstacle_rect, distance_gorilla_left):
-                #     score_right_bool = True # right team scores a goal
-                # if gorilla_left.image_mask.overlap(obstacle_rect, distance_gorilla_left):
-                #     score_right_bool = True # right team scores a goal
-
-                # Limits obstacle's speed
-                if obstacle.speed > 20:
-                    obstacle.speed = 20
-            
-
-            if obstacle.x >= world.width - obstacle.size - 10:
-                score_left_bool = True # left team scores a goal
-            if obstacle.x <= obstacle.size + 10:
-                score_right_bool = True # right team scores a goal
+                # (bounding circles and rects first: the masks are only compared when the ball is close)
+                if goal_right.collide_circle(obstacle.x, obstacle.y, obstacle.size, mask_cache):
+                    score_left_bool = True # left team scores a goal
+                if goal_left.collide_circle(obstacle.x, obstacle.y, obstacle.size, mask_cache):
+                    score_right_bool = True # right team scores a goal
+            else:
+                goal = border_goal(world, obstacle)
+                if goal == 0:
+                    score_left_bool = True # left team scores a goal
+                elif goal == 1:
+                    score_right_bool = True # right team scores a goal
+            frame_profiler.mark("physics")
 
         # if score, reset positions and score states
         if score_left_bool or score_right_bool:
@@ -724,60 +1173,67 @@ def game_2(genomes, config) -> None:
                         genomes_list[aibots_list.index(aibot)].fitness -= 5
                 score_right_bool = False
 
-            for obstacle in obstacles_list:
-                obstacle.x, obstacle.y = (world.width/2, world.height/2)
-                obstacle.angle = 0
-                obstacle.speed = 0
-
-            for i, aibot in enumerate(aibots_list, 1):
-                aibot.x = 100 + (world.width - 200)*(genome_id%2)
-                aibot.y = world.height/2
-                aibot.angle = 0
-                aibot.speed = 0
+            # ball at the center and each AIBot at its side of the field, at rest
+            kickoff_state.load(kickoff)
 
         # if no score, punish them every second
         elif time_s >= 1.0:
             for aibot in aibots_list:
                 genomes_list[aibots_list.index(aibot)].fitness -= 1
 
-        # Draw Obstacles
-        for obstacle in obstacles_list:
-            pygame.draw.circle(game_window.screen, obstacle.color,
-                               (obstacle.x, obstacle.y), obstacle.size)
-
-        # Draw AIBots
-        for aibot in aibots_list:
-            pygame.draw.circle(game_window.screen, aibot.color,
-                               (aibot.x, aibot.y), aibot.size)
-        
-        # Draw gorillas (at left and right of the screen and vertically centered)
-        # game_window.screen.blit(gorilla_left.image, (0, world.height/2 - gorilla_left.height/2))
-        # game_window.screen.blit(gorilla_right.image, (world.width - gorilla_right.width, world.height/2 - gorilla_right.height/2))
-
-        # Draw text
-        # Time
-        draw_text(f"Timer: {int(timer)}", becode_color,
-                  (game_window.width_px - 100, 50))
-
-        # current generations
-        draw_text(f"Generation: {generation}",
-                  becode_color, (game_window.width_px/2, 50))
-
-        # Number of AIBots alive
-        draw_text(f"Score: {score_left} - {score_right}",
-                  becode_color, (game_window.width_px/2, 100))
-
-        # Update the screen with the drawings
-        pygame.display.update()
-        # pygame.display.flip() # difference between flip() and update(): flip updates the entire screen; update(rect) you can update portion of the display
+        frame_profiler.mark("physics")
+        decisions.end_tick()
+
+        if draw_frame:
+            # Layers of bodies: Obstacles, AIBots
+            layers = [obstacles_list, aibots_list]
+
+            # Draw gorillas (at left and right of the screen and vertically centered)
+            images = []
+            if gorilla_goals:
+                images = [(mask_cache.image(gorilla.image_path, GOAL_SIZE_PX, flip_x=True), (goal_left.x, goal_left.y)),
+                          (mask_cache.image(gorilla.image_path, GOAL_SIZE_PX), (goal_right.x, goal_right.y))]
+
+            # Texts: (text, color, position of the center, value)
+            texts = [
+                ("Timer: ", becode_color, (game_window.width_px - 100, 50), int(timer)),  # Time
+                ("Generation: ", becode_color, (game_window.width_px/2, 50), generation),  # current generations
+                ("Score: ", becode_color, (game_window.width_px/2, 100), f"{score_left} - {score_right}"),  # Score
+            ]
+
+            # Speed-up of the fast-forward (changed with + and -)
+            if speed_controller.is_fast_forward():
+                texts.append(("Speed (auto): x" if speed_controller.auto else "Speed: x",
+                              becode_color, (150, game_window.height_px - 50), speed_controller.ticks_per_frame))
+            # Decision interval of the AIBots (ticks between 2 queries of their neural network)
+            if decisions.interval > 1:
+                texts.append(("Decisions every (ticks): ", becode_color, (150, game_window.height_px - 100),
+                              decisions.interval))
+
+            # Draw the bodies and texts (or hand them to the render thread)
+            draw_world(layers, texts, images)
+            speed_controller.frame_rendered()
 
         # Time
         time_s += dt_s  # Measure time spent
         if time_s > 1.0:
             timer -= 1.0
             time_s = 0.0
-        # Limit the frame rate to max the framerate_limit
-        main_clock.tick(framerate_limit)
+        if draw_frame:
+            # Limit the frame rate to max the framerate_limit
+            main_clock.tick(framerate_limit)
+            frame_profiler.mark("wait")
+        frame_profiler.end_frame()
+        sampling_profiler.tick(generation, len(genomes))
+
+        replay_end_tick(ticks, aibots_list, (time_s, timer, score_left, score_right))
+        # Stop the generation if it used up its tick budget
+        if max_ticks_per_generation and ticks >= max_ticks_per_generation:
+            break
+
+    # Dump the frame timings of this generation
+    frame_profiler.end_generation(generation, len(genomes))
+    sampling_profiler.end_generation()
 
 def game_3(genomes, config) -> None:
     """
@@ -793,36 +1249,58 @@ def game_3(genomes, config) -> None:
     game_running: bool = True  # Game loop
     time_s: float = 0.0
     # current_level_index = 1 # level 1
-    player_1.x, player_1.y = (100, world.height/2)  # Restart player position
+    arena_state.load(initial_arena)  # player, obstacles and ticks of the decision scheduler back to the start
 
     # Create empty lists
     genomes_list: list = []
     aibots_list: List[AIBots] = []
     neural_nets_list: list = []
+    aibots_pool.release_all()  # the AIBots of the previous generation are reused
 
     for genome_id, genome in genomes:
         genome.fitness = 0  # AIBot starts the game with fitness score at 0
-        net = neat.nn.FeedForwardNetwork.create(genome, config)
+        net = create_network(genome, config)
         neural_nets_list.append(net)
         # create an aibot with specific size and starting at random y position within boundaries included
         aibot_size = 100
         # aibot_y = random.uniform(aibot_size, world.height - aibot_size)
         aibot_y = world.height/2
         aibots_list.append(
-            AIBots((world.width - 100, aibot_y), size=aibot_size, mass=50))
+            aibots_pool.acquire((world.width - 100, aibot_y), size=aibot_size, mass=50))
         genomes_list.append(genome)
 
     # Instantiate aibots
     # aibot_1 = AIBots((world.width - 100, world.height/2), size=50, mass=1)
 
+    ticks: int = 0  # number of simulation steps of this generation
+    if not headless:
+        renderer.invalidate()  # repaint the whole screen at the first frame
+    speed_controller.start_generation()
+    ticks, (time_s,) = start_replay("game_3", genomes_list, aibots_list, neural_nets_list, (time_s,))
+
     # Enter game loop
     while game_running and len(aibots_list):
 
-        # Get the delta t for one frame (this changes depending on system load).
-        dt_s = float(main_clock.tick(framerate_limit) * 1e-3)
+        frame_profiler.start_frame()
+        ticks += 1
 
-        # Get user input
-        user_input = client_1.get_user_input()
+        # When watching at a speed-up of K (fast-forward), only 1 tick out of K is drawn
+        draw_frame: bool = not headless and speed_controller.render_this_tick()
+
+        if not draw_frame:
+            # Fixed time step: nobody is watching this tick so the simulation does not wait for the clock
+            dt_s = 1 / framerate_limit
+            user_input = None
+        else:
+            # Get the delta t for one frame (this changes depending on system load).
+            dt_s = float(main_clock.tick(framerate_limit) * 1e-3)
+            if speed_controller.is_fast_forward():
+                dt_s = 1 / framerate_limit  # the frame lasts K ticks, each of them advances the fixed time step
+            frame_profiler.mark("wait")
+
+            # Get user input
+            user_input = client_1.get_user_input()
+            frame_profiler.mark("input")
 
         # Go to next generation if player press return button
         if isinstance(user_input, str):
@@ -836,11 +1314,19 @@ def game_3(genomes, config) -> None:
         # if user_input is a tuple, it means the user changed the screen size
         if isinstance(user_input, tuple):
             game_window.width_px, game_window.height_px = user_input
-            world.width, world.height = user_input  # update the environment as well
-        game_window.screen.fill(world.color)  # fill the screen with white
+            camera.resize(user_input)  # the world keeps its size: only the view changes
+            renderer.invalidate()
         # game_window.screen.blit(pygame.transform.scale(levels_list[current_level_index].bg_surface, (game_window.width_px,game_window.height_px)), (0,0))
         # game_window.screen.blit(levels_list[current_level_index].bg_surface, (0,0))
 
+        # Inputs of all the AIBots deciding at this tick at once: grid queries instead of 1 distance per body
+        dt_s = replay_tick(ticks, dt_s)
+        decisions.start_tick()
+        if sensor is not None:
+            sensor_inputs = sensor.sense(aibots_list, obstacles_list, client_1.player, world,
+                                         [aibot for aibot in aibots_list if decisions.decide(aibot)])
+            frame_profiler.mark("sensors")
+
         # Reward each AIBot a fitness of 0.1 for each frame it stays alive
         for i, aibot in enumerate(aibots_list):
             genomes_list[i].fitness += 0.1
@@ -867,33 +1353,36 @@ def game_3(genomes, config) -> None:
             # # print(len(input_list)) # should be 4 + (2*99) = 200
             # output: list = neural_nets_list[i].activate(input_list)
 
-            # As input: its location and its distance compared to player and obstacles
-            distances_to_obstacles = []
-            for obstacle in obstacles_list:
-                distances_to_obstacles.extend([abs(aibot.x - obstacle.x), abs(aibot.y - obstacle.y)])
-            
-            input_list: list = [aibot.x,
-                aibot.y,
-                abs(aibot.x - client_1.player.x),
-                abs(aibot.y - client_1.player.y)
-                ]
-            input_list.extend(distances_to_obstacles)
-            # print(len(input_list)) # should be 4 + (2*30)
-            output: list = neural_nets_list[i].activate(input_list)
-
-            # if output[0] > 0.5: go left
-            if output[0] > 0.5:
-                aibot.angle, aibot.speed = world.add_vectors(
-                    (aibot.angle, aibot.speed), (- 1 * math.pi/2, 2))
-            if output[1] > 0.5:
-                aibot.angle, aibot.speed = world.add_vectors(
-                    (aibot.angle, aibot.speed), (math.pi/2, 2))
-            if output[2] > 0.5:
-                aibot.angle, aibot.speed = world.add_vectors(
-                    (aibot.angle, aibot.speed), (0, 2))
-            if output[3] > 0.5:
-                aibot.angle, aibot.speed = world.add_vectors(
-                    (aibot.angle, aibot.speed), (math.pi, 2))
+            # Query the neural network every decision interval only
+            decided: bool = decisions.decide(aibot)
+            if decided:
+                if sensor is not None:
+                    # As input: its location, the relative position of the player and what the sensors see
+                    input_list: list = sensor_inputs[aibot]
+                else:
+                    # As input: its location and its distance compared to player and obstacles
+                    distances_to_obstacles = []
+                    for obstacle in obstacles_list:
+                        distances_to_obstacles.extend([abs(aibot.x - obstacle.x), abs(aibot.y - obstacle.y)])
+
+                    input_list: list = [aibot.x,
+                        aibot.y,
+                        abs(aibot.x - client_1.player.x),
+                        abs(aibot.y - client_1.player.y)
+                        ]
+                    input_list.extend(distances_to_obstacles)
+                    # print(len(input_list)) # should be 4 + (2*30)
+                frame_profiler.mark("sensors")
+                aibot.last_output = neural_nets_list[i].activate(input_list)
+                frame_profiler.mark("activate")
+
+            # Between 2 decisions, the AIBot keeps steering with its last output
+            steer(world, aibot, aibot.last_output)
+
+            # Row of the trajectory dataset (--trajectories)
+            if trajectories is not None:
+                trajectories.record(generation, ticks, genomes_list[i].key, aibot, input_list if decided else None,
+                                    aibot.last_output, genomes_list[i].fitness)
 
             # Limits aibot's speed
             if aibot.speed > 20:
@@ -922,7 +1411,8 @@ def game_3(genomes, config) -> None:
                     genomes_list.pop(aibots_list.index(aibot))
                     aibots_list.pop(aibots_list.index(aibot))
                     break
-            
+            frame_profiler.mark("physics")
+
             # for other_aibot in aibots_list[i+1:len(aibots_list) - 1]:
             #     collide_otherbot: bool = world.collide(aibot, other_aibot, True)
             #     if collide_otherbot:
@@ -948,112 +1438,142 @@ def game_3(genomes, config) -> None:
             # Limits obstacle's speed
             if obstacle.speed > 20:
                 obstacle.speed = 20
+        frame_profiler.mark("physics")
+        decisions.end_tick()
+
+        if draw_frame:
+            # Layers of bodies: Obstacles, Players, AIBots
+            layers = [obstacles_list, [player_1], aibots_list]
+
+            # Texts: (text, color, position of the center, value)
+            texts = [
+                ("Time: ", becode_color, (game_window.width_px - 100, 50), int(time_s)),  # Time
+                ("Generation: ", becode_color, (game_window.width_px/2, 50), generation),  # current generations
+                ("Alive: ", becode_color, (game_window.width_px/2, 100), len(aibots_list)),  # Number of AIBots alive
+            ]
+
+            # Speed-up of the fast-forward (changed with + and -)
+            if speed_controller.is_fast_forward():
+                texts.append(("Speed (auto): x" if speed_controller.auto else "Speed: x",
+                              becode_color, (150, game_window.height_px - 50), speed_controller.ticks_per_frame))
+            # Decision interval of the AIBots (ticks between 2 queries of their neural network)
+            if decisions.interval > 1:
+                texts.append(("Decisions every (ticks): ", becode_color, (150, game_window.height_px - 100),
+                              decisions.interval))
+
+            # Draw the bodies and texts (or hand them to the render thread)
+            draw_world(layers, texts)
+            speed_controller.frame_rendered()
 
-            
-        # Draw Obstacles
-        for obstacle in obstacles_list:
-            pygame.draw.circle(game_window.screen, obstacle.color,
-                               (obstacle.x, obstacle.y), obstacle.size)
-
-        # Draw Players
-        pygame.draw.circle(game_window.screen, player_1.color,
-                           (player_1.x, player_1.y), player_1.size)
-
-        # Draw AIBots
-        for aibot in aibots_list:
-            pygame.draw.circle(game_window.screen, aibot.color,
-                               (aibot.x, aibot.y), aibot.size)
-
-        # Draw text
         # Time
-        draw_text(f"Time: {int(time_s)}", becode_color,
-                  (game_window.width_px - 100, 50))
-
-        # current generations
-        draw_text(f"Generation: {generation}",
-                  becode_color, (game_window.width_px/2, 50))
+        time_s += dt_s  # Measure time spent
+        if draw_frame:
+            # Limit the frame rate to max the framerate_limit
+            main_clock.tick(framerate_limit)
+            frame_profiler.mark("wait")
+        frame_profiler.end_frame()
+        sampling_profiler.tick(generation, len(genomes))
+
+        replay_end_tick(ticks, aibots_list, (time_s,))
+        # Stop the generation if it used up its tick budget
+        if max_ticks_per_generation and ticks >= max_ticks_per_generation:
+            break
 
-        # Number of AIBots alive
-        draw_text(f"Alive: {len(aibots_list)}",
-                  becode_color, (game_window.width_px/2, 100))
+    # Dump the frame timings of this generation
+    frame_profiler.end_generation(generation, len(genomes))
+    sampling_profiler.end_generation()
 
-        # Update the screen with the drawings
-        pygame.display.update()
-        # pygame.display.flip() # difference between flip() and update(): flip updates the entire screen; update(rect) you can update portion of the display
+def matchmaking_generation(genomes, config) -> None:
+    """
+    Function to evaluate a generation of game_2 by the rated matches of --matchmaking.
+    No frame is drawn, so the sampling profiler (F9 or SIGUSR1) is driven by the generations.
+    """
+    global generation
+    generation += 1
+    sampling_profiler.tick(generation, len(genomes))
+    matchmaking(genomes, config)
+    sampling_profiler.end_generation()
 
-        # Time
-        time_s += dt_s  # Measure time spent
-        # Limit the frame rate to max the framerate_limit
-        main_clock.tick(framerate_limit)
 
-def run(config_file, game):
+def setup_game(headless_mode: bool = False, num_obstacles: int = 3) -> None:
     """
-    runs the NEAT algorithm to train a neural network to play flappy bird.
-    :param config_file: location of config file
-    :return: None
+    Function to initialize pygame and create the global objects used by the games
+    (window, fonts, clock, profilers, environment, players, obstacles, gorilla and levels).
+    * param
+    :headless_mode :if True, pygame is not even imported: no window, no sound, no user input
+    :num_obstacles :number of obstacles to create
     """
-    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
-                                neat.DefaultSpeciesSet, neat.DefaultStagnation,
-                                config_file)
+    global game_window, assets, text_cache, scaled_cache, main_clock, frame_profiler, sampling_profiler
+    global world, renderer, sprite_cache, player_1, client_1, obstacles_list, gorilla, levels_list, headless
+    global speed_controller, render_thread, sound_manager, camera, view_grid, sensor, decisions, aibots_pool
+    global arena_state, initial_arena
 
-    # Create the population, which is the top-level object for a NEAT run.
-    p = neat.Population(config)
+    headless = headless_mode
 
-    # Add a stdout reporter to show progress in the terminal.
-    p.add_reporter(neat.StdOutReporter(True))  # DD: this gets some stats
-    stats = neat.StatisticsReporter()
-    p.add_reporter(stats)
-    # p.add_reporter(neat.Checkpointer(5))
+    # Frame profiler: per-stage timings of the game loops (press F3 to show them, --profile to write them)
+    frame_profiler = FrameProfiler(
+        ["wait", "input", "sensors", "activate", "physics", "draw", "display", "record"],
+        enabled=profile_frames, summary_path="data/frame_profile.jsonl" if profile_frames else None)
 
-    # Run for up to 50 generations.
-    winner = p.run(game, 50)
-
-    # show final stats
-    print('\nBest genome:\n{!s}'.format(winner))
+    # Sampling profiler: press F9 or send SIGUSR1 (kill -USR1 <pid>) to capture a flame graph
+    sampling_profiler = SamplingProfiler(frames=capture_frames, generations=capture_generations)
+    sampling_profiler.install_signal_handler()
 
-# ============================================================
-# Run
-# ============================================================
+    # Fast-forward while watching the training (+ and - keys)
+    speed_controller = SpeedController(ticks_per_frame, auto=auto_speed)
 
-if __name__ == '__main__':
+    # Ticks between 2 queries of the neural network of an AIBot (action repeat)
+    decisions = DecisionScheduler(decision_interval, adaptive=adaptive_decisions)
 
-    # Globals
-    # global game_window, game_font, player_1, world
-    # global generation
+    # Instantiate environment (by default, the world has the size of the window)
+    world = Environment(world_size or (WINDOW_WIDTH_PX, WINDOW_HEIGHT_PX),
+                        color=(255, 255, 255))
 
-    # CONSTANTS
-    WINDOW_WIDTH_PX = 1440
-    WINDOW_HEIGHT_PX = 900
-    CAPTION = "Enter the Pygame"
-    PLAYER_SIZE = 50
-    AIBOT_SIZE = 50
-    GORILLA_SIZE = 50
-    OBSTACLE_MIN_SIZE = 20
-    OBSTACLE_MAX_SIZE = 50
+    if not headless:
+        # Setup
+        import_pygame()
+        pygame.init()  # initiate pygame
+        pygame.font.init()  # initiate font
+        # images, sounds and fonts are loaded on first use and their decoded data is kept in data/cache
+        assets = AssetManager()
+        text_cache = TextCache()  # rendered texts are reused instead of being rendered every frame
+        sound_manager = SoundManager(assets)  # named channels: a sound playing is not started again
+        # end_font = pygame.font.SysFont("comicsans", 70)
+        # game_font = pygame.font.Font('04B_19.ttf',40) # create a font (style, size)
+
+        # Display
+        game_window = GameWindow((WINDOW_WIDTH_PX, WINDOW_HEIGHT_PX), CAPTION)
+        game_window.display_caption()
+
+        # Clock
+        main_clock = pygame.time.Clock()  # instantiate clock to limit the frame rate
+
+        # Renderer that only updates the parts of the screen that changed
+        renderer = DirtyRenderer(world.color)
+        # Circles are rasterized once per (radius, color) and drawn as sprites
+        sprite_cache = SpriteCache(antialias=antialias)
+        scaled_cache = ScaledSurfaceCache()  # scaled copies of the backgrounds
+
+        # Camera showing a part of the world (zoom and pan) and grid to find the bodies in view
+        camera = Camera((world.width, world.height), (WINDOW_WIDTH_PX, WINDOW_HEIGHT_PX))
+        view_grid = SpatialGrid(cell_size=200)
+
+        # Render thread drawing the latest snapshot of the world (the simulation never waits for the display)
+        render_thread = None
+        if use_render_thread:
+            render_thread = RenderThread(render_snapshot)
+            render_thread.start()
+
+    # AIBots reused from one generation to the next
+    aibots_pool = AIBotsPool()
+
+    # Sensors giving the AIBots inputs of constant size (None: distances to every body)
+    sensor = None
+    if sensor_mode == "nearest":
+        sensor = NearestSensor(*k_nearest)
+    elif sensor_mode == "rays":
+        sensor = RaySensor(num_rays, ray_range)
 
-    # Variables
-    framerate_limit = 120
-    generation = 0
-    slide_font_color = (255, 255, 255)
-    becode_color = (22, 35, 46)
-
-    # Setup
-    pygame.init()  # initiate pygame
-    pygame.font.init()  # initiate font
-    game_font = pygame.font.SysFont("comicsans", 50)
-    # end_font = pygame.font.SysFont("comicsans", 70)
-    # game_font = pygame.font.Font('04B_19.ttf',40) # create a font (style, size)
-
-    # Display
-    game_window = GameWindow((WINDOW_WIDTH_PX, WINDOW_HEIGHT_PX), CAPTION)
-    game_window.display_caption()
-
-    # Clock
-    main_clock = pygame.time.Clock()  # instantiate clock to limit the frame rate
-
-    # Instantiate environment
-    world = Environment((WINDOW_WIDTH_PX, WINDOW_HEIGHT_PX),
-                        color=(255, 255, 255))
     # Instantiate player
     # player_1 = Player(20, (1,1),'Yoyo', (255,0,0))
     player_1 = Player((100, world.height/2), size=100, mass=100,
@@ -1063,10 +1583,10 @@ if __name__ == '__main__':
     client_1 = Client(player_1)
 
     # Instantiate obstacles
-    obstacles_list: List[Obstacle] = []
+    obstacles_list = []
     min_size: int = 30
     max_size: int = 30
-    for _ in range(3):
+    for _ in range(num_obstacles):
         obstacle = Obstacle((random.uniform(0, world.width), random.uniform(
             0, world.height)), size=random.uniform(min_size, max_size), mass=50)
         # Assign rectangle: pygame.Rect(left, top, width, height)
@@ -1075,43 +1595,399 @@ if __name__ == '__main__':
 
     # Instantiate gorillas
     gorilla = Gorilla("gamecore/assets/images/gorilla.png",
-                      (game_window.width_px, game_window.height_px))
-    # gorilla_left = Gorilla("gamecore/assets/images/gorilla.png",
-    #                   (0, game_window.height_px/2))
-    # gorilla_right = Gorilla("gamecore/assets/images/gorilla.png",
-    #                   (0, game_window.height_px/2))
-    # # convert() converts the image into a format easier for pygame => faster
-    # # alpha() otherwise pygame paints black where the image is empty/transparent
-    # gorilla.image = pygame.image.load(gorilla.image_path).convert_alpha()
-    # gorilla.image_flip = pygame.transform.flip(gorilla.image, True, False)  # flip the gorilla horizontally
-    # gorilla_right.image = gorilla.image
-    # gorilla_left.image = pygame.transform.flip(gorilla.image, True, False)  # flip the gorilla horizontally
-    # gorilla_right.image = pygame.transform.scale(gorilla_right.image, (200,200))
-    # gorilla_left.image = pygame.transform.scale(gorilla_left.image, (200,200))
-    # gorilla_right.height = gorilla_right.image.get_height()
-    # gorilla_left.height = gorilla_left.image.get_height()
-    # gorilla_right.width = gorilla_right.image.get_width()
-    # gorilla_left.width = gorilla_left.image.get_width()
-    
-    # Get the mask of gorilla images
-    # gorilla_right.image_mask = pygame.mask.from_surface(gorilla_right.image)
-    # gorilla_left.image_mask = pygame.mask.from_surface(gorilla_left.image)
-    
-    # import gorilla sounds
-    gorilla.sounds = pygame.mixer.Sound(
-        "gamecore/assets/sounds/gorilla_sounds.mp3")
+                      (WINDOW_WIDTH_PX, WINDOW_HEIGHT_PX))
+    # Gorillas used as goals in game_2 (pixel-perfect collisions with the ball)
+    if gorilla_goals:
+        create_goals()
+
+    # Initial state of the arena, restored at the start of every generation of the games
+    arena_state = WorldState([player_1] + obstacles_list, decisions)
+    initial_arena = arena_state.snapshot()
 
     # Create levels
     levels_list = create_levels()
 
-    # Start screen
-    # start_screen()
 
-    # Start game
-    # config_path = "gamecore/config-feedforward.txt"
-    # run(config_path, game_1)
-    # config_path = "gamecore/config-feedforward-2.txt"
-    # run(config_path, game_2)
-    config_path = "gamecore/config-feedforward-3.txt"
-    run(config_path, game_3)
+def run(config_file, game, generations: int = 50):
+    """
+    runs the NEAT algorithm to train a neural network to play flappy bird.
+    :param config_file: location of config file
+    :param generations: maximum number of generations
+    :return: None
+    """
+    import_neat()
+    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                                neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                                config_file)
+
+    # The number of inputs depends on the sensors, not on the number of bodies of the config
+    if sensor is not None:
+        num_inputs = sensor.num_inputs(player=game is not game_2)
+        config.genome_config.num_inputs = num_inputs
+        config.genome_config.input_keys = [-i - 1 for i in range(num_inputs)]
+
+    # With matchmaking, game_2 is evaluated by many small rated matches instead of 1 shared match
+    fitness_function = game
+    if matchmaking is not None:
+        if gorilla_goals:
+            raise ValueError("--gorilla-goals does not apply to --matchmaking: "
+                             "the goals of the matches are the borders")
+        if sensor is None:
+            num_inputs = 2 * (2 * matchmaking.team_size - 1) + 2 * len(obstacles_list)
+            if config.genome_config.num_inputs != num_inputs:
+                raise ValueError(f"matches of {matchmaking.team_size} AIBots per side need {num_inputs} inputs, "
+                                 f"not {config.genome_config.num_inputs}: change --team-size or the config")
+        # the fitness is a rating relative to the population: fitness_threshold would stop the run
+        # as soon as 1 genome outclasses the others, so only the number of generations ends it
+        config.no_fitness_termination = True
+        fitness_function = matchmaking_generation
+
+    # Create the population, which is the top-level object for a NEAT run.
+    p = neat.Population(config)
+
+    # Add a stdout reporter to show progress in the terminal.
+    p.add_reporter(neat.StdOutReporter(True))  # DD: this gets some stats
+    stats = neat.StatisticsReporter()
+    p.add_reporter(stats)
+    # p.add_reporter(neat.Checkpointer(5))
+
+    # Opt-in memory tracer: reports the allocation sites that grow from one generation to the next
+    if trace_memory:
+        from gamecore.memory import MemoryTracer
+        p.add_reporter(MemoryTracer(
+            [Player, AIBots, Obstacle],
+            registries={
+                "Player.players_list": lambda: len(Player.players_list),
+                "AIBots.aibots_list": lambda: len(AIBots.aibots_list),
+                "Obstacle.players_list": lambda: len(Obstacle.players_list),
+                "Level.levels_list": lambda: len(Level.levels_list),
+                # the statistics reporter keeps the best genome and the fitnesses of every generation
+                "StatisticsReporter.most_fit_genomes": lambda: len(stats.most_fit_genomes),
+                "StatisticsReporter.generation_statistics": lambda: len(stats.generation_statistics),
+            }))
+
+    # Opt-in genome archive: seeds the population with past champions and stores the fittest genomes
+    if genome_archive is not None:
+        from gamecore.archive import ArchiveReporter, seed_population
+        genome_config = config.genome_config
+        if archive_seeds:
+            champions = genome_archive.best(game=game.__name__, num_inputs=genome_config.num_inputs,
+                                            num_outputs=genome_config.num_outputs, limit=archive_seeds,
+                                            distinct=True)
+            seeded = seed_population(p, [genome_archive.load(row["id"]) for row in champions])
+            print(f"Seeded the population with {seeded} genomes of {genome_archive.path}")
+        if archive_top_k:
+            run_id = genome_archive.start_run(
+                game.__name__, config_file, random_seed, genome_config.num_inputs, genome_config.num_outputs,
+                settings={"obstacles": len(obstacles_list), "sensors": sensor_mode, "k_nearest": list(k_nearest),
+                          "rays": num_rays, "ray_range": ray_range, "world_size": [world.width, world.height],
+                          "gorilla_goals": gorilla_goals, "decision_interval": decision_interval,
+                          "max_ticks": max_ticks_per_generation})
+            p.add_reporter(ArchiveReporter(genome_archive, run_id, archive_top_k))
+
+    # Run for up to 50 generations.
+    winner = p.run(fitness_function, generations)
+
+    # show final stats
+    print('\nBest genome:\n{!s}'.format(winner))
+
+def show_archive(path: str, game: Optional[str] = None, run_id: Optional[int] = None,
+                 structure: Optional[str] = None, limit: int = 10, compare: Optional[List[int]] = None) -> None:
+    """
+    Function to print the fittest genomes of the archive matching the filters,
+    or the comparison of 2 genomes of the archive
+    """
+    from gamecore.archive import GenomeArchive
+    archive = GenomeArchive(path)
+    if compare:
+        comparison = archive.compare(*compare)
+        for name in ("nodes", "connections"):
+            count, other_count, shared = comparison[name]
+            print(f"{name}: {count} / {other_count}, {shared} shared")
+        print(f"mean weight difference of the shared connections: {comparison['weight_difference']:.4f}")
+    else:
+        print(f"{'id':>6} {'run':>4} {'game':<7} {'seed':>5} {'gen':>4} {'fitness':>10} "
+              f"{'nodes':>5} {'conns':>5}  structure")
+        for row in archive.best(game=game, run_id=run_id, structure=structure, limit=limit):
+            print(f"{row['id']:>6} {row['run_id']:>4} {row['game']:<7} {str(row['seed']):>5} "
+                  f"{row['generation']:>4} {row['fitness']:>10.2f} {row['num_nodes']:>5} "
+                  f"{row['num_connections']:>5}  {row['structure_hash']}")
+    archive.close()
+
+
+def check_startup_budget(command: str, verbose: bool = False) -> float:
+    """
+    Function to measure the time spent importing and initializing what a command needs
+    and to warn if it exceeds the budget of the command (STARTUP_BUDGET_MS).
+    The interpreter startup is not counted: the whole launch is checked by benchmark.py against LAUNCH_BUDGET_MS.
+
+    Returns: startup time in ms
+    """
+    startup_ms = (time.perf_counter() - START_TIME) * 1e3
+    budget_ms = STARTUP_BUDGET_MS.get(command)
+    if verbose:
+        print(f"Startup of {command}: {startup_ms:.1f} ms (budget: {budget_ms} ms)")
+    if budget_ms is not None and startup_ms > budget_ms:
+        print(f"WARNING: startup of {command} took {startup_ms:.1f} ms, over its budget of {budget_ms} ms",
+              file=sys.stderr)
+    return startup_ms
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    """
+    Function to parse a size given as WIDTHxHEIGHT (e.g. 4000x2500)
+    """
+    try:
+        width, height = (int(value) for value in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {text} (expected WIDTHxHEIGHT)")
+    return width, height
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Function to parse the command line: python3 run_game.py [train|play|story|replay|archive|benchmark|sweep] [options]
+    Without command, the game is played (same as "play").
+    """
+    parser = argparse.ArgumentParser(description="Enter the Pygame")
+    subparsers = parser.add_subparsers(dest="command")
+
+    def add_game_arguments(subparser):
+        subparser.add_argument("--game", choices=list(GAMES), default="game_3",
+                               help="game to train the AIBots on (default: %(default)s)")
+        subparser.add_argument("--config", help="NEAT config file (default: the config of the game)")
+        subparser.add_argument("--generations", type=int, default=50,
+                               help="maximum number of generations (default: %(default)s)")
+        subparser.add_argument("--obstacles", type=int,
+                               help="number of obstacles (default: matches the inputs of the config)")
+        subparser.add_argument("--seed", type=int, help="seed of the random generator")
+        subparser.add_argument("--trace-memory", action="store_true",
+                               help="report the memory growth of every generation")
+        subparser.add_argument("--startup-only", action="store_true",
+                               help="only import and initialize, print the startup time and quit")
+        subparser.add_argument("--profile", action="store_true",
+                               help="time the stages of every frame and append them to data/frame_profile.jsonl")
+        subparser.add_argument("--profile-frames", type=int, default=600, metavar="N", dest="capture_frames",
+                               help="frames sampled by the profiler started with F9 or SIGUSR1 (default: %(default)s)")
+        subparser.add_argument("--profile-generations", type=int, default=0, metavar="N",
+                               dest="capture_generations",
+                               help="sample N whole generations instead of a number of frames "
+                                    "(default: frames, 1 generation with --matchmaking)")
+        subparser.add_argument("--speed", type=int, default=1,
+                               help="ticks simulated per drawn frame when the window is shown (default: %(default)s)")
+        subparser.add_argument("--auto-speed", action="store_true",
+                               help="tune the speed to hold 30 frames per second when the window is shown")
+        subparser.add_argument("--record", choices=["png", "raw"],
+                               help="record the frames to a png sequence or a raw video in data/recordings (F10)")
+        subparser.add_argument("--world-size", type=parse_size,
+                               help="size of the world, e.g. 4000x2500 (default: size of the window)")
+        subparser.add_argument("--gorilla-goals", action="store_true",
+                               help="game_2: the goals are gorillas instead of the left and right borders")
+        subparser.add_argument("--render-thread", action="store_true",
+                               help="draw in a separate thread so that the simulation never waits for the display")
+        subparser.add_argument("--sensors", choices=["distances", "nearest", "rays"], default="distances",
+                               help="inputs of the AIBots: distances to every body, relative position of "
+                                    "the k nearest bodies or distances seen by rays, whatever the number of bodies "
+                                    "(default: %(default)s)")
+        subparser.add_argument("--k-nearest", type=int, nargs=2, default=[3, 2], metavar=("OBSTACLES", "BOTS"),
+                               help="number of nearest obstacles and bots seen with --sensors nearest "
+                                    "(default: 3 2)")
+        subparser.add_argument("--rays", type=int, default=8,
+                               help="number of rays cast around each AIBot with --sensors rays (default: %(default)s)")
+        subparser.add_argument("--ray-range", type=float, default=600.0,
+                               help="length of the rays (default: %(default)s)")
+        subparser.add_argument("--decision-interval", type=int, default=1,
+                               help="ticks between 2 queries of the neural network of an AIBot, "
+                                    "which keeps its last action in between (default: %(default)s)")
+        subparser.add_argument("--adaptive-decisions", action="store_true",
+                               help="increase the decision interval (up to 10) while the ticks are slow")
+        subparser.add_argument("--record-replays", action="store_true",
+                               help="write every generation to a replay file in data/replays (see the replay command)")
+        subparser.add_argument("--trajectories", action="store_true",
+                               help="write the state, inputs, outputs and fitness of every AIBot at every tick "
+                                    "to a memory-mapped columnar dataset in data/trajectories")
+        subparser.add_argument("--archive", nargs="?", const="data/genomes.sqlite", metavar="FILE",
+                               help="store the fittest genomes of every generation in a SQLite archive "
+                                    "(default file: %(const)s)")
+        subparser.add_argument("--archive-top-k", type=int, default=5,
+                               help="number of genomes stored per generation (default: %(default)s)")
+        subparser.add_argument("--seed-from-archive", type=int, default=0, metavar="N",
+                               help="start from the N fittest genomes of the archive for this game and inputs")
+
+    train_parser = subparsers.add_parser("train", help="train the AIBots without window (headless)")
+    add_game_arguments(train_parser)
+    train_parser.add_argument("--max-ticks", type=int, default=3600,
+                              help="maximum number of ticks per generation (default: %(default)s)")
+    train_parser.add_argument("--watch", action="store_true",
+                              help="show the window while training")
+    train_parser.add_argument("--matchmaking", choices=["round-robin", "swiss", "hall-of-fame"],
+                              help="game_2: rate the genomes by many small matches (1 genome per side) "
+                                   "played in parallel instead of 1 match of the whole population")
+    train_parser.add_argument("--swiss-rounds", type=int, default=3,
+                              help="rounds per generation of the swiss matchmaking (default: %(default)s)")
+    train_parser.add_argument("--hall-of-fame", type=int, default=5,
+                              help="champions kept by the hall-of-fame matchmaking (default: %(default)s)")
+    train_parser.add_argument("--team-size", type=int, default=2,
+                              help="AIBots per side of a match (default: %(default)s, the 8 inputs of the config)")
+    train_parser.add_argument("--match-ticks", type=int, default=1200,
+                              help="duration of a match in ticks (default: %(default)s)")
+    train_parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                              help="processes playing the matches (default: the number of CPUs, %(default)s)")
+
+    play_parser = subparsers.add_parser("play", help="play with the window while the AIBots train (default)")
+    add_game_arguments(play_parser)
+    play_parser.add_argument("--antialias", action="store_true",
+                             help="draw the circles with anti-aliased edges")
+
+    story_parser = subparsers.add_parser("story", help="show the story (start screen)")
+    story_parser.add_argument("--startup-only", action="store_true",
+                              help="only import and initialize, print the startup time and quit")
+
+    replay_parser = subparsers.add_parser("replay", help="play back the replay of a generation")
+    replay_parser.add_argument("file", help="replay file written with --record-replays")
+    replay_parser.add_argument("--tick", type=int, default=0, help="tick to start from (default: %(default)s)")
+    replay_parser.add_argument("--speed", type=int, default=1,
+                               help="ticks simulated per drawn frame (default: %(default)s)")
+
+    archive_parser = subparsers.add_parser("archive", help="list or compare the genomes of the archive")
+    archive_parser.add_argument("--file", default="data/genomes.sqlite",
+                                help="SQLite archive (default: %(default)s)")
+    archive_parser.add_argument("--game", choices=list(GAMES), help="only the genomes of this game")
+    archive_parser.add_argument("--run", type=int, help="only the genomes of this run")
+    archive_parser.add_argument("--structure", help="only the genomes with this structural hash")
+    archive_parser.add_argument("--limit", type=int, default=10,
+                                help="number of genomes listed, the fittest first (default: %(default)s)")
+    archive_parser.add_argument("--compare", type=int, nargs=2, metavar=("ID", "ID"),
+                                help="compare the genes of 2 genomes")
+
+    subparsers.add_parser("benchmark", help="run the benchmark suite (see benchmark.py --help)",
+                          add_help=False)
+    subparsers.add_parser("sweep", help="run a hyperparameter sweep of a NEAT config (see sweep.py --help)",
+                          add_help=False)
+
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["benchmark"]:
+        # the options of the benchmark are parsed by benchmark.py
+        return argparse.Namespace(command="benchmark", benchmark_arguments=argv[1:])
+    if argv[:1] == ["sweep"]:
+        # the options of the sweep are parsed by sweep.py
+        return argparse.Namespace(command="sweep", sweep_arguments=argv[1:])
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args = parser.parse_args(["play"] + argv)
+    if getattr(args, "matchmaking", None) and args.game != "game_2":
+        parser.error("--matchmaking only applies to game_2")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Function to run the command given on the command line
+    """
+    global max_ticks_per_generation, trace_memory, profile_frames, antialias, ticks_per_frame, auto_speed
+    global use_render_thread, record_format, gorilla_goals, world_size, sensor_mode, k_nearest, num_rays, ray_range
+    global decision_interval, adaptive_decisions, replay_recorder, replay, trajectories
+    global genome_archive, archive_top_k, archive_seeds, random_seed, matchmaking, capture_frames, capture_generations
+    args = parse_arguments(argv)
+
+    if args.command == "benchmark":
+        import benchmark
+        sys.exit(benchmark.main(args.benchmark_arguments))
+
+    if args.command == "sweep":
+        import sweep
+        sys.exit(sweep.main(args.sweep_arguments))
+
+    if args.command == "story":
+        setup_game()
+        if args.startup_only:
+            check_startup_budget(args.command, verbose=True)
+            terminate()
+        check_startup_budget(args.command)
+        start_screen()
+        terminate()
+
+    if args.command == "archive":
+        show_archive(args.file, args.game, args.run, args.structure, args.limit, args.compare)
+        return
+
+    if args.command == "replay":
+        # the world of the replay: same size, obstacles, goals, sensors and decisions as when it was recorded
+        replay = ReplayPlayer(args.file)
+        apply_replay_settings(replay.header)
+        ticks_per_frame = args.speed
+        max_ticks_per_generation = replay.num_ticks
+        setup_game(num_obstacles=replay.header["num_obstacles"])
+        replay.seek(args.tick)
+        play_replay()
+
+    # train or play
+    game, config_path, num_obstacles = GAMES[args.game]
+    if args.seed is not None:
+        random.seed(args.seed)
+    random_seed = args.seed
+    trace_memory = args.trace_memory
+    profile_frames = args.profile
+    capture_frames, capture_generations = args.capture_frames, args.capture_generations
+    if getattr(args, "matchmaking", None):
+        # the matches draw no frame: the sampling profiler captures whole generations
+        capture_generations = capture_generations or 1
+    antialias = getattr(args, "antialias", False)
+    ticks_per_frame, auto_speed = args.speed, args.auto_speed
+    use_render_thread = args.render_thread
+    gorilla_goals = args.gorilla_goals
+    world_size = args.world_size
+    sensor_mode, k_nearest = args.sensors, tuple(args.k_nearest)
+    num_rays, ray_range = args.rays, args.ray_range
+    decision_interval, adaptive_decisions = args.decision_interval, args.adaptive_decisions
+    if args.record:
+        record_format = args.record
+    headless_mode = args.command == "train" and not args.watch
+    startup_name = "train --watch" if args.command == "train" and args.watch else args.command
+    if args.command == "train":
+        max_ticks_per_generation = args.max_ticks
+    if args.record_replays:
+        replay_recorder = ReplayRecorder(fixed_dt_s=1 / framerate_limit)
+    if args.trajectories:
+        from gamecore.dataset import TrajectoryWriter
+        trajectories = TrajectoryWriter()
+    if args.archive or args.seed_from_archive:
+        from gamecore.archive import GenomeArchive
+        genome_archive = GenomeArchive(args.archive or "data/genomes.sqlite")
+        archive_top_k = args.archive_top_k if args.archive else 0
+        archive_seeds = args.seed_from_archive
+
+    setup_game(headless_mode=headless_mode,
+               num_obstacles=num_obstacles if args.obstacles is None else args.obstacles)
+    if getattr(args, "matchmaking", None):
+        from gamecore.matchmaking import MatchScheduler, MatchmakingEvaluator
+        matchmaking = MatchmakingEvaluator(
+            MatchScheduler(args.matchmaking, rounds=args.swiss_rounds, hall_of_fame_size=args.hall_of_fame),
+            {"world_size": (world.width, world.height), "team_size": args.team_size,
+             "num_balls": len(obstacles_list), "match_ticks": args.match_ticks, "sensor": sensor},
+            workers=args.workers)
+    # neat (about 40 ms) is imported by run(), once the startup is measured
+    if args.startup_only:
+        check_startup_budget(startup_name, verbose=True)
+        terminate()
+    check_startup_budget(startup_name)
+    if args.record and not headless_mode:
+        toggle_recording()
+
+    run(args.config or config_path, game, args.generations)
     terminate()
+
+
+# name: (game function, NEAT config file, number of obstacles matching the number of inputs of the config)
+GAMES = {
+    "game_1": (game_1, "gamecore/config-feedforward.txt", 5),
+    "game_2": (game_2, "gamecore/config-feedforward-2.txt", 1),
+    "game_3": (game_3, "gamecore/config-feedforward-3.txt", 3),
+}
+
+# ============================================================
+# Run
+# ============================================================
+
+if __name__ == '__main__':
+    main()
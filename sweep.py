@@ -0,0 +1,384 @@
+"""
+Hyperparameter sweep over the NEAT config files of the games:
+- a grid (every combination of the values) or a random search over parameters of the config file;
+- every variant is trained with fixed seeds, headless, in parallel over a pool of processes;
+- each trial has a budget (generations, ticks per generation, seconds) and the bad trials are stopped early
+  (median stopping rule: a trial whose best fitness is below the median of the other trials
+  at the same generation is stopped);
+- the results are collected in 1 CSV table.
+
+Run: python3 sweep.py --help
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import argparse
+import configparser
+import contextlib
+import csv
+import itertools
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Optional, Union
+
+# Import 3rd party modules
+import neat
+
+# Import local modules
+from benchmark import GAMES_CONFIG, SEED, matching_obstacles
+
+
+# =====================================================================
+# Constants
+# =====================================================================
+
+DEFAULT_OUTPUT_DIR = "data/sweeps"
+DEFAULT_GENERATIONS = 10
+DEFAULT_MAX_TICKS = 1200  # 10 seconds of simulation per generation at 120 ticks per second
+DEFAULT_MAX_SECONDS = 600.0
+DEFAULT_GRACE_GENERATIONS = 3  # no trial is stopped before this generation
+DEFAULT_MIN_TRIALS = 3  # number of other trials needed to compute the median of a generation
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class StopTrial(Exception):
+    """
+    StopTrial is raised by TrialReporter to stop a trial before the end of its generations
+    """
+
+
+class TrialReporter(neat.reporting.BaseReporter):
+    """
+    TrialReporter is a neat reporter that shares the best fitness of a trial with the other trials
+    and stops the trial when it is out of time or below the median of the other trials.
+    It has 5 attributes: trial_id, progress, deadline, grace_generations, min_trials
+    * trial_id: number of the trial
+    * progress: {trial_id: best fitness so far at every generation} shared by the processes
+    * deadline: time.perf_counter() at which the trial is stopped
+    * grace_generations: number of generations before a trial can be stopped by the median rule
+    * min_trials: number of other trials needed at a generation to apply the median rule (0: never)
+    """
+
+    def __init__(self, trial_id: int, progress, deadline: float, grace_generations: int = DEFAULT_GRACE_GENERATIONS,
+                 min_trials: int = DEFAULT_MIN_TRIALS) -> None:
+        """
+        Function to create an instance of TrialReporter class
+        By default:
+        * grace_generations is 3
+        * min_trials is 3
+        """
+        self.trial_id = trial_id
+        self.progress = progress
+        self.deadline = deadline
+        self.grace_generations = grace_generations
+        self.min_trials = min_trials
+        self.history: List[float] = []  # best fitness so far at every generation
+        self.last_mean_fitness: Optional[float] = None
+
+    def post_evaluate(self, config, population, species, best_genome) -> None:
+        """
+        Function called by neat once the genomes of a generation are evaluated:
+        shares the best fitness and raises StopTrial if the trial must stop
+        """
+        fitnesses = [genome.fitness for genome in population.values() if genome.fitness is not None]
+        self.last_mean_fitness = statistics.mean(fitnesses)
+        self.history.append(max([max(fitnesses)] + self.history[-1:]))
+        self.progress[self.trial_id] = self.history  # a new list is sent to the other processes
+
+        if time.perf_counter() > self.deadline:
+            raise StopTrial("time budget")
+        generation = len(self.history) - 1
+        if not self.min_trials or generation < self.grace_generations:
+            return
+        others = [history[generation] for trial_id, history in self.progress.items()
+                  if trial_id != self.trial_id and len(history) > generation]
+        if len(others) >= self.min_trials and self.history[-1] < statistics.median(others):
+            raise StopTrial("below the median")
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def parse_value(text: str) -> Union[int, float, str]:
+    """
+    Function to read a value of a parameter as int, float or string (e.g. "tanh", "True")
+    """
+    for value_type in (int, float):
+        try:
+            return value_type(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_parameter(text: str) -> tuple:
+    """
+    Function to read a parameter of the command line:
+    NAME=A,B,C (list of values) or NAME=LOW:HIGH (range of the random search)
+    NAME is an option of the config file, optionally prefixed by its section (e.g. DefaultGenome.num_hidden)
+
+    Returns: (name, list of values) or (name, (low, high))
+    """
+    name, _, values = text.partition("=")
+    if not name or not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=A,B,C or NAME=LOW:HIGH, not {text!r}")
+    if ":" in values:
+        low, _, high = values.partition(":")
+        low, high = parse_value(low), parse_value(high)
+        if isinstance(low, str) or isinstance(high, str):
+            raise argparse.ArgumentTypeError(f"the range of {name} needs numeric bounds, not {values!r} "
+                                             f"(NAME=A,B,C for a list of values)")
+        if low > high:
+            raise argparse.ArgumentTypeError(f"the range of {name} goes down from {low} to {high}")
+        return name, (low, high)
+    return name, [parse_value(value) for value in values.split(",")]
+
+
+def expand(parameters: Dict[str, Union[list, tuple]], samples: int = 0, seed: int = SEED) -> List[dict]:
+    """
+    Function to expand the parameters into config variants
+    * param
+    :parameters :{name: list of values or (low, high) range}
+    :samples :number of variants drawn at random (0: every combination of the values, the grid)
+    :seed :seed of the random search
+
+    Returns: list of {name: value}
+    """
+    if not samples:
+        ranges = [name for name, values in parameters.items() if isinstance(values, tuple)]
+        if ranges:
+            raise ValueError(f"ranges need a random search (--random N): {', '.join(ranges)}")
+        return [dict(zip(parameters, values)) for values in itertools.product(*parameters.values())]
+
+    generator = random.Random(seed)
+    variants = []
+    for _ in range(samples):
+        variant = {}
+        for name, values in parameters.items():
+            if isinstance(values, list):
+                variant[name] = generator.choice(values)
+            elif isinstance(values[0], int) and isinstance(values[1], int):
+                variant[name] = generator.randint(*values)
+            else:
+                variant[name] = round(generator.uniform(*values), 4)
+        variants.append(variant)
+    return variants
+
+
+def write_config(base_path: str, game_name: str, variant: dict, path: str) -> int:
+    """
+    Function to write the config file of a variant: the base config with the values of the variant.
+    In game_2 the number of inputs follows pop_size (every AIBot sees the other ones).
+
+    Returns: number of obstacles matching the inputs of the variant
+    """
+    parser = configparser.ConfigParser()
+    parser.read(base_path)
+    num_obstacles = matching_obstacles(game_name, parser.getint("DefaultGenome", "num_inputs"),
+                                       parser.getint("NEAT", "pop_size"))
+    for name, value in variant.items():
+        section, _, option = name.rpartition(".")
+        sections = [section] if section else [section for section in parser.sections()
+                                              if parser.has_option(section, option)]
+        if len(sections) != 1 or not parser.has_option(sections[0], option):
+            raise ValueError(f"{name} is not an option of {base_path}")
+        parser.set(sections[0], option, str(value))
+    if game_name == "game_2" and "num_inputs" not in {name.rpartition(".")[2] for name in variant}:
+        parser.set("DefaultGenome", "num_inputs",
+                   str(2 * (parser.getint("NEAT", "pop_size") - 1) + 2 * num_obstacles))
+    with open(path, "w") as config_file:
+        parser.write(config_file)
+    return num_obstacles
+
+
+def run_trial(trial: dict, progress, budget: dict) -> dict:
+    """
+    Function to train a variant with a seed in this process (headless, output of the game hidden)
+    * param
+    :trial :{"trial": id, "seed": x, "game": name, "config_file": path, "num_obstacles": x, "variant": {...}}
+    :progress :shared {trial_id: best fitness so far at every generation}
+    :budget :{"generations", "max_ticks", "max_seconds", "grace_generations", "min_trials"}
+
+    Returns: row of the results table
+    """
+    import run_game
+    run_game.import_neat()
+
+    start = time.perf_counter()
+    reporter = TrialReporter(trial["trial"], progress, start + budget["max_seconds"],
+                             budget["grace_generations"], budget["min_trials"])
+    status = "done"
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                                        neat.DefaultSpeciesSet, neat.DefaultStagnation,
+                                        trial["config_file"])
+            random.seed(trial["seed"])
+            run_game.setup_game(headless_mode=True, num_obstacles=trial["num_obstacles"])
+            run_game.max_ticks_per_generation = budget["max_ticks"]
+            population = neat.Population(config)
+            population.add_reporter(reporter)
+            population.run(getattr(run_game, trial["game"]), budget["generations"])
+        except StopTrial as stop:
+            status = f"stopped ({stop})"
+        except Exception as error:
+            status = f"error ({type(error).__name__}: {error})"
+
+    return {
+        "trial": trial["trial"],
+        "seed": trial["seed"],
+        **trial["variant"],
+        "status": status,
+        "generations": len(reporter.history),
+        "best_fitness": reporter.history[-1] if reporter.history else None,
+        "last_mean_fitness": reporter.last_mean_fitness,
+        "seconds": round(time.perf_counter() - start, 2),
+        "config_file": trial["config_file"],
+    }
+
+
+def create_output_dir(output_dir: str) -> str:
+    """
+    Function to create the directory of a sweep (a new sub-directory per sweep)
+
+    Returns: path of the directory
+    """
+    path = os.path.join(output_dir, time.strftime("%Y%m%d-%H%M%S"))
+    run_number = 1
+    while os.path.exists(path):
+        run_number += 1
+        path = os.path.join(output_dir, time.strftime("%Y%m%d-%H%M%S") + f"-{run_number}")
+    os.makedirs(path)
+    return path
+
+
+def summarize(rows: List[dict], names: List[str]) -> None:
+    """
+    Function to print the mean best fitness of every variant over its seeds, the best first
+    """
+    variants: Dict[tuple, List[dict]] = {}
+    for row in rows:
+        variants.setdefault(tuple(row[name] for name in names), []).append(row)
+
+    def mean_best(variant_rows: List[dict]) -> float:
+        return statistics.mean(row["best_fitness"] if row["best_fitness"] is not None else float("-inf")
+                               for row in variant_rows)
+
+    widths = [max(12, len(name)) for name in names]
+    header = "  ".join(f"{name:>{width}}" for name, width in zip(names, widths))
+    print(f"{header}  {'mean best':>10} {'trials':>6} {'stopped':>7}")
+    for values, variant_rows in sorted(variants.items(), key=lambda item: mean_best(item[1]), reverse=True):
+        stopped = sum(row["status"] != "done" for row in variant_rows)
+        line = "  ".join(f"{str(value):>{width}}" for value, width in zip(values, widths))
+        print(f"{line}  {mean_best(variant_rows):>10.2f} {len(variant_rows):>6} {stopped:>7}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Function to run the sweep and write its results table
+
+    Returns: exit code (1 if a trial failed)
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--game", choices=list(GAMES_CONFIG), default="game_3",
+                        help="game to train the AIBots on (default: %(default)s)")
+    parser.add_argument("--config", help="base NEAT config file (default: the config of the game)")
+    parser.add_argument("--param", type=parse_parameter, action="append", required=True, metavar="NAME=VALUES",
+                        help="parameter of the config: NAME=A,B,C or NAME=LOW:HIGH for --random "
+                             "(can be repeated, e.g. --param pop_size=10,20 --param num_hidden=0,1)")
+    parser.add_argument("--random", type=int, default=0, metavar="N",
+                        help="draw N variants at random instead of every combination (default: grid)")
+    parser.add_argument("--sweep-seed", type=int, default=SEED,
+                        help="seed of the random search (default: %(default)s)")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[SEED],
+                        help="seeds of the trials of every variant (default: %(default)s)")
+    parser.add_argument("--generations", type=int, default=DEFAULT_GENERATIONS,
+                        help="maximum number of generations per trial (default: %(default)s)")
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS,
+                        help="maximum number of ticks per generation (default: %(default)s)")
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS,
+                        help="time budget of a trial, checked after every generation (default: %(default)s)")
+    parser.add_argument("--grace", type=int, default=DEFAULT_GRACE_GENERATIONS,
+                        help="generations before a trial can be stopped early (default: %(default)s)")
+    parser.add_argument("--min-trials", type=int, default=DEFAULT_MIN_TRIALS,
+                        help="other trials needed to stop a trial below their median, 0 to never stop early "
+                             "(default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of processes (default: the number of CPUs, %(default)s)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR,
+                        help="directory of the sweeps (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if sys.version_info < (3, 11):
+        # max_tasks_per_child of ProcessPoolExecutor
+        parser.error("the sweep needs Python 3.11 or newer to run every trial in a new process")
+
+    parameters = dict(args.param)
+    try:
+        variants = expand(parameters, args.random, args.sweep_seed)
+    except ValueError as error:
+        parser.error(str(error))
+    base_config = args.config or GAMES_CONFIG[args.game]
+    path = create_output_dir(args.output)
+
+    # the first trials cover as many variants as possible, so that the median rule compares variants
+    trials = []
+    for variant_id, variant in enumerate(variants):
+        config_file = os.path.join(path, f"variant-{variant_id:03d}.txt")
+        try:
+            num_obstacles = write_config(base_config, args.game, variant, config_file)
+        except ValueError as error:
+            parser.error(str(error))
+        trials.extend({"seed": seed, "game": args.game, "config_file": config_file, "num_obstacles": num_obstacles,
+                       "variant": variant, "variant_id": variant_id} for seed in args.seeds)
+    trials.sort(key=lambda trial: (args.seeds.index(trial["seed"]), trial["variant_id"]))
+    for trial_id, trial in enumerate(trials):
+        trial["trial"] = trial_id
+    budget = {"generations": args.generations, "max_ticks": args.max_ticks, "max_seconds": args.max_seconds,
+              "grace_generations": args.grace, "min_trials": args.min_trials}
+    print(f"Sweep of {len(variants)} variants x {len(args.seeds)} seeds on {args.game} "
+          f"with {args.workers} processes: {path}")
+
+    rows = []
+    # every trial runs in a new process: the globals of run_game, the class registries of the bodies
+    # and the random generator are never carried over from one trial to the next
+    executor = ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn"),
+                                   max_tasks_per_child=1)
+    with multiprocessing.Manager() as manager, executor:
+        progress = manager.dict()
+        futures = [executor.submit(run_trial, trial, progress, budget) for trial in trials]
+        for future in as_completed(futures):
+            row = future.result()
+            rows.append(row)
+            print(f"[{len(rows)}/{len(trials)}] trial {row['trial']}: {row['status']}, "
+                  f"best fitness {row['best_fitness']} after {row['generations']} generations "
+                  f"in {row['seconds']} s")
+
+    rows.sort(key=lambda row: row["trial"])
+    results_path = os.path.join(path, "results.csv")
+    with open(results_path, "w", newline="") as results_file:
+        writer = csv.DictWriter(results_file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    print()
+    summarize(rows, list(parameters))
+    print(f"Results saved to {results_path}")
+    return int(any(row["status"].startswith("error") for row in rows))
+
+
+# ============================================================
+# Run
+# ============================================================
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Fixtures shared by the tests: the bodies of the simulation
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import 3rd party modules
+import pytest
+
+# Import local modules
+from gamecore.player import AIBots, Obstacle, Player
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class Body:
+    """
+    Body stands for a body of the simulation with only the attributes given at creation
+    (hashable like the bodies of the games, which are keys of the inputs of the sensors)
+    """
+
+    def __init__(self, **attributes) -> None:
+        """
+        Function to create an instance of Body class
+        """
+        vars(self).update(attributes)
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+@pytest.fixture
+def make_bodies():
+    """
+    Fixture giving a function to create light bodies with the attributes read by the grids, the sensors
+    and the recorders (x, y, speed, angle, size)
+    """
+    def create(positions: list, size: float = 20.0) -> list:
+        """
+        Function to create a body at rest at every position (x, y) or (x, y, size)
+        """
+        return [Body(x=float(position[0]), y=float(position[1]), speed=0.0, angle=0.0,
+                     size=float(position[2]) if len(position) > 2 else size)
+                for position in positions]
+    return create
+
+
+@pytest.fixture
+def game_bodies() -> list:
+    """
+    Fixture creating a player, an obstacle and 2 AIBots in motion, as in a game
+    """
+    bodies = [Player((100, 450), size=100, mass=100), Obstacle((720, 450), size=30, mass=50),
+              AIBots((1340, 300), size=50, mass=50), AIBots((1340, 600), size=50, mass=50)]
+    for index, body in enumerate(bodies):
+        body.speed, body.angle = 1.5 + index, 0.25 * index
+    return bodies
@@ -0,0 +1,116 @@
+"""
+Tests of the genome archive: the genes packed by encode_genome() are decoded unchanged
+and the genomes stored in a GenomeArchive are loaded back
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import os
+import random
+
+# Import 3rd party modules
+import neat
+import pytest
+
+# Import local modules
+from gamecore.archive import GenomeArchive, decode_genome, encode_genome, structure_hash, unpack_genome
+
+
+# =====================================================================
+# Constants
+# =====================================================================
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), os.pardir, "gamecore", "config-feedforward-3.txt")
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+@pytest.fixture(scope="module")
+def config():
+    return neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                              neat.DefaultSpeciesSet, neat.DefaultStagnation, CONFIG_FILE)
+
+
+def create_genomes(config, number: int, mutations: int = 30) -> list:
+    """
+    Function to create genomes mutated many times (hidden nodes, disabled connections, random weights)
+    """
+    random.seed(number)
+    genomes = []
+    for key in range(1, number + 1):
+        genome = neat.DefaultGenome(key)
+        genome.configure_new(config.genome_config)
+        for _ in range(mutations):
+            genome.mutate(config.genome_config)
+        genome.fitness = random.uniform(-10, 100)
+        genomes.append(genome)
+    return genomes
+
+
+def genes(genome) -> tuple:
+    """
+    Function to list the genes of a genome with all their attributes
+    """
+    nodes = sorted((key, node.bias, node.response, node.activation, node.aggregation)
+                   for key, node in genome.nodes.items())
+    connections = sorted((key, connection.weight, connection.enabled)
+                         for key, connection in genome.connections.items())
+    return nodes, connections
+
+
+def test_encode_decode_round_trip(config):
+    for genome in create_genomes(config, 10):
+        data = encode_genome(genome)
+        decoded = decode_genome(data, genome.key)
+        assert decoded.key == genome.key
+        assert genes(decoded) == genes(genome)
+        assert structure_hash(decoded) == structure_hash(genome)
+        assert encode_genome(decoded) == data
+        assert decoded.distance(genome, config.genome_config) == 0
+
+
+def test_decoded_genome_gives_the_same_network(config):
+    genome = create_genomes(config, 1)[0]
+    network = neat.nn.FeedForwardNetwork.create(genome, config)
+    decoded_network = neat.nn.FeedForwardNetwork.create(decode_genome(encode_genome(genome)), config)
+    inputs = [0.5 * index for index in range(config.genome_config.num_inputs)]
+    assert decoded_network.activate(inputs) == network.activate(inputs)
+
+
+def test_unpack_rejects_other_data():
+    with pytest.raises(ValueError):
+        unpack_genome(b"XX" + bytes(10))
+
+
+def test_archive_round_trip(config, tmp_path):
+    genomes = create_genomes(config, 6)
+    archive = GenomeArchive(str(tmp_path / "genomes.sqlite"))
+    run_id = archive.start_run("game_3", CONFIG_FILE, 3, config.genome_config.num_inputs,
+                               config.genome_config.num_outputs, {"sensors": "distances"})
+    archive.add(run_id, 0, genomes[:3])
+    archive.add(run_id, 1, genomes[3:] + genomes[:1])  # the 1st genome is kept in the next generation
+
+    rows = archive.best(game="game_3", limit=10)
+    assert len(rows) == 7
+    assert [row["fitness"] for row in rows] == sorted((genome.fitness for genome in genomes + genomes[:1]),
+                                                      reverse=True)
+    assert len(archive.best(run_id=run_id, distinct=True, limit=10)) == 6
+    assert archive.best(game="game_1") == []
+
+    by_key = {genome.key: genome for genome in genomes}
+    for row in rows:
+        genome = by_key[row["genome_key"]]
+        assert genes(archive.load(row["id"], genome.key)) == genes(genome)
+        assert row["structure_hash"] == structure_hash(genome)
+        assert (row["num_nodes"], row["num_connections"]) == (len(genome.nodes), len(genome.connections))
+
+    same = archive.compare(rows[0]["id"], rows[0]["id"])
+    assert same["weight_difference"] == 0.0
+    assert same["connections"][0] == same["connections"][2]
+    with pytest.raises(KeyError):
+        archive.data(1000)
+    archive.close()
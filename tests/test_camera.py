@@ -0,0 +1,68 @@
+"""
+Tests of the Camera class: the world and screen coordinates map both ways and the view stays inside the world
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import 3rd party modules
+import pytest
+
+# Import local modules
+from gamecore.camera import Camera
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def test_fit_shows_the_whole_world():
+    camera = Camera((3000, 2000), (1500, 1200))
+    assert camera.zoom == 0.5
+    assert camera.visible_rect() == (0.0, 0.0, 3000.0, 2400.0)
+
+    small = Camera((800, 600), (1500, 1000))
+    assert small.zoom == 1.0
+    assert small.world_to_screen((800, 600)) == (800.0, 600.0)
+
+
+def test_world_screen_round_trip():
+    camera = Camera((3000, 2000), (1500, 1000))
+    camera.zoom_at(3.0, (400, 300))
+    camera.pan(250, -40)
+    for xy_world in [(0, 0), (1234.5, 876.25), (3000, 2000)]:
+        assert camera.screen_to_world(camera.world_to_screen(xy_world)) == pytest.approx(xy_world)
+    left, top, right, bottom = camera.visible_rect()
+    assert camera.world_to_screen((left, top)) == pytest.approx((0, 0))
+    assert camera.world_to_screen((right, bottom)) == pytest.approx((1500, 1000))
+
+
+def test_zoom_keeps_the_point_under_the_cursor():
+    camera = Camera((3000, 2000), (1500, 1000))
+    xy_world = camera.screen_to_world((600, 450))
+    camera.zoom_at(2.0, (600, 450))
+    assert camera.zoom == 1.0
+    camera.zoom_at(1.5, (600, 450))
+    assert camera.screen_to_world((600, 450)) == pytest.approx(xy_world)
+
+
+def test_zoom_is_limited():
+    camera = Camera((3000, 2000), (1500, 1000), min_zoom=0.25, max_zoom=4.0)
+    camera.zoom_at(100.0, (0, 0))
+    assert camera.zoom == 4.0
+    camera.zoom_at(0.001, (0, 0))
+    assert camera.zoom == 0.25
+
+
+def test_view_stays_inside_the_world():
+    camera = Camera((3000, 2000), (1500, 1000))
+    camera.zoom_at(2.0, (0, 0))
+    camera.pan(-500, -500)
+    assert (camera.left, camera.top) == (0.0, 0.0)
+    camera.pan(10 ** 6, 10 ** 6)
+    assert camera.visible_rect()[2:] == pytest.approx((3000, 2000))
+
+    camera.center_on(1500, 1000)
+    assert camera.world_to_screen((1500, 1000)) == pytest.approx((750, 500))
+    camera.resize((6000, 4000))
+    assert (camera.left, camera.top) == (0.0, 0.0)
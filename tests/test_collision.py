@@ -0,0 +1,116 @@
+"""
+Tests of the MaskCache and SpriteCollider classes: the masks of the images are built from the decoded disk cache
+and the bounding circle and rect early-outs never change the result of the mask test
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import os
+import random
+
+# Import 3rd party modules
+import pygame
+
+# Import local modules
+from gamecore.assets import AssetManager
+from gamecore.collision import MaskCache, SpriteCollider
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def l_shaped_mask() -> pygame.mask.Mask:
+    """
+    Function to create the mask of an L (2 bars 10 pixels wide) at the top left of a 100 x 100 image:
+    the opaque rect is 60 x 60 and its bottom right corner is transparent
+    """
+    mask = pygame.mask.Mask((100, 100))
+    mask.draw(pygame.mask.Mask((60, 10), fill=True), (0, 0))
+    mask.draw(pygame.mask.Mask((10, 60), fill=True), (0, 0))
+    return mask
+
+
+def mask_overlap(collider: SpriteCollider, x: float, y: float, radius: float, mask_cache: MaskCache) -> bool:
+    """
+    Function to test the overlap of the masks without the early-outs
+    """
+    circle_mask = mask_cache.circle(radius)
+    circle_radius = circle_mask.get_size()[0] // 2
+    offset = (int(x) - circle_radius - collider.x, int(y) - circle_radius - collider.y)
+    return collider.mask.overlap(circle_mask, offset) is not None
+
+
+def test_collider_bounds_the_opaque_pixels():
+    collider = SpriteCollider(l_shaped_mask(), (200, 100))
+    assert collider.rect == pygame.Rect(200, 100, 60, 60)
+    assert (collider.center_x, collider.center_y) == (230, 130)
+    collider.move_to((-40.7, 12.2))
+    assert collider.rect == pygame.Rect(-40, 12, 60, 60)
+
+
+def test_far_body_stops_at_the_bounding_circle():
+    collider, mask_cache = SpriteCollider(l_shaped_mask(), (200, 100)), MaskCache()
+    assert not collider.collide_circle(600, 600, 10, mask_cache)
+    assert (collider.circle_rejects, collider.rect_rejects, collider.mask_tests) == (1, 0, 0)
+
+
+def test_body_beside_the_rect_stops_at_the_bounding_rect():
+    # within the bounding circle (radius 42.4 around 230, 130) but above the opaque rect
+    collider, mask_cache = SpriteCollider(l_shaped_mask(), (200, 100)), MaskCache()
+    assert not collider.collide_circle(205, 92, 5, mask_cache)
+    assert (collider.circle_rejects, collider.rect_rejects, collider.mask_tests) == (0, 1, 0)
+
+
+def test_body_in_the_rect_is_tested_by_the_masks():
+    collider, mask_cache = SpriteCollider(l_shaped_mask(), (200, 100)), MaskCache()
+    assert collider.collide_circle(205, 145, 3, mask_cache)  # on the vertical bar
+    assert not collider.collide_circle(245, 145, 5, mask_cache)  # in the transparent corner of the L
+    assert (collider.circle_rejects, collider.rect_rejects, collider.mask_tests) == (0, 0, 2)
+
+
+def test_early_outs_match_the_masks():
+    collider, mask_cache = SpriteCollider(l_shaped_mask(), (200, 100)), MaskCache()
+    generator = random.Random(1)
+    for _ in range(2000):
+        x, y, radius = generator.uniform(100, 360), generator.uniform(0, 260), generator.randint(1, 40)
+        assert collider.collide_circle(x, y, radius, mask_cache) == mask_overlap(collider, x, y, radius, mask_cache)
+    assert collider.circle_rejects and collider.rect_rejects and collider.mask_tests
+
+
+def test_empty_mask_never_collides():
+    collider, mask_cache = SpriteCollider(pygame.mask.Mask((50, 50)), (0, 0)), MaskCache()
+    assert collider.rect.size == (0, 0)
+    assert not any(collider.collide_circle(x, 25, 30, mask_cache) for x in range(-50, 100, 10))
+
+
+def test_circle_masks_are_cached():
+    mask_cache = MaskCache()
+    mask = mask_cache.circle(12.7)
+    assert mask.get_size() == (24, 24)
+    assert mask_cache.circle(12) is mask
+    assert mask.get_at((12, 12)) and not mask.get_at((0, 0))
+
+
+def test_masks_of_images_use_the_decoded_disk_cache(tmp_path, monkeypatch):
+    image = pygame.Surface((40, 20), pygame.SRCALPHA)
+    pygame.draw.rect(image, (255, 0, 0, 255), (0, 0, 10, 20))  # opaque at the left only
+    path = str(tmp_path / "sprite.png")
+    pygame.image.save(image, path)
+    cache_dir = str(tmp_path / "cache")
+
+    mask_cache = MaskCache(AssetManager(cache_dir=cache_dir))
+    mask = mask_cache.mask(path, (80, 40))
+    flipped = mask_cache.mask(path, (80, 40), flip_x=True)
+    assert mask_cache.mask(path, (80, 40)) is mask
+    assert mask.get_size() == (80, 40) and mask.count() == 20 * 40
+    assert mask.get_bounding_rects() == [pygame.Rect(0, 0, 20, 40)]
+    assert flipped.get_bounding_rects() == [pygame.Rect(60, 0, 20, 40)]
+    assert len(os.listdir(cache_dir)) == 1
+
+    # a new launch decodes the pixels kept in the disk cache instead of the PNG file
+    monkeypatch.setattr(pygame.image, "load", None)
+    cached = MaskCache(AssetManager(cache_dir=cache_dir)).mask(path, (80, 40))
+    assert cached.get_bounding_rects() == [pygame.Rect(0, 0, 20, 40)]
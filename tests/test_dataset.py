@@ -0,0 +1,100 @@
+"""
+Tests of the trajectory datasets: the rows written by a TrajectoryWriter are read back by a TrajectoryDataset
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+from array import array
+
+# Import 3rd party modules
+import pytest
+
+# Import local modules
+from gamecore.dataset import STATE_COLUMNS, TrajectoryDataset, TrajectoryWriter
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def read_column(dataset: TrajectoryDataset, name: str) -> list:
+    """
+    Function to copy a column of a dataset (the memoryview is released so that the dataset can be closed)
+    """
+    with dataset.column(name) as view:
+        return view.tolist()
+
+
+def as_float32(values: list) -> list:
+    """
+    Function to round values as the float columns store them
+    """
+    return array("f", values).tolist()
+
+
+def write_rows(writer: TrajectoryWriter, make_bodies, num_ticks: int) -> list:
+    """
+    Function to write the rows of 2 AIBots deciding every other tick
+
+    Returns: list of the rows written (generation, tick, genome_id, x, y, speed, angle, fitness, inputs, outputs)
+    """
+    aibots = make_bodies([(10.0, 20.0), (30.0, 40.0)])
+    for index, aibot in enumerate(aibots, 1):
+        aibot.speed, aibot.angle = float(index), index - 0.5
+    rows = []
+    last_inputs = {}
+    for tick in range(num_ticks):
+        for genome_id, aibot in enumerate(aibots, 1):
+            aibot.x += 1.1
+            aibot.y -= 0.3
+            inputs = [tick * 0.1, genome_id * 2.0, -1.0] if tick % 2 == 0 else None
+            if inputs is not None:
+                last_inputs[genome_id] = inputs
+            outputs = [0.25 * genome_id, 1.0, 0.0, 0.5]
+            fitness = tick / 7
+            writer.record(3, tick, genome_id, aibot, inputs, outputs, fitness)
+            rows.append((3, tick, genome_id, aibot.x, aibot.y, aibot.speed, aibot.angle, fitness,
+                         last_inputs[genome_id], outputs))
+    return rows
+
+
+def test_dataset_round_trip(tmp_path, make_bodies):
+    writer = TrajectoryWriter(output_dir=str(tmp_path), chunk_rows=4)
+    rows = write_rows(writer, make_bodies, num_ticks=9)
+    writer.close()
+
+    dataset = TrajectoryDataset(writer.path)
+    assert dataset.rows == len(rows) == 18
+    assert [name for name, _ in STATE_COLUMNS] == list(dataset.typecodes)[:len(STATE_COLUMNS)]
+    for index, (name, _) in enumerate(STATE_COLUMNS):
+        expected = [row[index] for row in rows]
+        assert read_column(dataset, name) == (expected if index < 3 else as_float32(expected))
+    for index in range(3):
+        assert read_column(dataset, f"input_{index}") == as_float32([row[8][index] for row in rows])
+    for index in range(4):
+        assert read_column(dataset, f"output_{index}") == as_float32([row[9][index] for row in rows])
+    dataset.close()
+
+
+def test_dataset_read_while_written(tmp_path, make_bodies):
+    writer = TrajectoryWriter(output_dir=str(tmp_path), chunk_rows=4)
+    write_rows(writer, make_bodies, num_ticks=3)
+
+    # only the chunks already flushed are seen (6 rows written, 4 flushed)
+    dataset = TrajectoryDataset(writer.path)
+    assert dataset.rows == 4
+    assert read_column(dataset, "tick") == [0, 0, 1, 1]
+    dataset.close()
+    writer.close()
+    assert TrajectoryDataset(writer.path).rows == 6
+
+
+def test_record_rejects_another_number_of_inputs(tmp_path, make_bodies):
+    writer = TrajectoryWriter(output_dir=str(tmp_path))
+    aibot, = make_bodies([(0.0, 0.0)])
+    writer.record(0, 0, 1, aibot, [1.0, 2.0], [0.0], 0.0)
+    with pytest.raises(ValueError):
+        writer.record(0, 1, 1, aibot, [1.0, 2.0, 3.0], [0.0], 0.0)
+    writer.close()
@@ -0,0 +1,131 @@
+"""
+Tests of the DecisionScheduler class: the decisions are staggered over the interval
+and the adaptive mode tunes the interval to the duration of the ticks
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+from types import SimpleNamespace
+
+# Import local modules
+from gamecore.decision import DecisionScheduler
+from gamecore.player import AIBots
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class FakeClock:
+    """
+    FakeClock stands for time.perf_counter(): every tick lasts the time set by the test.
+    It has 1 attribute: tick_s
+    * tick_s: duration of the next ticks in seconds
+    """
+
+    def __init__(self, tick_s: float) -> None:
+        """
+        Function to create an instance of FakeClock class
+        """
+        self.tick_s = tick_s
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        """
+        Function to read the clock: every read moves it by tick_s (from the start to the end of a tick)
+        """
+        self.now += self.tick_s
+        return self.now
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def create_aibots(number: int) -> list:
+    """
+    Function to create AIBots that already have an output (they decide at their phase only)
+    """
+    aibots = [AIBots((100 * index, 300), size=50, mass=50) for index in range(number)]
+    for aibot in aibots:
+        aibot.last_output = [0.0, 0.0, 0.0, 0.0]
+    return aibots
+
+
+def run_ticks(scheduler: DecisionScheduler, aibots: list, num_ticks: int) -> list:
+    """
+    Function to run ticks of the scheduler
+
+    Returns: list of the AIBots deciding at every tick
+    """
+    deciding = []
+    for _ in range(num_ticks):
+        scheduler.start_tick()
+        deciding.append([aibot for aibot in aibots if scheduler.decide(aibot)])
+        scheduler.end_tick()
+    return deciding
+
+
+def test_every_tick_by_default():
+    aibots = create_aibots(5)
+    assert run_ticks(DecisionScheduler(), aibots, 4) == [aibots] * 4
+
+
+def test_aibot_without_output_decides():
+    scheduler = DecisionScheduler(interval=4)
+    aibot, = create_aibots(1)
+    aibot.last_output = None
+    assert run_ticks(scheduler, [aibot], 4) == [[aibot]] * 4
+    assert aibot.decision_phase is None
+
+
+def test_decisions_are_staggered():
+    scheduler = DecisionScheduler(interval=3)
+    aibots = create_aibots(7)
+    deciding = run_ticks(scheduler, aibots, 9)
+    assert [aibot.decision_phase for aibot in aibots] == list(range(7))
+    # about 1/3 of the AIBots decide at every tick, each one every 3 ticks
+    assert [len(tick_aibots) for tick_aibots in deciding] == [2, 2, 3] * 3
+    for aibot in aibots:
+        ticks = [tick for tick, tick_aibots in enumerate(deciding, 1) if aibot in tick_aibots]
+        assert len(ticks) == 3 and ticks[1] - ticks[0] == ticks[2] - ticks[1] == 3
+
+
+def test_start_generation_restarts_the_phases():
+    scheduler = DecisionScheduler(interval=2)
+    run_ticks(scheduler, create_aibots(3), 5)
+    scheduler.start_generation()
+    aibots = create_aibots(2)
+    assert scheduler.tick == 0
+    run_ticks(scheduler, aibots, 1)
+    assert [aibot.decision_phase for aibot in aibots] == [0, 1]
+
+
+def test_adaptive_interval_grows_and_shrinks(monkeypatch):
+    clock = FakeClock(tick_s=0.010)
+    monkeypatch.setattr("gamecore.decision.time", SimpleNamespace(perf_counter=clock))
+    scheduler = DecisionScheduler(interval=2, adaptive=True, max_interval=5, target_tick_s=0.004)
+    aibots = create_aibots(4)
+
+    intervals = []
+    for _ in range(100):
+        run_ticks(scheduler, aibots, 1)
+        intervals.append(scheduler.interval)
+    assert intervals[-1] == 5
+    assert all(0 <= after - before <= 1 for before, after in zip(intervals, intervals[1:]))
+
+    clock.tick_s = 0.0
+    for _ in range(200):
+        run_ticks(scheduler, aibots, 1)
+        intervals.append(scheduler.interval)
+    assert intervals[-1] == 2
+    assert min(intervals) == 2 and max(intervals) == 5
+
+
+def test_not_adaptive_keeps_the_interval(monkeypatch):
+    monkeypatch.setattr("gamecore.decision.time", SimpleNamespace(perf_counter=FakeClock(tick_s=1.0)))
+    scheduler = DecisionScheduler(interval=2)
+    run_ticks(scheduler, create_aibots(2), 50)
+    assert scheduler.interval == 2
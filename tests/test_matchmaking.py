@@ -0,0 +1,122 @@
+"""
+Tests of the MatchScheduler class: the pairings of every mode and the Elo ratings of the matches
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+from types import SimpleNamespace
+
+# Import 3rd party modules
+import pytest
+
+# Import local modules
+from gamecore.matchmaking import MatchScheduler
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        MatchScheduler("knockout")
+
+
+def test_round_robin_pairs_every_genome_once():
+    scheduler = MatchScheduler("round-robin")
+    scheduler.start_generation([3, 1, 2, 4])
+    pairs = scheduler.pairings()
+    assert pairs == [(1, 2), (3, 1), (1, 4), (3, 2), (2, 4), (4, 3)]
+    assert sorted(tuple(sorted(pair)) for pair in pairs) == [(1, 2), (1, 3), (1, 4), (2, 3), (2, 4), (3, 4)]
+    assert scheduler.num_rounds() == 1
+
+
+def test_swiss_pairs_close_ratings_without_rematch():
+    scheduler = MatchScheduler("swiss", rounds=2)
+    scheduler.start_generation([1, 2, 3, 4])
+    assert scheduler.num_rounds() == 2
+    pairs = scheduler.pairings()
+    assert pairs == [(1, 2), (4, 3)]
+
+    # the left genomes win: 1 and 4 lead with the same rating and meet in the next round
+    scheduler.update(pairs, [1.0, 1.0])
+    assert scheduler.ratings == {1: 1016.0, 2: 984.0, 3: 984.0, 4: 1016.0}
+    assert scheduler.pairings() == [(1, 4), (3, 2)]
+
+
+def test_swiss_with_an_odd_number_of_genomes():
+    scheduler = MatchScheduler("swiss")
+    scheduler.start_generation([1, 2, 3])
+    pairs = scheduler.pairings()
+    assert pairs == [(1, 2)]
+
+
+def test_elo_update():
+    scheduler = MatchScheduler("round-robin")
+    scheduler.start_generation([1, 2])
+    scheduler.update([(1, 2)], [0.5])
+    assert scheduler.ratings == {1: 1000.0, 2: 1000.0}
+
+    scheduler.ratings = {1: 1400.0, 2: 1000.0}
+    scheduler.update([(1, 2)], [1.0])
+    expected = 1 / (1 + 10 ** (-400 / 400))
+    assert scheduler.ratings[1] == pytest.approx(1400 + 32 * (1 - expected))
+    assert scheduler.ratings[2] == pytest.approx(1000 - 32 * (1 - expected))
+
+
+def test_round_ratings_do_not_depend_on_the_order_of_the_matches():
+    pairs, scores = [(1, 2), (3, 1), (2, 3), (4, 1)], [1.0, 0.5, 0.0, 1.0]
+    ratings = []
+    for order in (slice(None), slice(None, None, -1)):
+        scheduler = MatchScheduler("round-robin")
+        scheduler.start_generation([1, 2, 3, 4])
+        scheduler.ratings[4] = 1100.0
+        scheduler.update(pairs[order], scores[order])
+        ratings.append(scheduler.ratings)
+    assert ratings[0] == pytest.approx(ratings[1])
+    assert sum(ratings[0].values()) == pytest.approx(4100.0)
+
+
+def test_start_generation_keeps_the_ratings_of_the_survivors():
+    scheduler = MatchScheduler("round-robin", initial_rating=1200.0)
+    scheduler.start_generation([1, 2])
+    scheduler.update([(1, 2)], [1.0])
+    scheduler.start_generation([2, 5])
+    assert scheduler.ratings == {2: 1184.0, 5: 1200.0}
+
+
+def test_hall_of_fame():
+    scheduler = MatchScheduler("hall-of-fame", hall_of_fame_size=2)
+    genomes = {key: SimpleNamespace(key=key) for key in range(1, 7)}
+
+    # first generation: no champion yet, the genomes meet each other
+    scheduler.start_generation([1, 2])
+    assert scheduler.pairings() == [(1, 2)]
+    scheduler.update([(1, 2)], [0.0])
+    scheduler.end_generation(genomes)
+    champion, rating = scheduler.hall_of_fame[0]
+    assert (champion.key, rating) == (2, 1016.0)
+    assert champion is not genomes[2]
+
+    # the next genomes meet the champions, whose rating does not change
+    scheduler.start_generation([3, 4])
+    pairs = scheduler.pairings()
+    assert pairs == [(3, -1), (-1, 4)]
+    scheduler.update(pairs, [1.0, 1.0])
+    assert scheduler.rating(-1) == 1016.0
+    assert scheduler.ratings[3] > 1000.0 > scheduler.ratings[4]
+
+    # the oldest champion is dropped
+    for keys in ([3, 4], [5, 6]):
+        scheduler.start_generation(keys)
+        scheduler.end_generation(genomes)
+    assert [champion.key for champion, _ in scheduler.hall_of_fame] == [3, 5]
+
+
+def test_other_modes_have_no_hall_of_fame():
+    scheduler = MatchScheduler("swiss")
+    scheduler.start_generation([1, 2])
+    scheduler.end_generation({1: SimpleNamespace(key=1), 2: SimpleNamespace(key=2)})
+    assert scheduler.hall_of_fame == []
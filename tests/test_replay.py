@@ -0,0 +1,128 @@
+"""
+Tests of the replay files: what a ReplayRecorder writes is read back by a ReplayPlayer
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import local modules
+from gamecore.replay import KEY_LEFT, KEY_READ, KEY_UP, ReplayPlayer, ReplayRecorder, output_mask
+
+
+# =====================================================================
+# Classes
+# =====================================================================
+
+class ScriptedNetwork:
+    """
+    ScriptedNetwork stands for the neural network of an AIBot: it gives the outputs of a script, 1 per call.
+    It has 1 attribute: outputs
+    * outputs: list of the outputs to give
+    """
+
+    def __init__(self, outputs: list) -> None:
+        """
+        Function to create an instance of ScriptedNetwork class
+        """
+        self.outputs = outputs
+        self.calls: int = 0
+
+    def activate(self, inputs: list) -> list:
+        """
+        Function to give the next output of the script
+        """
+        output = self.outputs[self.calls % len(self.outputs)]
+        self.calls += 1
+        return output
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def positions(bodies: list) -> list:
+    """
+    Function to list the state of the bodies stored in a keyframe
+    """
+    return [(body.x, body.y, body.speed, body.angle) for body in bodies]
+
+
+def in_a_row(number: int) -> list:
+    """
+    Function to list the positions of bodies in a row
+    """
+    return [(100.0 * index, 50.0) for index in range(number)]
+
+
+def record_generation(output_dir: str, make_bodies, num_ticks: int = 10):
+    """
+    Function to record a generation of 3 AIBots (the 3rd one dies at tick 6) and 2 other bodies
+
+    Returns: (path of the replay, keys, time steps, output masks and states recorded at every tick)
+    """
+    recorder = ReplayRecorder(output_dir=output_dir, keyframe_interval=4)
+    scripts = [[[1.0, 0.0, 0.0, 0.0]], [[0.0, 0.9, 0.0, 0.0], [0.0, 0.2, 0.7, 0.0]], [[0.0, 0.0, 0.0, 1.0]]]
+    networks = [recorder.network(ScriptedNetwork(script)) for script in scripts]
+    slots, bodies = make_bodies(in_a_row(3)), make_bodies(in_a_row(2))
+    path = recorder.start({"game": "game_1", "generation": 7, "genome_ids": [11, 12, 13]}, slots, bodies, (0.0,))
+
+    aibots = list(slots)
+    recorded = {"keys": [0], "dt_s": [recorder.fixed_dt_s], "masks": [None], "states": [positions(bodies + slots)]}
+    time_s = 0.0
+    for ticks in range(1, num_ticks + 1):
+        keys = KEY_READ | (KEY_LEFT if ticks % 2 else KEY_UP) if ticks % 3 else 0
+        dt_s = [recorder.fixed_dt_s, 0.016, 0.0123456][ticks % 3]
+        recorder.tick(dt_s, keys)
+        if ticks == 6:
+            aibots.remove(slots[2])
+        masks = []
+        for network, aibot in zip(networks, slots):
+            masks.append(output_mask(network.activate([])))
+            if aibot in aibots:
+                aibot.x += masks[-1] + 0.5
+                aibot.speed, aibot.angle = ticks / 3, ticks / 7
+        for body in bodies:
+            body.y -= 1.25
+        time_s += dt_s
+        recorder.end_tick(ticks, aibots, (time_s,))
+        recorded["keys"].append(keys)
+        recorded["dt_s"].append(dt_s)
+        recorded["masks"].append(masks)
+        recorded["states"].append(positions(bodies + slots))
+    recorder.close()
+    return path, recorded
+
+
+def test_replay_round_trip(tmp_path, make_bodies):
+    path, recorded = record_generation(str(tmp_path), make_bodies)
+    replay = ReplayPlayer(path)
+    assert (replay.game, replay.generation, replay.num_ticks) == ("game_1", 7, 10)
+    assert [genome.key for _, genome in replay.genomes()] == [11, 12, 13]
+    assert sorted(replay.keyframes) == [0, 4, 8]
+
+    networks = [replay.network() for _ in range(3)]
+    for ticks in range(1, replay.num_ticks + 1):
+        dt_s, keys = replay.tick(ticks)
+        assert (dt_s, keys) == (recorded["dt_s"][ticks], recorded["keys"][ticks])
+        # the networks give back the recorded outputs (1 bit per output > 0.5)
+        assert [output_mask(network.activate([])) for network in networks] == recorded["masks"][ticks]
+
+
+def test_replay_seek_restores_the_keyframe(tmp_path, make_bodies):
+    path, recorded = record_generation(str(tmp_path), make_bodies)
+    replay = ReplayPlayer(path)
+    slots, bodies = make_bodies(in_a_row(3)), make_bodies(in_a_row(2))
+
+    replay.seek(6)
+    ticks, values, alive = replay.start(slots, bodies)
+    assert (ticks, replay.target_tick) == (4, 6)
+    assert values == (sum(recorded["dt_s"][1:5]),)
+    assert alive == [True, True, True]
+    assert positions(bodies + slots) == recorded["states"][4]
+
+    replay.seek(100)
+    ticks, values, alive = replay.start(slots, bodies)
+    assert (ticks, replay.target_tick) == (8, 10)
+    assert alive == [True, True, False]
+    assert positions(bodies + slots) == recorded["states"][8]
+    assert list(replay.masks) == recorded["masks"][8]
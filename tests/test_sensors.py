@@ -0,0 +1,86 @@
+"""
+Tests of the RaySensor class: the rays walked through the grid (DDA) hit the same bodies as a brute force search
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import math
+import random
+from types import SimpleNamespace
+
+# Import 3rd party modules
+import pytest
+
+# Import local modules
+from gamecore.sensors import RaySensor
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def brute_force_cast(bodies: list, x: float, y: float, dx: float, dy: float, max_distance: float,
+                     exclude=None) -> float:
+    """
+    Function to find the distance to the first body hit by a ray by testing every body
+    """
+    best = max_distance
+    for body in bodies:
+        if body is exclude:
+            continue
+        mx, my = x - body.x, y - body.y
+        b = mx * dx + my * dy
+        c = mx * mx + my * my - body.size * body.size
+        discriminant = b * b - c
+        if discriminant < 0 or (c > 0 and b > 0):
+            continue
+        best = min(best, max(0.0, -b - math.sqrt(discriminant)))
+    return best
+
+
+def test_num_inputs():
+    sensor = RaySensor(num_rays=12)
+    assert sensor.num_inputs() == 16
+    assert sensor.num_inputs(player=False) == 14
+    assert sensor.directions[0] == (1.0, 0.0)
+    assert sensor.directions[3] == pytest.approx((0.0, 1.0))
+
+
+def test_rays_hit_the_nearest_body(make_bodies):
+    aibot, near, far, behind = make_bodies([(100, 500, 10), (400, 500, 50), (800, 500, 50), (0, 500, 20)])
+    sensor = RaySensor(num_rays=4, ray_range=1000.0)
+    sensor.rebuild([aibot, near, far, behind])
+    assert sensor.cast(100, 500, 1.0, 0.0, 1000.0, exclude=aibot) == pytest.approx(250.0)
+    assert sensor.cast(100, 500, -1.0, 0.0, 1000.0, exclude=aibot) == pytest.approx(80.0)
+    assert sensor.cast(100, 500, 0.0, 1.0, 1000.0, exclude=aibot) == 1000.0
+    # a ray starting inside a body sees it at distance 0
+    assert sensor.cast(400, 500, 0.0, -1.0, 1000.0) == 0.0
+
+
+def test_rays_stop_at_their_range_and_at_the_walls(make_bodies):
+    aibot, obstacle = make_bodies([(100, 300, 10), (500, 300, 50)])
+    world = SimpleNamespace(width=1000, height=400)
+    sensor = RaySensor(num_rays=4, ray_range=200.0)
+    inputs = sensor.sense([aibot], [obstacle], world=world)[aibot]
+    # x, y, then the rays: right (obstacle beyond the range), down (wall), left (wall), up (range)
+    assert inputs == pytest.approx([100, 300, 200.0, 100.0, 100.0, 200.0])
+
+    player, = make_bodies([(100, 150, 30)])
+    inputs = RaySensor(num_rays=4, ray_range=1000.0).sense([aibot], [obstacle], player=player, world=world)[aibot]
+    assert inputs == pytest.approx([100, 300, 0, -150, 350.0, 100.0, 100.0, 120.0])
+
+
+@pytest.mark.parametrize("number, seed", [(1, 1), (30, 2), (300, 3)])
+def test_dda_matches_brute_force(number, seed, make_bodies):
+    generator = random.Random(seed)
+    bodies = make_bodies([(generator.uniform(0, 3000), generator.uniform(0, 2000), generator.uniform(5, 80))
+                          for _ in range(number)])
+    sensor = RaySensor(num_rays=16, ray_range=900.0)
+    sensor.rebuild(bodies)
+    for _ in range(50):
+        x, y = generator.uniform(-100, 3100), generator.uniform(-100, 2100)
+        for dx, dy in sensor.directions:
+            expected = brute_force_cast(bodies, x, y, dx, dy, sensor.ray_range)
+            assert sensor.cast(x, y, dx, dy, sensor.ray_range) == pytest.approx(expected)
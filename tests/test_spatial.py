@@ -0,0 +1,88 @@
+"""
+Tests of the SpatialGrid class: the queries give the same bodies as a brute force search
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import random
+
+# Import 3rd party modules
+import pytest
+
+# Import local modules
+from gamecore.spatial import SpatialGrid
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def random_positions(number: int, seed: int) -> list:
+    """
+    Function to draw random positions and sizes of bodies (some outside of the world, as bodies pushed
+    by a collision)
+
+    Returns: list of (x, y, size)
+    """
+    generator = random.Random(seed)
+    return [(generator.uniform(-200, 3000), generator.uniform(-200, 2000), generator.uniform(5, 60))
+            for _ in range(number)]
+
+
+def squared_distance(body, x: float, y: float) -> float:
+    """
+    Function to compute the squared distance from the center of a body to a point
+    """
+    return (body.x - x) ** 2 + (body.y - y) ** 2
+
+
+@pytest.mark.parametrize("number, cell_size", [(1, 100.0), (50, 100.0), (500, 200.0), (500, 37.5)])
+def test_nearest_matches_brute_force(number, cell_size, make_bodies):
+    bodies = make_bodies(random_positions(number, seed=number))
+    grid = SpatialGrid(cell_size)
+    grid.rebuild(bodies)
+    generator = random.Random(1)
+    for _ in range(100):
+        x, y = generator.uniform(-500, 3500), generator.uniform(-500, 2500)
+        k = generator.randint(1, 8)
+        expected = sorted(squared_distance(body, x, y) for body in bodies)[:k]
+        found = grid.nearest(x, y, k)
+        assert [squared_distance(body, x, y) for body in found] == expected
+
+
+def test_nearest_excludes_a_body(make_bodies):
+    bodies = make_bodies(random_positions(200, seed=2))
+    grid = SpatialGrid()
+    grid.rebuild(bodies)
+    for body in bodies[:20]:
+        found = grid.nearest(body.x, body.y, 3, exclude=body)
+        others = [other for other in bodies if other is not body]
+        expected = sorted(squared_distance(other, body.x, body.y) for other in others)[:3]
+        assert body not in found
+        assert [squared_distance(other, body.x, body.y) for other in found] == expected
+
+
+def test_nearest_of_an_empty_grid(make_bodies):
+    grid = SpatialGrid()
+    grid.rebuild([])
+    assert grid.nearest(0, 0, 3) == []
+    grid.rebuild(make_bodies(random_positions(5, seed=3)))
+    assert grid.nearest(0, 0, 0) == []
+    assert len(grid.nearest(0, 0, 10)) == 5
+
+
+def test_query_rect_matches_brute_force(make_bodies):
+    bodies = make_bodies(random_positions(500, seed=4))
+    grid = SpatialGrid()
+    grid.rebuild(bodies)
+    generator = random.Random(5)
+    for _ in range(50):
+        left, top = generator.uniform(-500, 3000), generator.uniform(-500, 2000)
+        right, bottom = left + generator.uniform(0, 1500), top + generator.uniform(0, 1000)
+        expected = [body for body in bodies
+                    if body.x + body.size >= left and body.x - body.size <= right
+                    and body.y + body.size >= top and body.y - body.size <= bottom]
+        found = grid.query_rect(left, top, right, bottom)
+        assert sorted(map(id, found)) == sorted(map(id, expected))
@@ -0,0 +1,120 @@
+"""
+Tests of the WorldState class: the captured state of the bodies and of the decision scheduler comes back unchanged
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import random
+
+# Import 3rd party modules
+import pytest
+
+# Import local modules
+from gamecore.decision import DecisionScheduler
+from gamecore.state import WorldState
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def move(bodies: list) -> None:
+    """
+    Function to change the state of the bodies as a few ticks of a game would
+    """
+    for body in bodies:
+        body.move()
+        body.speed += 1
+        body.angle -= 0.5
+        if hasattr(body, "boost"):
+            body.boost = 0
+    for body in bodies[2:]:
+        body.last_output = [1.0, 0.0, 0.0, 1.0]
+        body.decision_phase = 3
+
+
+def state_of(bodies: list) -> list:
+    """
+    Function to list the fields of the bodies restored by a WorldState
+    """
+    return [{name: getattr(body, name) for name in WorldState.STATE_FIELDS if hasattr(body, name)}
+            for body in bodies]
+
+
+def test_capture_restore_round_trip(game_bodies):
+    bodies = game_bodies
+    state = WorldState(bodies)
+    buffer = state.capture()
+    expected = [(body.x, body.y, body.speed, body.angle) for body in bodies]
+    assert len(buffer) == 4 * len(bodies)
+
+    move(bodies)
+    state.restore(buffer)
+    assert [(body.x, body.y, body.speed, body.angle) for body in bodies] == expected
+
+
+def test_capture_reuses_the_buffer(game_bodies):
+    bodies = game_bodies
+    state = WorldState(bodies)
+    buffer = state.capture()
+    move(bodies)
+    assert state.capture(buffer) is buffer
+    assert list(buffer) == [value for body in bodies for value in (body.x, body.y, body.speed, body.angle)]
+
+
+def test_restore_rejects_another_number_of_bodies(game_bodies):
+    bodies = game_bodies
+    buffer = WorldState(bodies).capture()
+    with pytest.raises(ValueError):
+        WorldState(bodies[:-1]).restore(buffer)
+
+
+def test_snapshot_load_round_trip(game_bodies):
+    bodies = game_bodies
+    scheduler = DecisionScheduler(3, adaptive=True)
+    state = WorldState(bodies, scheduler)
+    expected_bodies = state_of(bodies)
+    snapshot = state.snapshot(values=(1.5, 2, 3))
+
+    move(bodies)
+    scheduler.start_tick()
+    for aibot in bodies[2:]:
+        aibot.decision_phase = None
+        scheduler.decide(aibot)
+    assert (scheduler.tick, scheduler._next_phase) == (1, 2)
+    scheduler.interval, scheduler._tick_s = 5, 0.01
+    assert state_of(bodies) != expected_bodies
+
+    assert state.load(snapshot) == (1.5, 2, 3)
+    assert state_of(bodies) == expected_bodies
+    assert (scheduler.tick, scheduler._next_phase) == (0, 0)
+    # the interval tuned by the adaptive mode is kept from a generation to the next
+    assert (scheduler.interval, scheduler._tick_s) == (5, 0.01)
+
+
+def test_snapshot_is_not_changed_by_the_bodies(game_bodies):
+    bodies = game_bodies
+    state = WorldState(bodies)
+    snapshot = state.snapshot()
+    expected = state_of(bodies)
+    for _ in range(3):
+        move(bodies)
+        state.load(snapshot)
+    assert state_of(bodies) == expected
+
+
+def test_snapshot_restores_the_random_generator(game_bodies):
+    state = WorldState(game_bodies)
+    snapshot = state.snapshot(rng=True)
+    expected = [random.random() for _ in range(5)]
+    state.load(snapshot)
+    assert [random.random() for _ in range(5)] == expected
+
+
+def test_load_rejects_another_number_of_bodies(game_bodies):
+    bodies = game_bodies
+    snapshot = WorldState(bodies).snapshot()
+    with pytest.raises(ValueError):
+        WorldState(bodies[1:]).load(snapshot)
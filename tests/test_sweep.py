@@ -0,0 +1,48 @@
+"""
+Tests of the parameters of the sweep: the values read from the command line and the variants expanded from them
+"""
+# =====================================================================
+# Import
+# =====================================================================
+
+# Import internal modules
+import argparse
+
+# Import 3rd party modules
+import pytest
+
+# Import local modules
+from sweep import expand, parse_parameter
+
+
+# =====================================================================
+# Functions
+# =====================================================================
+
+def test_parse_values():
+    assert parse_parameter("pop_size=10,20") == ("pop_size", [10, 20])
+    assert parse_parameter("DefaultGenome.activation_default=tanh,relu") == (
+        "DefaultGenome.activation_default", ["tanh", "relu"])
+    assert parse_parameter("weight_mutate_rate=0.2:0.9") == ("weight_mutate_rate", (0.2, 0.9))
+    assert parse_parameter("num_hidden=0:3") == ("num_hidden", (0, 3))
+
+
+@pytest.mark.parametrize("text", ["pop_size", "=1,2", "pop_size=", "activation_default=tanh:relu",
+                                  "num_hidden=0:many", "weight_mutate_rate=0.9:0.2"])
+def test_parse_rejects(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_parameter(text)
+
+
+def test_expand_grid_and_random_search():
+    grid = expand({"pop_size": [10, 20], "num_hidden": [0, 1, 2]})
+    assert len(grid) == 6
+    assert grid[0] == {"pop_size": 10, "num_hidden": 0}
+
+    variants = expand({"num_hidden": (0, 3), "weight_mutate_rate": (0.2, 0.9), "pop_size": [10, 20]}, samples=20)
+    assert variants == expand({"num_hidden": (0, 3), "weight_mutate_rate": (0.2, 0.9), "pop_size": [10, 20]},
+                              samples=20)
+    assert all(0 <= variant["num_hidden"] <= 3 and 0.2 <= variant["weight_mutate_rate"] <= 0.9
+               for variant in variants)
+    with pytest.raises(ValueError):
+        expand({"num_hidden": (0, 3)})